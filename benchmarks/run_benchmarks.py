@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Benchmark pipeline stages on synthetic symptom datasets"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+import spacy
+
+from benchmarks.synthetic import SyntheticSymptomData
+from src import pipeline
+from src.balancer import DataBalancer
+from src.cleaner import MedicalTextPreprocessor
+from src.model import SpecialistClassifier
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_OUTPUT = 'benchmarks/results.json'
+
+
+def time_best(fn, repeat: int) -> float:
+    """Best wall time of fn over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@contextmanager
+def working_directory(path: str):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class BenchmarkRunner:
+    """Runs each benchmark at every dataset size and collects comparable results"""
+
+    def __init__(self, repeat: int = 3, rowwise_max_rows: int = 20_000, clean_max_rows: int = 5_000,
+                 train_max_rows: int = 200_000, e2e_max_rows: int = 100_000, seed: int = 0):
+        """
+        Slow benchmarks run on at most *_max_rows rows; results record the
+        rows actually measured and throughput so sizes stay comparable.
+        """
+        self.repeat = repeat
+        self.rowwise_max_rows = rowwise_max_rows
+        self.clean_max_rows = clean_max_rows
+        self.train_max_rows = train_max_rows
+        self.e2e_max_rows = e2e_max_rows
+        self.generator = SyntheticSymptomData(seed=seed)
+        self.results = []
+        self._cleaner = None
+
+    def record(self, name: str, rows: int, measured_rows: int, seconds: float, **extra):
+        result = {
+            'benchmark': name,
+            'rows': rows,
+            'measured_rows': measured_rows,
+            'seconds': round(seconds, 6),
+            'rows_per_s': round(measured_rows / seconds, 1) if seconds > 0 else None,
+        }
+        result.update(extra)
+        self.results.append(result)
+        print(f"  {name:<32} {measured_rows:>9} rows  {seconds:9.3f}s  {result['rows_per_s'] or 0:>12.0f} rows/s")
+
+    def skip(self, name: str, rows: int, reason: str):
+        self.results.append({'benchmark': name, 'rows': rows, 'skipped': reason})
+        print(f"  {name:<32} skipped: {reason}")
+
+    @property
+    def cleaner(self):
+        if self._cleaner is None:
+            # Cache disabled so every call measures spaCy itself
+            self._cleaner = MedicalTextPreprocessor(cache_size=0)
+        return self._cleaner
+
+    def run_size(self, n_rows: int):
+        print(f"\n{n_rows} rows")
+        df = self.generator.generate(n_rows)
+
+        sample = df.iloc[:self.rowwise_max_rows]
+        seconds = time_best(lambda: sample.apply(pipeline.convert_binary_symptoms_to_text, axis=1), 1)
+        self.record('convert_rowwise', n_rows, len(sample), seconds)
+
+        seconds = time_best(lambda: pipeline.convert_symptom_matrix_to_text(df), self.repeat)
+        self.record('convert_vectorized', n_rows, n_rows, seconds)
+        seconds = time_best(lambda: pipeline.convert_symptom_matrix_to_text(df, as_indices=True), self.repeat)
+        self.record('convert_sparse', n_rows, n_rows, seconds)
+
+        frame = pd.DataFrame({'label': df['diseases'], 'text': pipeline.convert_symptom_matrix_to_text(df)})
+        frame['specialist'] = frame['label'].str.lower().map(pipeline.SPECIALIST_MAP).fillna('General Practice')
+
+        texts = frame['text'].iloc[:self.clean_max_rows].tolist()
+        try:
+            seconds = time_best(lambda: [self.cleaner.clean_text(t) for t in texts], 1)
+            self.record('clean_text', n_rows, len(texts), seconds)
+            seconds = time_best(lambda: self.cleaner.clean_batch(texts), 1)
+            self.record('clean_batch', n_rows, len(texts), seconds)
+        except OSError as e:
+            self.skip('clean_text', n_rows, str(e))
+
+        balancer = DataBalancer(strategy='moderate')
+        seconds = time_best(lambda: balancer.balance_dataset(frame, target_col='specialist'), self.repeat)
+        self.record('balance_dataset', n_rows, n_rows, seconds)
+
+        train = frame.iloc[:self.train_max_rows]
+        classifier = SpecialistClassifier()
+        seconds = time_best(lambda: classifier.train(train['text'], train['specialist']), 1)
+        self.record('train', n_rows, len(train), seconds)
+        seconds = time_best(lambda: classifier.predict(train['text']), self.repeat)
+        self.record('predict', n_rows, len(train), seconds)
+
+        matrix = pipeline.convert_symptom_matrix_to_text(df.iloc[:self.train_max_rows], as_indices=True)
+        symptom_columns = self.generator.symptom_columns
+        binary = SpecialistClassifier()
+        seconds = time_best(lambda: binary.train_binary(matrix, train['specialist'], symptom_columns), 1)
+        self.record('train_binary', n_rows, len(train), seconds)
+        seconds = time_best(lambda: binary.predict(matrix), self.repeat)
+        self.record('predict_binary', n_rows, len(train), seconds)
+
+        self.run_end_to_end(n_rows)
+
+    def run_end_to_end(self, n_rows: int):
+        measured = min(n_rows, self.e2e_max_rows)
+        with tempfile.TemporaryDirectory() as tmp, working_directory(tmp):
+            self.generator.write_csv(pipeline.RAW_DATA_PATH, measured)
+            for name, run in [('end_to_end', pipeline.run_pipeline),
+                              ('end_to_end_binary', pipeline.run_binary_pipeline)]:
+                try:
+                    seconds = time_best(run, 1)
+                except OSError as e:
+                    self.skip(name, n_rows, str(e))
+                    continue
+                with open(pipeline.RUN_REPORT_PATH) as f:
+                    stages = {k: round(v['wall_s'], 4) for k, v in json.load(f)['stages'].items()}
+                self.record(name, n_rows, measured, seconds, stages=stages)
+
+    def report(self) -> dict:
+        return {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'scikit-learn': sklearn.__version__,
+                'spacy': spacy.__version__,
+            },
+            'results': self.results,
+        }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Benchmarks whose throughput dropped by more than threshold versus baseline"""
+    previous = {
+        (r['benchmark'], r['rows']): r for r in baseline['results'] if r.get('rows_per_s')
+    }
+    regressions = []
+    for result in current['results']:
+        old = previous.get((result['benchmark'], result['rows']))
+        if old is None or not result.get('rows_per_s'):
+            continue
+        ratio = result['rows_per_s'] / old['rows_per_s']
+        marker = 'REGRESSION' if ratio < 1 - threshold else ''
+        print(f"  {result['benchmark']:<32} {result['rows']:>9}  {ratio:6.2f}x  {marker}")
+        if marker:
+            regressions.append(result['benchmark'])
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per fast benchmark (best time is kept)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--compare', help="Baseline results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed throughput drop versus baseline before failing")
+    parser.add_argument('--e2e-max-rows', type=int, default=100_000)
+    parser.add_argument('--train-max-rows', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Stage logging and per-class metric warnings would drown out the benchmark table
+    logging.getLogger().setLevel(logging.WARNING)
+    warnings.filterwarnings('ignore', module='sklearn.metrics')
+
+    runner = BenchmarkRunner(repeat=args.repeat, train_max_rows=args.train_max_rows,
+                             e2e_max_rows=args.e2e_max_rows, seed=args.seed)
+    for size in args.sizes:
+        runner.run_size(size)
+
+    report = runner.report()
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nThroughput versus {args.compare}:")
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,91 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+from typing import Iterator
+from src.pipeline import SPECIALIST_MAP
+
+ADJECTIVES = ['sharp', 'dull', 'burning', 'mild', 'severe', 'chronic', 'sudden', 'recurrent']
+BODY_PARTS = ['chest', 'abdominal', 'back', 'neck', 'knee', 'head', 'skin',
+              'eye', 'ear', 'throat', 'leg', 'arm']
+FINDINGS = ['pain', 'swelling', 'rash', 'itching', 'weakness', 'stiffness',
+            'cramps', 'redness', 'bleeding', 'numbness']
+
+
+class SyntheticSymptomData:
+    """
+    Generates datasets shaped like data/raw/dataset.csv
+
+    A 'diseases' column followed by binary symptom columns. Each disease has
+    a handful of characteristic symptoms plus background noise. Diseases
+    outside SPECIALIST_MAP fall back to General Practice, and they are drawn
+    with probability majority_share to reproduce the real skew (93%).
+    """
+
+    def __init__(self, n_symptoms: int = 377, n_unmapped_diseases: int = 200,
+                 majority_share: float = 0.93, noise: float = 0.005, seed: int = 0):
+        """
+        Args:
+            n_symptoms: Number of binary symptom columns
+            n_unmapped_diseases: Diseases that map to General Practice by fallback
+            majority_share: Fraction of rows drawn from the unmapped diseases
+            noise: Probability of any non-characteristic symptom being present
+            seed: Random seed; the same seed always yields the same data
+        """
+        rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.noise = noise
+
+        combos = [" ".join(c) for c in itertools.product(ADJECTIVES, BODY_PARTS, FINDINGS)]
+        if n_symptoms > len(combos):
+            raise ValueError(f"At most {len(combos)} symptom columns are supported")
+        self.symptom_columns = [combos[i] for i in rng.permutation(len(combos))[:n_symptoms]]
+
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        unmapped = [f"syndrome {letters[i // 26 % 26]}{letters[i % 26]}" for i in range(n_unmapped_diseases)]
+        mapped = list(SPECIALIST_MAP)
+        self.diseases = np.array(unmapped + mapped, dtype=object)
+
+        # Skewed sampling: unmapped diseases share majority_share, mapped ones follow a Zipf-like tail
+        unmapped_p = np.full(len(unmapped), majority_share / len(unmapped))
+        tail = 1.0 / np.arange(1, len(mapped) + 1)
+        mapped_p = (1 - majority_share) * tail / tail.sum()
+        self.disease_p = np.concatenate([unmapped_p, mapped_p])
+
+        # Each disease gets 3-8 characteristic symptoms present 70% of the time
+        self.profiles = np.full((len(self.diseases), n_symptoms), noise, dtype=np.float32)
+        for i in range(len(self.diseases)):
+            characteristic = rng.choice(n_symptoms, size=rng.integers(3, 9), replace=False)
+            self.profiles[i, characteristic] = 0.7
+
+    def iter_chunks(self, n_rows: int, chunk_size: int = 50_000) -> Iterator[pd.DataFrame]:
+        """
+        Yield the dataset in chunks so 1M+ rows never sit in memory as floats
+
+        Diseases and symptoms come from separate random streams, so the
+        data does not depend on chunk_size.
+        """
+        disease_rng = np.random.default_rng([self.seed, 1])
+        symptom_rng = np.random.default_rng([self.seed, 2])
+        for start in range(0, n_rows, chunk_size):
+            size = min(chunk_size, n_rows - start)
+            disease_idx = disease_rng.choice(len(self.diseases), size=size, p=self.disease_p)
+            draws = symptom_rng.random((size, len(self.symptom_columns)), dtype=np.float32)
+            symptoms = (draws < self.profiles[disease_idx]).astype(np.uint8)
+
+            chunk = pd.DataFrame(symptoms, columns=self.symptom_columns,
+                                 index=pd.RangeIndex(start, start + size))
+            chunk.insert(0, 'diseases', self.diseases[disease_idx])
+            yield chunk
+
+    def generate(self, n_rows: int) -> pd.DataFrame:
+        """Whole dataset as one frame with uint8 symptom columns"""
+        return pd.concat(self.iter_chunks(n_rows))
+
+    def write_csv(self, path: str, n_rows: int, chunk_size: int = 50_000):
+        """Write the dataset to path in the raw CSV layout"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for i, chunk in enumerate(self.iter_chunks(n_rows, chunk_size)):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
@@ -0,0 +1,337 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import List
+
+import numpy as np
+
+from src.scoring import TopKMixin, link_for, probabilities
+
+# scikit-learn is imported inside the functions that build or take pipelines,
+# so read_metadata and LinearTextScorer load without it
+
+# Bump when the on-disk layout changes; load refuses unknown versions
+ARTIFACT_FORMAT_VERSION = 1
+METADATA_FILE = 'metadata.json'
+
+# Vectorizer settings needed to reproduce tokenization at load time
+VECTORIZER_PARAMS = [
+    'lowercase', 'strip_accents', 'token_pattern', 'ngram_range', 'analyzer',
+    'stop_words', 'binary', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf',
+]
+TRANSFORMER_PARAMS = ['norm', 'use_idf', 'smooth_idf', 'sublinear_tf']
+HASHING_PARAMS = [
+    'n_features', 'alternate_sign', 'lowercase', 'strip_accents', 'token_pattern',
+    'ngram_range', 'analyzer', 'stop_words', 'binary', 'norm',
+]
+
+# Fitted attributes partial_fit needs to continue where training stopped
+CLASSIFIER_STATE = ['t_']
+
+
+def _json_params(estimator) -> dict:
+    """Estimator params that survive a JSON round trip"""
+    return {
+        key: value for key, value in estimator.get_params().items()
+        if value is None or isinstance(value, (str, int, float, bool, list, tuple))
+    }
+
+
+def _save_array(path: str, name: str, array) -> str:
+    filename = f"{name}.npy"
+    np.save(os.path.join(path, filename), np.ascontiguousarray(array))
+    return filename
+
+
+def _replace_directory(tmp_path: str, path: str):
+    """Move a finished directory into place, deleting what was there only after the swap"""
+    old_path = None
+    if os.path.lexists(path):
+        old_path = f"{path}.old-{uuid.uuid4().hex}"
+        os.replace(path, old_path)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        if old_path is not None:
+            os.replace(old_path, path)
+        raise
+    if old_path is not None:
+        if os.path.isdir(old_path) and not os.path.islink(old_path):
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.remove(old_path)
+
+
+def write_artifact(path: str, pipeline, feature_mode: str, training: dict = None, calibration: dict = None):
+    """
+    Write a fitted pipeline as metadata.json plus one .npy file per array
+
+    Terms/symptom names, IDF weights and classifier coefficients are stored
+    as plain NumPy arrays so they can be memory-mapped at load time.
+    The artifact is written to a sibling directory and renamed into place,
+    so files a running server has memory-mapped are never truncated and
+    readers see the old artifact or the new one, never a mix.
+
+    Args:
+        path: Artifact directory
+        pipeline: Fitted pipeline in 'text', 'binary' or 'hashing' layout
+        feature_mode: Which of those layouts the pipeline uses
+        training: Optional bookkeeping stored alongside (e.g. incremental update counts)
+        calibration: Optional probability calibration (e.g. the fitted temperature)
+    """
+    path = os.path.normpath(path)
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp_path)
+    try:
+        _write_files(tmp_path, pipeline, feature_mode, training, calibration)
+        _replace_directory(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def _write_files(path: str, pipeline, feature_mode: str, training: dict, calibration: dict):
+    classifier = pipeline.named_steps['classifier']
+
+    arrays = {
+        'coef': _save_array(path, 'coef', classifier.coef_),
+        'intercept': _save_array(path, 'intercept', classifier.intercept_),
+    }
+    if feature_mode == 'hashing':
+        hashing = pipeline.named_steps['hashing']
+        features = {key: hashing.get_params()[key] for key in HASHING_PARAMS}
+    else:
+        tfidf = pipeline.named_steps['tfidf']
+        if feature_mode == 'text':
+            terms = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+            features = {key: tfidf.get_params()[key] for key in VECTORIZER_PARAMS}
+        else:
+            terms = pipeline.named_steps['symptoms'].symptom_columns
+            features = {key: tfidf.get_params()[key] for key in TRANSFORMER_PARAMS}
+        arrays['terms'] = _save_array(path, 'terms', np.array(terms, dtype=str))
+        if tfidf.use_idf:
+            arrays['idf'] = _save_array(path, 'idf', tfidf.idf_)
+
+    state = {key: getattr(classifier, key) for key in CLASSIFIER_STATE if hasattr(classifier, key)}
+    metadata = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'artifact_id': uuid.uuid4().hex,
+        'feature_mode': feature_mode,
+        'classes': [str(c) for c in classifier.classes_],
+        'n_features': int(classifier.coef_.shape[1]),
+        'features': features,
+        'classifier': {
+            'type': type(classifier).__name__,
+            'params': _json_params(classifier),
+            'state': state,
+        },
+        'training': training or {},
+        'calibration': calibration or {},
+        'arrays': arrays,
+    }
+    with open(os.path.join(path, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def read_metadata(path: str) -> dict:
+    metadata_path = os.path.join(path, METADATA_FILE)
+    if not os.path.exists(metadata_path):
+        raise FileNotFoundError(f"No model artifact at {path} (missing {METADATA_FILE})")
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    if metadata.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported model artifact version {metadata.get('format_version')} "
+            f"(expected {ARTIFACT_FORMAT_VERSION})"
+        )
+    return metadata
+
+
+def read_arrays(path: str, mmap: bool = True, attempts: int = 5):
+    """
+    Metadata and arrays of one artifact version
+
+    A save landing between reading metadata.json and the arrays swaps the
+    directory underneath; the read is retried until both come from the
+    same version.
+
+    Returns:
+        (metadata, {array name: array})
+    """
+    mmap_mode = 'r' if mmap else None
+    for attempt in range(attempts):
+        try:
+            metadata = read_metadata(path)
+            arrays = {
+                name: np.load(os.path.join(path, filename), mmap_mode=mmap_mode)
+                for name, filename in metadata['arrays'].items()
+            }
+            if read_metadata(path).get('artifact_id') == metadata.get('artifact_id'):
+                return metadata, arrays
+        except FileNotFoundError:
+            # Mid-swap, or no artifact at all
+            if attempt == attempts - 1:
+                raise
+        time.sleep(0.01 * (attempt + 1))
+    raise RuntimeError(f"Model artifact at {path} kept changing while it was being read")
+
+
+def read_artifact(path: str, mmap: bool = True):
+    """
+    Rebuild a fitted pipeline from an artifact directory without refitting
+
+    Args:
+        path: Directory written by write_artifact
+        mmap: Memory-map the arrays read-only so processes share pages
+
+    Returns:
+        (pipeline, metadata)
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer, HashingVectorizer
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.pipeline import Pipeline
+    from src.features import SymptomVocabulary
+
+    metadata, arrays = read_arrays(path, mmap)
+    features = metadata['features']
+    n_features = metadata['n_features']
+
+    if metadata['feature_mode'] == 'hashing':
+        params = dict(features)
+        params['ngram_range'] = tuple(params['ngram_range'])
+        steps = [('hashing', HashingVectorizer(**params))]
+    else:
+        transformer = TfidfTransformer(**{key: features[key] for key in TRANSFORMER_PARAMS})
+        transformer.n_features_in_ = n_features
+        if 'idf' in arrays:
+            transformer.idf_ = arrays['idf']
+
+        terms = arrays['terms'].tolist()
+        if metadata['feature_mode'] == 'text':
+            params = dict(features)
+            params['ngram_range'] = tuple(params['ngram_range'])
+            vectorizer = TfidfVectorizer(**params)
+            vectorizer.vocabulary_ = dict(zip(terms, range(len(terms))))
+            vectorizer._tfidf = transformer
+            steps = [('tfidf', vectorizer)]
+        else:
+            steps = [('symptoms', SymptomVocabulary(terms).fit()), ('tfidf', transformer)]
+
+    classifier_meta = metadata['classifier']
+    classifiers = {cls.__name__: cls for cls in (LogisticRegression, SGDClassifier)}
+    classifier = classifiers[classifier_meta['type']](**classifier_meta['params'])
+    classifier.classes_ = np.array(metadata['classes'], dtype=object)
+    classifier.coef_ = arrays['coef']
+    classifier.intercept_ = arrays['intercept']
+    classifier.n_features_in_ = n_features
+    for key, value in classifier_meta.get('state', {}).items():
+        setattr(classifier, key, value)
+    steps.append(('classifier', classifier))
+
+    return Pipeline(steps), metadata
+
+
+class LinearTextScorer(TopKMixin):
+    """
+    NumPy-only predictor for 'text' artifacts (TF-IDF + logistic regression)
+
+    Reproduces TfidfVectorizer.transform and LogisticRegression.predict_proba
+    from the stored arrays, so one-off predictions skip importing
+    scikit-learn, scipy and pandas. Use supports() to check an artifact
+    first; anything else loads through SpecialistClassifier.load.
+    """
+
+    feature_mode = 'text'
+
+    @staticmethod
+    def supports(metadata: dict) -> bool:
+        features = metadata['features']
+        classifier = metadata['classifier']
+        return (
+            metadata['feature_mode'] == 'text'
+            and classifier['type'] == 'LogisticRegression'
+            and classifier['params'].get('multi_class', 'auto') != 'ovr'
+            and features['analyzer'] == 'word'
+            and list(features['ngram_range']) == [1, 1]
+            and features['stop_words'] is None
+            and features['strip_accents'] is None
+            and features['norm'] in ('l1', 'l2', None)
+        )
+
+    def __init__(self, path: str, mmap: bool = True):
+        """
+        Args:
+            path: Directory written by write_artifact
+            mmap: Memory-map the arrays read-only
+        """
+        self.metadata, arrays = read_arrays(path, mmap)
+        if not self.supports(self.metadata):
+            raise ValueError(f"Artifact at {path} needs the scikit-learn pipeline (SpecialistClassifier.load)")
+
+        features = self.metadata['features']
+        self._features = features
+        self._token_pattern = re.compile(features['token_pattern'])
+        self._vocabulary = {term: i for i, term in enumerate(arrays['terms'].tolist())}
+        self._idf = arrays.get('idf') if features['use_idf'] else None
+        self._coef = arrays['coef']
+        self._intercept = arrays['intercept']
+        self.classes_ = np.array(self.metadata['classes'], dtype=object)
+        self.link = link_for(self.metadata['classifier']['type'], len(self.classes_))
+        self.temperature = self.metadata.get('calibration', {}).get('temperature', 1.0)
+
+    def _features_of(self, text: str):
+        """Column indices and TF-IDF weights of one text"""
+        if self._features['lowercase']:
+            text = text.lower()
+        indices = [self._vocabulary[t] for t in self._token_pattern.findall(text) if t in self._vocabulary]
+        indices, counts = np.unique(np.asarray(indices, dtype=np.int64), return_counts=True)
+
+        weights = counts.astype(np.float64)
+        if self._features['binary']:
+            weights[:] = 1.0
+        if self._features['sublinear_tf']:
+            weights = np.log(weights) + 1.0
+        if self._idf is not None:
+            weights *= self._idf[indices]
+        norm = self._features['norm']
+        if norm == 'l2':
+            total = np.sqrt(np.dot(weights, weights))
+        elif norm == 'l1':
+            total = np.abs(weights).sum()
+        else:
+            total = 0.0
+        if total > 0:
+            weights /= total
+        return indices, weights
+
+    def decision_function(self, texts: List[str]) -> np.ndarray:
+        """
+        Scores for a batch as one sparse product
+
+        The non-zero features of every text are concatenated, their
+        coefficient columns gathered once and summed per row.
+        """
+        features = [self._features_of(text) for text in texts]
+        scores = np.tile(np.asarray(self._intercept, dtype=np.float64), (len(texts), 1))
+        lengths = np.array([len(indices) for indices, _ in features], dtype=np.int64)
+        if not lengths.sum():
+            return scores
+        indices = np.concatenate([indices for indices, _ in features])
+        weights = np.concatenate([weights for _, weights in features])
+        rows = np.flatnonzero(lengths)
+        starts = (np.cumsum(lengths) - lengths)[rows]
+        # Consecutive starts of non-empty rows bound each row's contributions
+        scores[rows] += np.add.reduceat(self._coef[:, indices] * weights, starts, axis=1).T
+        return scores
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        return probabilities(self.decision_function(texts), self.link)
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        return self.classes_[self.predict_proba(texts).argmax(axis=1)]
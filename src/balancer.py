@@ -1,10 +1,12 @@
 import pandas as pd
+import numpy as np
 import logging
+import os
 from typing import Optional
 
 class DataBalancer:
     """Handles class balancing using undersampling"""
-    
+
     def __init__(self, strategy: str = 'moderate', random_state: int = 42):
         """
         Args:
@@ -18,69 +20,158 @@ class DataBalancer:
             'moderate': {'max_ratio': 5.0, 'min_samples': 100},
             'conservative': {'max_ratio': 10.0, 'min_samples': 200}
         }
-        
-    def balance_dataset(self, df: pd.DataFrame, target_col: str = 'specialist') -> pd.DataFrame:
-        """
-        Balance dataset by undersampling majority classes
-        
-        Args:
-            df: Input dataframe
-            target_col: Column containing class labels
-            
-        Returns:
-            Balanced dataframe
-        """
-        if target_col not in df.columns:
-            logging.error(f"Target column '{target_col}' not found")
-            return df
-            
-        original_counts = df[target_col].value_counts()
-        logging.info(f"Original distribution: {len(df)} total samples")
-        
+
+    def _target_size(self, original_counts: pd.Series) -> Optional[int]:
+        """Max samples kept per class, or None if no class is large enough"""
         # Get strategy parameters
         params = self.strategy_params[self.strategy]
         max_ratio = params['max_ratio']
         min_samples = params['min_samples']
-        
+
         # Find minority class size (excluding very rare classes)
         class_counts = original_counts[original_counts >= min_samples]
         if len(class_counts) == 0:
             logging.warning("No classes with sufficient samples, using all data")
-            return df
-            
+            return None
+
         minority_size = class_counts.min()
         target_size = int(minority_size * max_ratio)
-        
+
         logging.info(f"Using {self.strategy} strategy:")
         logging.info(f"  Minority class size: {minority_size}")
         logging.info(f"  Target max size per class: {target_size}")
-        
-        # Sample from each class
-        balanced_dfs = []
-        for class_label in df[target_col].unique():
-            class_df = df[df[target_col] == class_label]
-            class_size = len(class_df)
-            
-            if class_size <= target_size:
-                # Keep all samples for small classes
-                sampled = class_df
-            else:
-                # Undersample large classes
-                sampled = class_df.sample(n=target_size, random_state=self.random_state)
-                
-            balanced_dfs.append(sampled)
-        
-        balanced_df = pd.concat(balanced_dfs, ignore_index=True)
-        balanced_df = balanced_df.sample(frac=1, random_state=self.random_state).reset_index(drop=True)
-        
-        # Log results
+        return target_size
+
+    def _log_results(self, original_counts: pd.Series, balanced_df: pd.DataFrame, target_col: str):
+        original_total = int(original_counts.sum())
         new_counts = balanced_df[target_col].value_counts()
         logging.info(f"\nBalanced distribution: {len(balanced_df)} total samples")
-        logging.info(f"Reduction: {len(df)} -> {len(balanced_df)} ({len(balanced_df)/len(df)*100:.1f}%)")
-        
+        logging.info(f"Reduction: {original_total} -> {len(balanced_df)} ({len(balanced_df)/original_total*100:.1f}%)")
+
         for class_label in sorted(new_counts.index):
             original = original_counts.get(class_label, 0)
             new = new_counts[class_label]
             logging.info(f"  {class_label}: {original} -> {new}")
-        
+
+    def sample_indices(self, labels, target_size: int) -> np.ndarray:
+        """
+        Positions of a shuffled sample keeping at most target_size rows per class
+
+        Every row gets a random key from the seeded generator and each class
+        keeps the rows with its smallest keys, in a single groupby pass.
+        Rows are returned in key order, which doubles as the final shuffle.
+        """
+        codes, _ = pd.factorize(np.asarray(labels))
+        keys = np.random.default_rng(self.random_state).random(len(codes))
+        order = np.argsort(keys, kind='stable')
+
+        ordered_codes = codes[order]
+        rank = pd.Series(ordered_codes).groupby(ordered_codes).cumcount().to_numpy()
+        keep = (rank < target_size) & (ordered_codes >= 0)
+        return order[keep]
+
+    def balanced_positions(self, labels: pd.Series) -> np.ndarray:
+        """
+        Positions of a balanced, shuffled sample of labels
+
+        Useful when the features live outside a dataframe (e.g. a sparse matrix).
+        """
+        original_counts = labels.value_counts()
+        logging.info(f"Original distribution: {len(labels)} total samples")
+
+        target_size = self._target_size(original_counts)
+        if target_size is None:
+            return np.arange(len(labels))
+        return self.sample_indices(labels, target_size)
+
+    def balance_dataset(self, df: pd.DataFrame, target_col: str = 'specialist') -> pd.DataFrame:
+        """
+        Balance dataset by undersampling majority classes
+
+        Args:
+            df: Input dataframe
+            target_col: Column containing class labels
+
+        Returns:
+            Balanced dataframe
+        """
+        if target_col not in df.columns:
+            logging.error(f"Target column '{target_col}' not found")
+            return df
+
+        original_counts = df[target_col].value_counts()
+        logging.info(f"Original distribution: {len(df)} total samples")
+
+        target_size = self._target_size(original_counts)
+        if target_size is None:
+            return df
+
+        positions = self.sample_indices(df[target_col], target_size)
+        balanced_df = df.iloc[positions].reset_index(drop=True)
+
+        self._log_results(original_counts, balanced_df, target_col)
+        return balanced_df
+
+    def balance_csv(self, path: str, target_col: str = 'specialist',
+                    chunk_size: int = 100_000, pending: Optional[pd.DataFrame] = None,
+                    **read_kwargs) -> pd.DataFrame:
+        """
+        Balance a CSV that does not fit in memory
+
+        A first pass reads only target_col to count classes. A second pass
+        keeps a per-class reservoir of at most target_size rows, so memory
+        is bounded by classes x target_size plus one chunk. For the same
+        data and random_state the result matches balance_dataset.
+
+        Args:
+            path: CSV file to balance; may be missing if pending is given
+            target_col: Column containing class labels
+            chunk_size: Rows read per chunk
+            pending: Rows balanced as if already appended to the file
+            **read_kwargs: Extra arguments for pd.read_csv (e.g. usecols)
+
+        Returns:
+            Balanced dataframe
+        """
+        def chunks(usecols=None, **kwargs):
+            if os.path.exists(path) or pending is None:
+                yield from pd.read_csv(path, usecols=usecols, chunksize=chunk_size, **kwargs)
+            if pending is not None:
+                yield pending[list(usecols)] if usecols is not None else pending.copy()
+
+        original_counts = pd.Series(dtype='int64')
+        for chunk in chunks(usecols=[target_col]):
+            original_counts = original_counts.add(chunk[target_col].value_counts(), fill_value=0)
+        original_counts = original_counts.astype('int64').sort_values(ascending=False)
+        logging.info(f"Original distribution: {int(original_counts.sum())} total samples")
+
+        target_size = self._target_size(original_counts)
+        if target_size is None:
+            return pd.concat(list(chunks(**read_kwargs)), ignore_index=True)
+
+        # Keys are drawn in file order, so they do not depend on chunk_size
+        rng = np.random.default_rng(self.random_state)
+        reservoirs = {}
+        for chunk in chunks(**read_kwargs):
+            chunk['_key'] = rng.random(len(chunk))
+            for class_label, group in chunk.groupby(target_col, sort=False):
+                if class_label in reservoirs:
+                    group = pd.concat([reservoirs[class_label], group])
+                if len(group) > target_size:
+                    group = group.nsmallest(target_size, '_key')
+                reservoirs[class_label] = group
+
+        if not reservoirs:
+            if not os.path.exists(path):
+                return pending.iloc[:0]
+            return pd.read_csv(path, nrows=0, **read_kwargs)
+
+        balanced_df = (
+            pd.concat(reservoirs.values())
+            .sort_values('_key', kind='stable')
+            .drop(columns='_key')
+            .reset_index(drop=True)
+        )
+
+        self._log_results(original_counts, balanced_df, target_col)
         return balanced_df
@@ -0,0 +1,151 @@
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Optional
+
+# The on-disk store is pruned back to max_size once it grows past this factor of it
+PRUNE_SLACK = 1.1
+
+
+class CleaningCache:
+    """Bounded LRU cache of cleaned text with optional SQLite persistence"""
+
+    def __init__(self, max_size: int = 100_000, namespace: str = 'default', track_added: bool = False):
+        """
+        Args:
+            max_size: Maximum number of entries kept in memory
+            namespace: Key prefix in the on-disk store, e.g. spaCy model name and version
+            track_added: Remember entries put since the last pop_added (not loaded
+                ones, at most max_size), so save writes only new cleanings and a
+                worker process can hand its new cleanings back
+        """
+        self.max_size = max_size
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self.track_added = track_added
+        self._added = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value and mark it recently used, or None on a miss"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        """Store a value, evicting the least recently used entries beyond max_size"""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if self.track_added:
+            self._added[key] = value
+            if len(self._added) > self.max_size:
+                del self._added[next(iter(self._added))]
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop_added(self) -> dict:
+        """Entries put since the last call (empty unless track_added)"""
+        added, self._added = self._added, {}
+        return added
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+        }
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cleaned_text ("
+            "namespace TEXT NOT NULL, text TEXT NOT NULL, cleaned TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, text))"
+        )
+        return conn
+
+    def load(self, path: str) -> int:
+        """
+        Load the most recently saved entries for this namespace
+
+        Returns:
+            Number of entries loaded
+        """
+        if not os.path.exists(path):
+            return 0
+
+        conn = self._connect(path)
+        try:
+            rows = conn.execute(
+                "SELECT text, cleaned FROM cleaned_text WHERE namespace = ? "
+                "ORDER BY rowid DESC LIMIT ?",
+                (self.namespace, self.max_size),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        # Oldest first so the newest entries end up most recently used
+        for text, cleaned in reversed(rows):
+            self.put(text, cleaned)
+        self._added.clear()
+
+        logging.info(f"Loaded {len(rows)} cached cleanings from {path}")
+        return len(rows)
+
+    def save(self, path: str):
+        """
+        Write entries to the SQLite store at path
+
+        With track_added only entries put since the last save are written,
+        so a run with a handful of misses does not rewrite the whole cache.
+        The store keeps the newest max_size entries per namespace (all that
+        load reads back); older ones are pruned once it outgrows that.
+        """
+        entries = self.pop_added() if self.track_added else self._entries
+        if not entries:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect(path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cleaned_text (namespace, text, cleaned) VALUES (?, ?, ?)",
+                    ((self.namespace, text, cleaned) for text, cleaned in entries.items()),
+                )
+                self._prune(conn)
+        finally:
+            conn.close()
+
+        logging.info(f"Saved {len(entries)} cached cleanings to {path}")
+
+    def _prune(self, conn: sqlite3.Connection):
+        # Rows never outnumber the rowid span, so this O(log n) check skips the scan on most saves
+        low, high = conn.execute("SELECT MIN(rowid), MAX(rowid) FROM cleaned_text").fetchone()
+        if high - low + 1 <= self.max_size * PRUNE_SLACK:
+            return
+        conn.execute(
+            "DELETE FROM cleaned_text WHERE namespace = ? AND rowid < ("
+            "SELECT rowid FROM cleaned_text WHERE namespace = ? ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_size - 1),
+        )
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Callable, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+def stage_key(stage: str, *parts) -> str:
+    """Stable short hash of a stage name, its upstream key and its config"""
+    payload = json.dumps([stage, parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CheckpointStore:
+    """Parquet checkpoints of stage outputs, keyed by a hash of their inputs and config"""
+
+    def __init__(self, root: str = 'data/checkpoints'):
+        if pq is None:
+            raise ImportError("Checkpoints need pyarrow. Please run: pip install pyarrow")
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._fingerprints_path = os.path.join(root, 'fingerprints.json')
+
+    def path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, f"{stage}-{key}.parquet")
+
+    def exists(self, stage: str, key: str) -> bool:
+        return os.path.exists(self.path(stage, key))
+
+    def load(self, stage: str, key: str) -> Optional[pd.DataFrame]:
+        """Checkpointed frame, or None if there is no valid checkpoint for key"""
+        path = self.path(stage, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except (OSError, pa.ArrowException) as e:
+            logging.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+        logging.info(f"Resumed '{stage}' from checkpoint {path} ({len(df)} rows)")
+        return df
+
+    def save(self, stage: str, key: str, df: pd.DataFrame):
+        """Write a checkpoint atomically so a crash never leaves a partial file behind"""
+        path = self.path(stage, key)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        logging.info(f"Checkpointed '{stage}' to {path}")
+
+    def cached(self, stage: str, key: str, compute: Callable[[], Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """
+        Load the checkpoint for key, or compute and checkpoint it
+
+        Chaining cached calls (each compute loads its upstream stage through
+        cached) resumes from the newest valid checkpoint. A compute that
+        returns None (e.g. failed validation) is not checkpointed.
+        """
+        df = self.load(stage, key)
+        if df is None:
+            df = compute()
+            if df is not None:
+                self.save(stage, key, df)
+        return df
+
+    def fingerprint(self, path: str, block_size: int = 1 << 20) -> str:
+        """
+        Content hash of a file
+
+        Hashes are remembered by path, size and mtime, so unchanged inputs
+        are not re-read on every run.
+        """
+        stat = os.stat(path)
+        known = {}
+        if os.path.exists(self._fingerprints_path):
+            with open(self._fingerprints_path) as f:
+                known = json.load(f)
+
+        abspath = os.path.abspath(path)
+        entry = known.get(abspath)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+
+        sha256 = file_sha256(path, block_size)
+        known[abspath] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        with open(self._fingerprints_path, 'w') as f:
+            json.dump(known, f, indent=2)
+        return sha256
+
+    def convert_raw_csv(self, csv_path: str, dtypes: dict, chunk_size: int = 50_000) -> tuple:
+        """
+        Convert the raw CSV to Parquet once, keyed by its content hash
+
+        Symptom columns keep the read dtypes (nullable, so blank cells are
+        left for validation). Parquet's dictionary and RLE/bit-packing
+        encodings store 0/1 columns at about one bit per value, and only
+        the needed columns are decoded on read.
+
+        Returns:
+            (parquet_path, raw_key)
+        """
+        raw_key = self.fingerprint(csv_path)
+        path = self.path('raw', raw_key[:16])
+        if os.path.exists(path):
+            return path, raw_key
+
+        logging.info(f"Converting {csv_path} to {path}...")
+        tmp_path = f"{path}.tmp"
+        writer = None
+        try:
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_size, dtype=dtypes):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema, compression='zstd')
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            raise ValueError(f"No rows found in {csv_path}")
+        os.replace(tmp_path, path)
+
+        csv_mb = os.path.getsize(csv_path) / (1024 * 1024)
+        parquet_mb = os.path.getsize(path) / (1024 * 1024)
+        logging.info(f"Raw data stored as Parquet: {csv_mb:.1f} MB -> {parquet_mb:.1f} MB")
+        return path, raw_key
+
@@ -1,34 +1,184 @@
-import spacy
+import importlib.util
+import json
+import os
 import re
 import logging
+import numpy as np
+from typing import Iterable, List, Optional
+from src.cache import CleaningCache
+
+
+def _model_meta(model: str) -> Optional[dict]:
+    """meta.json of an installed or on-disk spaCy model, read without importing spaCy"""
+    if os.path.isdir(model):
+        directory = model
+    else:
+        try:
+            spec = importlib.util.find_spec(model)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None or spec.origin is None:
+            return None
+        directory = os.path.dirname(spec.origin)
+    meta_path = os.path.join(directory, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
 
 class MedicalTextPreprocessor:
     """Handles NLP text cleaning using spaCy"""
-    
-    def __init__(self, model: str = "en_core_web_sm"):
-        try:
-            self.nlp = spacy.load(model)
-            logging.info(f"Loaded spaCy model: {model}")
-        except OSError:
-            logging.error(f"spaCy model '{model}' not found. Please run: python -m spacy download {model}")
-            raise
 
-    def clean_text(self, text: str) -> str:
-        """Clean and normalize text using lemmatization and stopword removal"""
-        if not isinstance(text, str):
-            return ""
+    # Components lemmatization does not depend on
+    DISABLED_COMPONENTS = ['parser', 'ner']
 
-        # Basic normalization
+    def __init__(self, model: str = "en_core_web_sm", cache_size: int = 100_000,
+                 cache_path: Optional[str] = None, compiled_vocabulary: bool = False):
+        """
+        Args:
+            model: spaCy model name or path
+            cache_size: Maximum cleaned texts kept in the LRU cache, 0 disables it
+            cache_path: Optional SQLite file the cache is loaded from and saved to
+            compiled_vocabulary: Clean binary symptom rows by table lookup
+                (see clean_symptom_matrix) instead of running spaCy on their text
+        """
+        self.model = model
+        self._nlp = None
+        # spaCy itself is imported on the first cache miss; the cache namespace
+        # comes from the model's meta.json so cached texts need no model at all
+        meta = _model_meta(model)
+        if meta is None:
+            meta = self.nlp.meta
+
+        # Cached output is only valid for the model that produced it
+        namespace = f"{meta.get('lang', '')}_{meta.get('name', model)}-{meta.get('version', '')}"
+        # With a store, saves write only the entries added since loading
+        self.cache = CleaningCache(max_size=cache_size, namespace=namespace, track_added=bool(cache_path))
+        self.cache_path = cache_path
+        if cache_path:
+            self.cache.load(cache_path)
+
+        self.compiled_vocabulary = compiled_vocabulary
+        # Known phrase (e.g. symptom column name) -> cleaned text
+        self.vocabulary = {}
+
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first use"""
+        if self._nlp is None:
+            import spacy
+            try:
+                self._nlp = spacy.load(self.model, disable=self.DISABLED_COMPONENTS)
+                logging.info(f"Loaded spaCy model: {self.model}")
+            except OSError:
+                logging.error(f"spaCy model '{self.model}' not found. "
+                              f"Please run: python -m spacy download {self.model}")
+                raise
+        return self._nlp
+
+    def _normalize(self, text: str) -> str:
+        """Lowercase and strip everything except letters and whitespace"""
         text = text.lower().strip()
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
+        return re.sub(r'[^a-zA-Z\s]', '', text)
 
-        # NLP processing
-        doc = self.nlp(text)
-        
-        # Extract lemmas, remove stopwords and short tokens
+    def _doc_to_text(self, doc) -> str:
+        """Extract lemmas, remove stopwords and short tokens"""
         cleaned_tokens = [
-            token.lemma_ for token in doc 
+            token.lemma_ for token in doc
             if not token.is_stop and not token.is_punct and len(token.text) > 2
         ]
-        
         return " ".join(cleaned_tokens)
+
+    def clean_text(self, text: str) -> str:
+        """Clean and normalize text using lemmatization and stopword removal"""
+        if not isinstance(text, str):
+            return ""
+
+        normalized = self._normalize(text)
+        cleaned = self.cache.get(normalized)
+        if cleaned is None:
+            # NLP processing
+            cleaned = self._doc_to_text(self.nlp(normalized))
+            self.cache.put(normalized, cleaned)
+        return cleaned
+
+    def clean_batch(self, texts: Iterable, batch_size: int = 1000, n_process: int = 1) -> List[str]:
+        """
+        Clean many texts at once using nlp.pipe
+
+        Inputs are deduplicated after normalization and cached texts skip
+        spaCy entirely, so only unseen unique texts are processed.
+
+        Args:
+            texts: Iterable of raw texts (non-strings clean to "")
+            batch_size: Number of texts buffered per spaCy batch
+            n_process: Worker processes for spaCy, -1 uses every core
+
+        Returns:
+            Cleaned texts in input order
+        """
+        normalized = [self._normalize(t) if isinstance(t, str) else None for t in texts]
+
+        results = dict.fromkeys(t for t in normalized if t is not None)
+        missing = []
+        for key in results:
+            cleaned = self.cache.get(key)
+            if cleaned is None:
+                missing.append(key)
+            else:
+                results[key] = cleaned
+
+        if missing:
+            logging.info(f"Cleaning {len(missing)} unique texts ({len(normalized)} inputs)")
+            docs = self.nlp.pipe(missing, batch_size=batch_size, n_process=n_process)
+            for key, doc in zip(missing, docs):
+                cleaned = self._doc_to_text(doc)
+                results[key] = cleaned
+                self.cache.put(key, cleaned)
+
+        return [results[t] if t is not None else "" for t in normalized]
+
+    def compile_vocabulary(self, phrases: Iterable[str]):
+        """Clean each known phrase once and add it to the lookup table"""
+        new = [p for p in dict.fromkeys(phrases) if p not in self.vocabulary]
+        if new:
+            logging.info(f"Compiling {len(new)} phrases into the symptom vocabulary")
+            self.vocabulary.update(zip(new, self.clean_batch(new)))
+
+    def clean_symptom_matrix(self, symptoms, columns: List[str]) -> List[str]:
+        """
+        Cleaned text for each row of a binary symptom matrix
+
+        Every column name is cleaned once (columns not yet in the table go
+        through spaCy), then each row joins the entries of its active columns
+        in column order. No spaCy call is made per row. Lemmas come from each
+        name on its own rather than from the whole row, so a word whose lemma
+        depends on its neighbours may differ from clean_text on the joined text.
+
+        Args:
+            symptoms: Sparse or dense matrix with one row per record and one column per symptom
+            columns: Symptom names in column order
+
+        Returns:
+            Cleaned texts in row order
+        """
+        from scipy import sparse
+
+        self.compile_vocabulary(columns)
+        if symptoms.shape[0] == 0:
+            return []
+        table = np.array([self.vocabulary[c] for c in columns], dtype=object)
+        # Names that clean to nothing (all stopwords) contribute no token
+        kept = np.flatnonzero(table != "")
+
+        symptoms = sparse.csr_matrix(symptoms)[:, kept]
+        symptoms.eliminate_zeros()
+        symptoms.sort_indices()
+        entries = table[kept][symptoms.indices]
+        return [" ".join(row) for row in np.split(entries, symptoms.indptr[1:-1])]
+
+    def save_cache(self):
+        """Persist the cache to cache_path, if one was configured"""
+        if self.cache_path:
+            self.cache.save(self.cache_path)
@@ -0,0 +1,53 @@
+import re
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+
+class SymptomVocabulary(BaseEstimator, TransformerMixin):
+    """Projects free text onto the binary symptom-column feature space"""
+
+    def __init__(self, symptom_columns: list):
+        """
+        Args:
+            symptom_columns: Symptom column names, in the column order of the binary matrix
+        """
+        self.symptom_columns = symptom_columns
+
+    @staticmethod
+    def _tokenize(text: str) -> list:
+        return re.findall(r'[a-z]+', text.lower()) if isinstance(text, str) else []
+
+    def fit(self, X=None, y=None):
+        """Index every symptom column by its normalized phrase"""
+        self.phrase_index_ = {}
+        for i, col in enumerate(self.symptom_columns):
+            phrase = " ".join(self._tokenize(col))
+            if phrase:
+                self.phrase_index_.setdefault(phrase, []).append(i)
+        self.max_ngram_ = max((len(p.split()) for p in self.phrase_index_), default=1)
+        return self
+
+    def transform(self, X) -> sparse.csr_matrix:
+        """
+        Binary matrix with a 1 for every symptom phrase found in each text
+
+        Symptom text built by convert_binary_symptoms_to_text maps back to
+        the row it came from; free-text queries match any symptom column
+        whose name appears in them as a phrase.
+        """
+        indptr = [0]
+        indices = []
+        for text in X:
+            tokens = self._tokenize(text)
+            found = set()
+            for n in range(1, self.max_ngram_ + 1):
+                for start in range(len(tokens) - n + 1):
+                    found.update(self.phrase_index_.get(" ".join(tokens[start:start + n]), ()))
+            indices.extend(sorted(found))
+            indptr.append(len(indices))
+
+        data = np.ones(len(indices), dtype=np.uint8)
+        return sparse.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(self.symptom_columns)),
+        )
@@ -0,0 +1,145 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+MB = 1024 * 1024
+
+
+def _peak_rss_mb(who=None) -> Optional[float]:
+    """Peak resident set size in MB (ru_maxrss is in KB on Linux)"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    return usage.ru_maxrss / 1024
+
+
+def _children_cpu_s() -> float:
+    """CPU time of finished child processes, e.g. spaCy nlp.pipe workers"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageProfiler:
+    """Records wall time, CPU time, memory and row counts per pipeline stage"""
+
+    def __init__(self, trace_memory: bool = False, profile_stages: Optional[Iterable[str]] = None,
+                 profile_dir: str = '.'):
+        """
+        Args:
+            trace_memory: Also track Python heap peaks with tracemalloc (slows allocation-heavy stages)
+            profile_stages: Stage names to run under cProfile; every call of a
+                stage adds to one profile, written out by write_report
+            profile_dir: Where .prof files for profiled stages are written
+        """
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages or ())
+        self.profile_dir = profile_dir
+        self.stages = {}
+        self._profiles = {}
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._started = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        """
+        Time one stage; set record['rows_out'] inside the block
+
+        Repeated stages (e.g. one per chunk) accumulate into a single entry.
+        """
+        record = {'rows_in': rows_in, 'rows_out': None}
+        profiler = None
+        if name in self.profile_stages:
+            profiler = self._profiles.setdefault(name, cProfile.Profile())
+        rss_before = _peak_rss_mb()
+        children_before = _children_cpu_s()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            heap_before = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = time.process_time() - cpu_start
+            record['cpu_children_s'] = _children_cpu_s() - children_before
+            rss_after = _peak_rss_mb()
+            if rss_after is not None:
+                record['peak_rss_mb'] = rss_after
+                record['peak_rss_growth_mb'] = rss_after - rss_before
+            if self.trace_memory:
+                record['tracemalloc_peak_mb'] = (tracemalloc.get_traced_memory()[1] - heap_before) / MB
+            self._accumulate(name, record)
+
+    def _dump_profile(self, name: str, profiler: cProfile.Profile) -> dict:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"profile_{name}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+        logging.info(f"cProfile for stage '{name}' written to {path}")
+        return {'path': path, 'top_cumulative': summary.getvalue()}
+
+    def _accumulate(self, name: str, record: dict):
+        if name not in self.stages:
+            self.stages[name] = dict(record, calls=1)
+            return
+
+        total = self.stages[name]
+        total['calls'] += 1
+        for key in ('wall_s', 'cpu_s', 'cpu_children_s', 'peak_rss_growth_mb'):
+            if key in record:
+                total[key] = total.get(key, 0.0) + record[key]
+        for key in ('rows_in', 'rows_out'):
+            if record[key] is not None:
+                total[key] = (total[key] or 0) + record[key]
+        for key in ('peak_rss_mb', 'tracemalloc_peak_mb'):
+            if key in record:
+                total[key] = max(total.get(key, 0.0), record[key])
+
+    def report(self, **metadata) -> dict:
+        """Structured run report; extra keyword arguments are stored as run metadata"""
+        return {
+            'started_at': self.started_at,
+            'total_wall_s': time.perf_counter() - self._started,
+            'peak_rss_mb': _peak_rss_mb(),
+            'metadata': metadata,
+            'stages': self.stages,
+        }
+
+    def write_report(self, path: str, **metadata) -> dict:
+        """Write the JSON run report to path, and the cProfile output of every profiled stage"""
+        for name, profiler in self._profiles.items():
+            self.stages[name]['profile'] = self._dump_profile(name, profiler)
+        report = self.report(**metadata)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+        summary = ", ".join(f"{name} {stats['wall_s']:.2f}s" for name, stats in self.stages.items())
+        logging.info(f"Stage timings: {summary}")
+        logging.info(f"Run report saved to {path}")
+        return report
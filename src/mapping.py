@@ -0,0 +1,178 @@
+import re
+import logging
+from collections import Counter, defaultdict
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_label(label) -> str:
+    """Lowercase and collapse everything except letters and digits to single spaces"""
+    return " ".join(re.findall(r'[a-z0-9]+', str(label).lower()))
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two short strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def _distinct_tokens_are_words(a: str, b: str, min_length: int = 4) -> bool:
+    """
+    Whether the tokens two labels do not share are all plain words
+
+    Typos change words ('diseae', 'migraines'); single letters and numbers
+    name different diseases ('hepatitis a' / 'hepatitis e', 'type 1' / 'type 2').
+    """
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    return all(len(token) >= min_length and token.isalpha() for token in tokens_a ^ tokens_b)
+
+
+class SpecialistMapper:
+    """
+    Maps disease labels to specialists, suggesting matches for misspelled or variant labels
+
+    Labels are factorized so each distinct label is resolved once, and
+    resolutions are memoized across chunks. A label without an exact match
+    (or reviewed alias) is compared only against the map keys sharing its
+    character n-grams. The best candidate is a fuzzy match if its
+    edit-distance similarity reaches the threshold and the tokens that
+    differ are words rather than letters or numbers. Fuzzy matches are only
+    reported unless apply_fuzzy is set: a near-identical label can be a
+    different disease, so matches should be reviewed and added as aliases.
+    Unresolved labels fall back to the default.
+    """
+
+    def __init__(self, mapping: dict, default: str = 'General Practice', threshold: float = 0.85,
+                 ngram: int = 3, max_candidates: int = 5, aliases: Optional[dict] = None,
+                 apply_fuzzy: bool = False):
+        """
+        Args:
+            mapping: Disease label -> specialist
+            default: Specialist for labels that cannot be resolved
+            threshold: Minimum similarity (1 - edit distance / longer length) for a fuzzy match
+            ngram: Character n-gram size of the candidate index
+            max_candidates: Candidates per label checked with edit distance
+            aliases: Reviewed variant label -> key of mapping
+            apply_fuzzy: Use fuzzy matches for mapping instead of only reporting them
+        """
+        self.default = default
+        self.threshold = threshold
+        self.ngram = ngram
+        self.max_candidates = max_candidates
+        self.apply_fuzzy = apply_fuzzy
+        self.mapping = {normalize_label(key): specialist for key, specialist in mapping.items()}
+        self.aliases = {}
+        for alias, key in (aliases or {}).items():
+            if normalize_label(key) not in self.mapping:
+                raise ValueError(f"Alias '{alias}' points to unknown label '{key}'")
+            self.aliases[normalize_label(alias)] = normalize_label(key)
+        self._keys = list(self.mapping)
+        self._key_grams = [self._grams(key) for key in self._keys]
+        self._index = defaultdict(list)
+        for i, grams in enumerate(self._key_grams):
+            for gram in grams:
+                self._index[gram].append(i)
+
+        # Normalized label -> (specialist or None, matched key, similarity, match type)
+        self._resolved = {}
+        self.row_counts = Counter()
+        self.unmapped = Counter()
+        self.fuzzy_matches = {}
+
+    def _grams(self, text: str) -> set:
+        padded = f" {text} "
+        return {padded[i:i + self.ngram] for i in range(max(len(padded) - self.ngram + 1, 1))}
+
+    def resolve(self, label) -> Tuple[Optional[str], Optional[str], float]:
+        """
+        Resolve one label
+
+        Returns:
+            (specialist or None if unresolved, matched or suggested map key, similarity)
+        """
+        return self._resolve(label)[:3]
+
+    def _resolve(self, label) -> tuple:
+        normalized = normalize_label(label)
+        if normalized in self._resolved:
+            return self._resolved[normalized]
+
+        if normalized in self.mapping:
+            result = (self.mapping[normalized], normalized, 1.0, 'exact')
+        elif normalized in self.aliases:
+            key = self.aliases[normalized]
+            result = (self.mapping[key], key, 1.0, 'alias')
+        else:
+            result = (None, None, 0.0, 'unmapped')
+            grams = self._grams(normalized)
+            shared = Counter(i for gram in grams for i in self._index.get(gram, ()))
+            # Dice coefficient on n-grams ranks candidates before the exact edit distance
+            ranked = sorted(shared, key=lambda i: -2 * shared[i] / (len(grams) + len(self._key_grams[i])))
+            for i in ranked[:self.max_candidates]:
+                key = self._keys[i]
+                similarity = 1 - edit_distance(normalized, key) / max(len(normalized), len(key))
+                if (similarity >= self.threshold and similarity > result[2]
+                        and _distinct_tokens_are_words(normalized, key)):
+                    result = (self.mapping[key], key, similarity, 'fuzzy')
+            if result[3] == 'fuzzy' and not self.apply_fuzzy:
+                result = (None,) + result[1:3] + ('suggested',)
+
+        self._resolved[normalized] = result
+        return result
+
+    def map(self, labels: pd.Series) -> pd.Series:
+        """
+        Specialist for every label, resolving each distinct label once
+
+        Rows with missing labels get the default.
+        """
+        codes, uniques = pd.factorize(labels)
+        rows = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+        specialists = np.empty(len(uniques) + 1, dtype=object)
+        specialists[-1] = self.default  # code -1 (missing) indexes the last slot
+        for i, (label, count) in enumerate(zip(uniques, rows.tolist())):
+            specialist, key, similarity, match = self._resolve(label)
+            if match in ('fuzzy', 'suggested'):
+                self.fuzzy_matches[str(label)] = {'key': key, 'specialist': self.mapping[key],
+                                                  'similarity': round(similarity, 3),
+                                                  'applied': match == 'fuzzy'}
+            if specialist is None:
+                self.row_counts['unmapped'] += count
+                self.unmapped[str(label)] += count
+                specialist = self.default
+            else:
+                self.row_counts[match] += count
+            specialists[i] = specialist
+        self.row_counts['missing'] += int((codes == -1).sum())
+
+        return pd.Series(specialists[codes], index=labels.index, dtype=object)
+
+    def report(self, top: int = 20) -> dict:
+        """Row counts by match type, fuzzy matches and the most frequent unmapped labels"""
+        return {
+            'threshold': self.threshold,
+            'apply_fuzzy': self.apply_fuzzy,
+            'rows': dict(self.row_counts),
+            'fuzzy_matches': self.fuzzy_matches,
+            'unmapped_labels': len(self.unmapped),
+            'top_unmapped': dict(self.unmapped.most_common(top)),
+        }
+
+    def log_summary(self):
+        rows = self.row_counts
+        logging.info(f"Specialist mapping: {rows['exact']} exact, {rows['alias']} alias, {rows['fuzzy']} fuzzy, "
+                     f"{rows['unmapped']} unmapped rows ({len(self.unmapped)} labels) -> {self.default}")
+        for label, match in self.fuzzy_matches.items():
+            status = "applied" if match['applied'] else "suggested, review and add as an alias"
+            logging.info(f"  '{label}' -> '{match['key']}' ({match['specialist']}, "
+                         f"{match['similarity']:.2f}, {status})")
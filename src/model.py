@@ -1,44 +1,346 @@
 import pandas as pd
+import numpy as np
+import json
 import logging
+import os
 import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer, HashingVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.base import clone
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.metrics import accuracy_score, classification_report, f1_score
+from src.features import SymptomVocabulary
+from src.artifact import write_artifact, read_artifact
+from src.scoring import TopKMixin, fit_temperature, link_for
 
-class SpecialistClassifier:
+# Per-process fold data, set once per worker by _init_fold_worker
+_fold_data = {}
+
+
+def _init_fold_worker(pipeline: Pipeline, X_text: np.ndarray, y: np.ndarray):
+    from threadpoolctl import threadpool_limits
+    # One BLAS thread per worker: folds already use the cores, and fits stay
+    # identical however many workers run
+    threadpool_limits(1)
+    _fold_data.update(pipeline=pipeline, X=X_text, y=y)
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _evaluate_fold(fold: int, train_pos: np.ndarray, test_pos: np.ndarray) -> dict:
+    """Fit a fresh copy of the pipeline on one fold and score its held-out rows once"""
+    X, y = _fold_data['X'], _fold_data['y']
+    pipeline = clone(_fold_data['pipeline'])
+
+    start = time.perf_counter()
+    pipeline.fit(X[train_pos], y[train_pos])
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = pipeline.predict(X[test_pos])
+    predict_s = time.perf_counter() - start
+
+    y_test = y[test_pos]
+    return {
+        'fold': fold,
+        'train_rows': len(train_pos),
+        'test_rows': len(test_pos),
+        'vocabulary': len(pipeline.named_steps['tfidf'].vocabulary_),
+        'accuracy': accuracy_score(y_test, predictions),
+        'macro_f1': f1_score(y_test, predictions, average='macro', zero_division=0),
+        'fit_s': fit_s,
+        'predict_s': predict_s,
+        'report': classification_report(y_test, predictions, output_dict=True, zero_division=0),
+    }
+
+
+class SpecialistClassifier(TopKMixin):
     """Machine learning model for specialist prediction"""
-    
-    def __init__(self):
+
+    def __init__(self, max_features: int = 5000, max_iter: int = 1000, C: float = 1.0):
+        """
+        Args:
+            max_features: TF-IDF vocabulary size for the text model
+            max_iter: Logistic regression solver iterations
+            C: Inverse regularization strength
+        """
         self.pipeline = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=5000)),
-            ('classifier', LogisticRegression(max_iter=1000))
+            ('tfidf', TfidfVectorizer(max_features=max_features)),
+            ('classifier', LogisticRegression(max_iter=max_iter, C=C))
         ])
+        self.feature_mode = 'text'
         self.is_trained = False
+        # Incremental (hashing) mode bookkeeping, persisted with the model
+        self.training_state = {}
+        # Temperature for predict_topk, fitted on the validation split
+        self.calibration = {}
 
-    def train(self, X_text: pd.Series, y_specialist: pd.Series):
-        """Train the model on symptom text and specialist labels"""
+    def _fit_and_evaluate(self, estimator: Pipeline, X, y_specialist, fit=None):
         logging.info("Splitting data...")
-        X_train, X_test, y_train, y_test = train_test_split(X_text, y_specialist, test_size=0.2, random_state=42)
-        
+        X_train, X_test, y_train, y_test = train_test_split(X, y_specialist, test_size=0.2, random_state=42)
+
         logging.info("Training model...")
-        self.pipeline.fit(X_train, y_train)
+        (fit or estimator.fit)(X_train, y_train)
         self.is_trained = True
-        
-        accuracy = self.pipeline.score(X_test, y_test)
+
+        # One pass over the test split feeds accuracy, the report and calibration
+        scores = self.decision_function(X_test)
+        predictions = self._labels_from_scores(scores)
+        accuracy = accuracy_score(y_test, predictions)
         logging.info(f"Training complete. Validation accuracy: {accuracy:.2f}")
-        
-        predictions = self.pipeline.predict(X_test)
         logging.info(f"\n{classification_report(y_test, predictions)}")
 
-    def predict(self, text_list: list):
-        """Predict specialists for new symptom descriptions"""
+        self.calibrate(X_test, y_test, scores=scores)
+
+    def train(self, X_text: pd.Series, y_specialist: pd.Series):
+        """Train the model on symptom text and specialist labels"""
+        self._fit_and_evaluate(self.pipeline, X_text, y_specialist)
+
+    def cross_validate(self, X_text: pd.Series, y_specialist: pd.Series, folds: int = 5, seed: int = 42,
+                       max_workers: int = None, output_path: str = None) -> dict:
+        """
+        Stratified k-fold evaluation of the text model settings, one process per fold
+
+        Every fold fits a fresh TF-IDF vocabulary and classifier on the
+        already cleaned text and predicts its held-out rows once. Splits
+        come from the seed and fold results are ordered by fold, so the
+        results do not depend on max_workers. The model itself is not trained.
+
+        Args:
+            X_text: Cleaned symptom text
+            y_specialist: Specialist labels
+            folds: Number of folds
+            seed: Shuffling seed for the fold assignment
+            max_workers: Worker processes, defaults to min(folds, CPU count)
+            output_path: Optional JSON file for the per-fold metrics
+
+        Returns:
+            {'folds': per-fold metrics and timings, 'summary': mean/std across folds, ...}
+        """
+        if self.feature_mode != 'text':
+            raise ValueError("Cross-validation evaluates the text model (TF-IDF + classifier)")
+        X = np.asarray(X_text, dtype=object)
+        y = np.asarray(y_specialist, dtype=object)
+        splits = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(X, y)
+        max_workers = max_workers or min(folds, os.cpu_count() or 1)
+        logging.info(f"Cross-validating {folds} folds over {len(X)} rows with {max_workers} workers...")
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_fold_worker,
+                                 initargs=(clone(self.pipeline), X, y)) as pool:
+            futures = [pool.submit(_evaluate_fold, fold, train_pos, test_pos)
+                       for fold, (train_pos, test_pos) in enumerate(splits)]
+            results = [future.result() for future in futures]
+        wall_s = time.perf_counter() - start
+
+        for result in results:
+            logging.info(f"Fold {result['fold']}: accuracy {result['accuracy']:.3f}, "
+                         f"macro F1 {result['macro_f1']:.3f}, fit {result['fit_s']:.2f}s")
+        summary = {
+            f"{metric}_{stat}": float(fn([r[metric] for r in results]))
+            for metric in ('accuracy', 'macro_f1') for stat, fn in (('mean', np.mean), ('std', np.std))
+        }
+        summary['wall_s'] = wall_s
+        logging.info(f"Cross-validation accuracy {summary['accuracy_mean']:.3f} "
+                     f"(+/- {summary['accuracy_std']:.3f}) in {wall_s:.2f}s")
+
+        evaluation = {'folds_requested': folds, 'seed': seed, 'workers': max_workers, 'rows': len(X),
+                      'params': {key: value for key, value in self.pipeline.get_params().items()
+                                 if '__' in key and isinstance(value, (str, int, float, bool, type(None)))},
+                      'summary': summary, 'folds': results}
+        if output_path:
+            directory = os.path.dirname(output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output_path, 'w') as f:
+                json.dump(evaluation, f, indent=2)
+            logging.info(f"Cross-validation report saved to {output_path}")
+        return evaluation
+
+    def train_binary(self, X: sparse.csr_matrix, y_specialist: pd.Series,
+                     symptom_columns: list, use_idf: bool = True):
+        """
+        Train directly on the binary symptom matrix, skipping text cleaning and TF-IDF tokenization
+
+        Args:
+            X: CSR matrix with one row per record and one column per symptom
+            y_specialist: Specialist label per row
+            symptom_columns: Symptom names in column order, used to project free-text queries
+            use_idf: Weight symptoms by inverse document frequency
+        """
+        self.pipeline = Pipeline([
+            ('symptoms', SymptomVocabulary(symptom_columns).fit()),
+            ('tfidf', TfidfTransformer(use_idf=use_idf)),
+            ('classifier', clone(self.pipeline.named_steps['classifier']))
+        ])
+        self.feature_mode = 'binary'
+        # The symptom projection is fixed, so only the weighting and classifier are fit
+        self._fit_and_evaluate(self.pipeline[1:], X, y_specialist)
+
+    @staticmethod
+    def _hashing_pipeline() -> Pipeline:
+        # Stateless features: no vocabulary to refit when new rows arrive
+        return Pipeline([
+            ('hashing', HashingVectorizer(n_features=2**18, alternate_sign=False)),
+            ('classifier', SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42))
+        ])
+
+    def train_hashing(self, X_text: pd.Series, y_specialist: pd.Series, classes: list, epochs: int = 5):
+        """
+        Full refit of the incremental model (hashing vectorizer + SGD logistic regression)
+
+        Args:
+            X_text: Cleaned symptom text
+            y_specialist: Specialist labels
+            classes: Every specialist the model may ever see, so later
+                partial_fit updates can introduce classes absent here
+            epochs: Passes of partial_fit over the training split
+        """
+        self.pipeline = self._hashing_pipeline()
+        self.feature_mode = 'hashing'
+        hashing = self.pipeline.named_steps['hashing']
+        classifier = self.pipeline.named_steps['classifier']
+
+        def fit(X_train, y_train):
+            X_hashed = hashing.transform(X_train)
+            y_train = np.asarray(y_train)
+            rng = np.random.default_rng(42)
+            for _ in range(epochs):
+                order = rng.permutation(X_hashed.shape[0])
+                classifier.partial_fit(X_hashed[order], y_train[order], classes=classes)
+
+        self._fit_and_evaluate(self.pipeline, X_text, y_specialist, fit=fit)
+        self.training_state = {'rows_seen': len(X_text), 'updates_since_refit': 0}
+
+    def partial_fit(self, X_text: pd.Series, y_specialist: pd.Series):
+        """
+        Update an incremental model from new rows only
+
+        Cost depends on the size of the delta, not of the training history.
+        """
+        if not self.is_trained or self.feature_mode != 'hashing':
+            raise ValueError("Incremental updates require a model trained with train_hashing")
+
+        classifier = self.pipeline.named_steps['classifier']
+        # Memory-mapped coefficients are read-only; SGD updates them in place
+        if not classifier.coef_.flags.writeable:
+            classifier.coef_ = np.array(classifier.coef_)
+            classifier.intercept_ = np.array(classifier.intercept_)
+
+        X_hashed = self.pipeline.named_steps['hashing'].transform(X_text)
+        classifier.partial_fit(X_hashed, np.asarray(y_specialist))
+
+        self.training_state['rows_seen'] = self.training_state.get('rows_seen', 0) + len(X_text)
+        self.training_state['updates_since_refit'] = self.training_state.get('updates_since_refit', 0) + 1
+        logging.info(f"Updated model with {len(X_text)} new rows "
+                     f"({self.training_state['updates_since_refit']} updates since last full refit)")
+
+    def _estimator_for(self, text_list):
+        """Full pipeline for text, or the steps after the symptom projection for a sparse matrix"""
+        if not self.is_trained:
+            raise ValueError("Model not trained yet")
+        if sparse.issparse(text_list):
+            if self.feature_mode != 'binary':
+                raise ValueError("Sparse symptom input requires a model trained with train_binary")
+            return self.pipeline[1:]
+        return self.pipeline
+
+    def predict(self, text_list):
+        """
+        Predict specialists for new symptom descriptions
+
+        In binary feature mode a sparse symptom matrix is also accepted;
+        text is projected onto the symptom columns first.
+        """
+        return self._estimator_for(text_list).predict(text_list)
+
+    def predict_proba(self, text_list):
+        """Class probabilities per input, columns ordered as self.classes_"""
+        return self._estimator_for(text_list).predict_proba(text_list)
+
+    def decision_function(self, text_list) -> np.ndarray:
+        """Raw class scores as one sparse product of the features and coefficients"""
+        estimator = self._estimator_for(text_list)
+        classifier = estimator.named_steps['classifier']
+        features = estimator[:-1].transform(text_list)
+        return np.asarray(features @ classifier.coef_.T) + classifier.intercept_
+
+    def _labels_from_scores(self, scores: np.ndarray) -> np.ndarray:
+        """What predict returns, from decision_function output"""
+        if scores.shape[1] == 1:
+            return self.classes_[(scores[:, 0] > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+    def calibrate(self, X, y_specialist, scores: np.ndarray = None):
+        """
+        Fit the predict_topk temperature on held-out rows
+
+        The temperature only rescales confidence; predict and predict_proba
+        are unchanged.
+
+        Args:
+            X: Held-out inputs
+            y_specialist: Their true specialists
+            scores: decision_function(X), if already computed
+        """
+        codes = pd.Index(self.classes_).get_indexer(np.asarray(y_specialist))
+        known = codes >= 0
+        if not known.any():
+            raise ValueError("No calibration rows with a class known to the model")
+        if scores is None:
+            scores = self.decision_function(X)
+        temperature = fit_temperature(scores[known], codes[known], self.link)
+        self.calibration = {'temperature': temperature, 'rows': int(known.sum())}
+        logging.info(f"Calibrated top-k probabilities: temperature {temperature:.3f}")
+
+    @property
+    def classes_(self):
+        return self.pipeline.classes_
+
+    @property
+    def link(self) -> str:
+        classifier = self.pipeline.named_steps['classifier']
+        return link_for(type(classifier).__name__, len(classifier.classes_))
+
+    @property
+    def temperature(self) -> float:
+        return self.calibration.get('temperature', 1.0)
+
+    def save_model(self, filepath='data/model'):
+        """
+        Save the trained model as a versioned artifact directory
+
+        See src/artifact.py for the layout; load it back with SpecialistClassifier.load.
+        """
         if not self.is_trained:
             raise ValueError("Model not trained yet")
-        return self.pipeline.predict(text_list)
-        
-    def save_model(self, filepath='data/model.pkl'):
-        with open(filepath, 'wb') as f:
-            pickle.dump(self.pipeline, f)
+        write_artifact(filepath, self.pipeline, self.feature_mode, training=self.training_state,
+                       calibration=self.calibration)
         logging.info(f"Model saved to {filepath}")
+
+    @classmethod
+    def load(cls, path='data/model', mmap: bool = True) -> 'SpecialistClassifier':
+        """
+        Load a model saved by save_model
+
+        Args:
+            path: Artifact directory, or a legacy pickle file from older releases
+            mmap: Memory-map the model arrays instead of reading them into memory.
+                partial_fit copies them on first update.
+        """
+        classifier = cls()
+        if os.path.isdir(path):
+            classifier.pipeline, metadata = read_artifact(path, mmap=mmap)
+            classifier.feature_mode = metadata['feature_mode']
+            classifier.training_state = metadata.get('training', {})
+            classifier.calibration = metadata.get('calibration', {})
+        else:
+            with open(path, 'rb') as f:
+                classifier.pipeline = pickle.load(f)
+            classifier.feature_mode = 'binary' if 'symptoms' in classifier.pipeline.named_steps else 'text'
+        classifier.is_trained = True
+        logging.info(f"Model loaded from {path}")
+        return classifier
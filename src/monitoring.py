@@ -0,0 +1,360 @@
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from itertools import chain
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+
+# Upper bucket edges (ms) of latency histograms; one more bucket counts everything slower
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+
+def latency_histogram(latencies_ms) -> dict:
+    """Counts per LATENCY_BUCKETS_MS bucket, keyed by upper edge ('inf' for the overflow bucket)"""
+    counts = np.bincount(np.searchsorted(LATENCY_BUCKETS_MS, latencies_ms), minlength=len(LATENCY_BUCKETS_MS) + 1)
+    return _label_buckets(counts)
+
+
+def _label_buckets(counts: np.ndarray) -> dict:
+    labels = [str(edge) for edge in LATENCY_BUCKETS_MS] + ['inf']
+    return {label: int(count) for label, count in zip(labels, counts)}
+
+
+def _histogram_percentile(counts: np.ndarray, q: float) -> Optional[float]:
+    """Upper edge (ms) of the bucket holding the q-th percentile; None if empty or beyond the last edge"""
+    total = counts.sum()
+    if not total:
+        return None
+    bucket = int(np.searchsorted(np.cumsum(counts), q / 100 * total))
+    return float(LATENCY_BUCKETS_MS[bucket]) if bucket < len(LATENCY_BUCKETS_MS) else None
+
+
+def training_vocabulary(classifier):
+    """
+    Terms the model was trained on, with the token pattern used to split text
+
+    Returns:
+        (set of terms, token pattern), or (None, default pattern) for hashing
+        models, which keep no vocabulary
+    """
+    steps = classifier.pipeline.named_steps
+    if 'symptoms' in steps:
+        words = {word for column in steps['symptoms'].symptom_columns for word in str(column).lower().split()}
+        return words, DEFAULT_TOKEN_PATTERN
+    if 'tfidf' in steps and hasattr(steps['tfidf'], 'vocabulary_'):
+        return set(steps['tfidf'].vocabulary_), steps['tfidf'].token_pattern
+    return None, DEFAULT_TOKEN_PATTERN
+
+
+class CountMinSketch:
+    """
+    Approximate token counts in fixed memory
+
+    Estimates never undercount; they overcount by at most total / width
+    with probability 1 - exp(-depth) per query.
+    """
+
+    def __init__(self, width: int = 2 ** 14, depth: int = 4, seed: int = 0):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # Odd multipliers for multiply-shift hashing, one per row
+        self._multipliers = rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self._rows = np.arange(depth)[:, None]
+        self.total = 0
+
+    def _columns(self, tokens: List[str]) -> np.ndarray:
+        hashes = np.fromiter((hash(token) for token in tokens), dtype=np.int64, count=len(tokens)).view(np.uint64)
+        return (hashes[None, :] * self._multipliers[:, None] >> np.uint64(32)) % np.uint64(self.width)
+
+    def add(self, tokens: List[str], counts: Iterable[int]) -> np.ndarray:
+        """
+        Add counts for distinct tokens in one vectorized update
+
+        Returns:
+            Updated estimates for the tokens
+        """
+        columns = self._columns(tokens)
+        counts = np.fromiter(counts, dtype=np.int64, count=len(tokens))
+        np.add.at(self.table, (np.broadcast_to(self._rows, columns.shape), columns), counts)
+        self.total += int(counts.sum())
+        return self.table[self._rows, columns].min(axis=0)
+
+    def estimate(self, tokens: List[str]) -> np.ndarray:
+        return self.table[self._rows, self._columns(tokens)].min(axis=0)
+
+
+class PredictionMonitor:
+    """
+    Prediction, token and latency statistics for a serving model
+
+    observe() is called once per batch and only appends the batch to a
+    buffer; every flush_batches batches (and on snapshot) the buffered
+    probabilities are folded into the counters with one vectorized pass,
+    so small batches do not pay for a handful of NumPy calls each. Windowed
+    figures come from time buckets covering the last window_s seconds.
+
+    Tokenizing is the expensive part, so it stays off the request path:
+    observe() only queues every n-th text (token_sample_rate) in a bounded
+    buffer, and snapshot() (the /metrics handler or the exporter thread)
+    tokenizes the queued texts into a count-min sketch, with the most
+    frequent known and out-of-vocabulary tokens tracked as heavy hitters.
+    When the buffer is full the oldest queued texts are dropped and counted.
+    """
+
+    def __init__(self, classes: List[str], vocabulary: Optional[set] = None,
+                 token_pattern: str = DEFAULT_TOKEN_PATTERN, window_s: float = 300.0, bucket_s: float = 10.0,
+                 top: int = 20, sketch_width: int = 2 ** 14, token_sample_rate: float = 0.1,
+                 max_queued_texts: int = 10_000, flush_batches: int = 256):
+        """
+        Args:
+            classes: Specialists in probability column order
+            vocabulary: Training terms; None skips the out-of-vocabulary figures
+            token_pattern: Regex splitting texts into tokens, as in training
+            window_s: Span of the rolling window
+            bucket_s: Granularity of the rolling window
+            top: Heavy hitters reported per list
+            sketch_width: Count-min sketch columns per row
+            token_sample_rate: Fraction of texts tokenized for the token figures
+            max_queued_texts: Sampled texts kept waiting for the next snapshot
+            flush_batches: Batches buffered before the counters are updated
+        """
+        self.classes = list(classes)
+        self.vocabulary = vocabulary
+        self._token_pattern = re.compile(token_pattern)
+        self.window_s = window_s
+        self.bucket_s = bucket_s
+        self.top = top
+        self.started = time.time()
+        self._lock = threading.Lock()
+        # Serializes token counting between concurrent snapshots
+        self._token_lock = threading.Lock()
+
+        n_classes = len(self.classes)
+        self.predictions = np.zeros(n_classes, dtype=np.int64)
+        self.confidence_sum = 0.0
+        self.texts = 0
+        self.batches = 0
+        self.inference_histogram = np.zeros(len(LATENCY_BUCKETS_MS) + 1, dtype=np.int64)
+        # [bucket id, predictions per class, texts, confidence sum, inference histogram]
+        self._buckets = deque()
+        # (observed at, probabilities, latency bucket) per batch not yet counted
+        self._pending_batches = []
+        self.flush_batches = flush_batches
+
+        self.sketch = CountMinSketch(width=sketch_width)
+        self._sample_step = max(int(round(1 / token_sample_rate)), 1)
+        self._queued = deque(maxlen=max_queued_texts)
+        self.dropped_texts = 0
+        self.sampled_texts = 0
+        self.known_tokens = 0
+        self.oov_tokens = 0
+        self.empty_texts = 0
+        self._heavy = {'known': {}, 'oov': {}}
+
+    def observe(self, texts: List[str], probabilities: np.ndarray, inference_s: float):
+        """
+        Record one scored batch
+
+        Args:
+            texts: The texts as the model saw them (cleaned, for text models)
+            probabilities: predict_proba output for the batch
+            inference_s: Wall time spent cleaning and scoring the batch
+        """
+        latency_bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, inference_s * 1000)
+        with self._lock:
+            observed_at = time.time()
+            # Texts whose position in the overall stream is a multiple of the step
+            sampled = texts[-self.texts % self._sample_step::self._sample_step]
+            self.dropped_texts += max(len(self._queued) + len(sampled) - self._queued.maxlen, 0)
+            self._queued.extend(sampled)
+            self.texts += len(texts)
+            self.batches += 1
+            self._pending_batches.append((observed_at, probabilities, latency_bucket))
+            if len(self._pending_batches) >= self.flush_batches:
+                self._count_batches()
+
+    def _count_batches(self):
+        """Fold the buffered batches into the totals and time buckets; caller holds the lock"""
+        pending, self._pending_batches = self._pending_batches, []
+        if not pending:
+            return
+        observed_at, probabilities, latency_buckets = zip(*pending)
+        sizes = [len(batch) for batch in probabilities]
+        probabilities = np.concatenate(probabilities)
+        top = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(len(top)), top]
+        latency_buckets = np.asarray(latency_buckets)
+        bucket_ids = (np.asarray(observed_at) // self.bucket_s).astype(np.int64)
+        row_bucket_ids = np.repeat(bucket_ids, sizes)
+
+        n_latency = len(LATENCY_BUCKETS_MS) + 1
+        self.predictions += np.bincount(top, minlength=len(self.classes))
+        self.confidence_sum += float(confidence.sum())
+        self.inference_histogram += np.bincount(latency_buckets, minlength=n_latency)
+        # Buffered batches usually fall in one or two time buckets
+        for bucket_id in np.unique(bucket_ids).tolist():
+            rows = row_bucket_ids == bucket_id
+            bucket = self._bucket(bucket_id)
+            bucket[1] += np.bincount(top[rows], minlength=len(self.classes))
+            bucket[2] += int(rows.sum())
+            bucket[3] += float(confidence[rows].sum())
+            bucket[4] += np.bincount(latency_buckets[bucket_ids == bucket_id], minlength=n_latency)
+
+    def _bucket(self, bucket_id: int) -> list:
+        if not self._buckets or self._buckets[-1][0] < bucket_id:
+            self._buckets.append([bucket_id, np.zeros(len(self.classes), dtype=np.int64), 0, 0.0,
+                                  np.zeros(len(LATENCY_BUCKETS_MS) + 1, dtype=np.int64)])
+            oldest = bucket_id - int(self.window_s // self.bucket_s)
+            while self._buckets[0][0] <= oldest:
+                self._buckets.popleft()
+        for bucket in reversed(self._buckets):
+            if bucket[0] == bucket_id:
+                return bucket
+        # Older than the window; counted in the totals only
+        return [bucket_id, np.zeros(len(self.classes), dtype=np.int64), 0, 0.0,
+                np.zeros(len(LATENCY_BUCKETS_MS) + 1, dtype=np.int64)]
+
+    def _count_tokens(self):
+        """Tokenize the queued texts into the sketch and heavy hitters"""
+        with self._token_lock:
+            with self._lock:
+                texts = list(self._queued)
+                self._queued.clear()
+            if not texts:
+                return
+            token_lists = [self._token_pattern.findall(text.lower()) for text in texts]
+            token_counts = Counter(chain.from_iterable(token_lists))
+            self.sampled_texts += len(texts)
+            if not token_counts:
+                return
+            tokens = list(token_counts)
+            estimates = self.sketch.add(tokens, token_counts.values())
+            if self.vocabulary is None:
+                self._update_heavy('known', tokens, estimates)
+                return
+
+            self.empty_texts += sum(self.vocabulary.isdisjoint(tokens) for tokens in token_lists)
+            known = np.fromiter((token in self.vocabulary for token in tokens), dtype=bool, count=len(tokens))
+            counts = np.fromiter(token_counts.values(), dtype=np.int64, count=len(tokens))
+            self.known_tokens += int(counts[known].sum())
+            self.oov_tokens += int(counts[~known].sum())
+            for name, mask in (('known', known), ('oov', ~known)):
+                self._update_heavy(name, [token for token, keep in zip(tokens, mask) if keep], estimates[mask])
+
+    def _update_heavy(self, name: str, tokens: List[str], estimates: np.ndarray):
+        heavy = self._heavy[name]
+        heavy.update(zip(tokens, estimates.tolist()))
+        # Keep a few spare candidates so tokens near the cut are not lost
+        limit = 4 * self.top
+        if len(heavy) > limit:
+            self._heavy[name] = dict(heapq.nlargest(limit, heavy.items(), key=lambda item: item[1]))
+
+    def snapshot(self) -> dict:
+        """Totals, rolling-window rates and drift indicators as a JSON-ready dict"""
+        self._count_tokens()
+        now = time.time()
+        with self._lock:
+            self._count_batches()
+            oldest = int(now // self.bucket_s) - int(self.window_s // self.bucket_s)
+            window = [bucket for bucket in self._buckets if bucket[0] > oldest]
+            window_predictions = sum((bucket[1] for bucket in window), np.zeros(len(self.classes), dtype=np.int64))
+            window_texts = sum(bucket[2] for bucket in window)
+            window_confidence = sum(bucket[3] for bucket in window)
+            window_histogram = sum((bucket[4] for bucket in window),
+                                   np.zeros(len(LATENCY_BUCKETS_MS) + 1, dtype=np.int64))
+            predictions = self.predictions.copy()
+            texts, batches, confidence = self.texts, self.batches, self.confidence_sum
+            dropped_texts = self.dropped_texts
+        with self._token_lock:
+            known_tokens, oov_tokens, empty_texts = self.known_tokens, self.oov_tokens, self.empty_texts
+            sampled_texts = self.sampled_texts
+            heavy = {name: heapq.nlargest(self.top, candidates.items(), key=lambda item: item[1])
+                     for name, candidates in self._heavy.items()}
+            sketch_total = self.sketch.total
+        window_elapsed = min(self.window_s, now - self.started)
+
+        tokens = {'sampled_texts': sampled_texts, 'dropped_texts': dropped_texts, 'total': sketch_total,
+                  'top': dict(heavy['known'])}
+        if self.vocabulary is not None:
+            tokens.update(
+                vocabulary_size=len(self.vocabulary),
+                oov_rate=oov_tokens / (known_tokens + oov_tokens) if known_tokens + oov_tokens else 0.0,
+                empty_text_rate=empty_texts / sampled_texts if sampled_texts else 0.0,
+                top_oov=dict(heavy['oov']),
+            )
+        return {
+            'uptime_s': round(now - self.started, 3),
+            'texts': texts,
+            'batches': batches,
+            'predictions': dict(zip(self.classes, predictions.tolist())),
+            'mean_confidence': confidence / texts if texts else None,
+            'window': {
+                'seconds': self.window_s,
+                'texts': window_texts,
+                'rate_per_s': {
+                    specialist: count / window_elapsed if window_elapsed > 0 else 0.0
+                    for specialist, count in zip(self.classes, window_predictions.tolist())
+                },
+                'share': {
+                    specialist: count / window_texts if window_texts else 0.0
+                    for specialist, count in zip(self.classes, window_predictions.tolist())
+                },
+                'mean_confidence': window_confidence / window_texts if window_texts else None,
+                'inference_ms': _label_buckets(window_histogram),
+                'inference_p50_ms': _histogram_percentile(window_histogram, 50),
+                'inference_p99_ms': _histogram_percentile(window_histogram, 99),
+            },
+            'inference_ms': _label_buckets(self.inference_histogram),
+            'tokens': tokens,
+        }
+
+
+def write_metrics(path: str, metrics: dict):
+    """Write metrics JSON atomically, so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(metrics, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class MetricsExporter:
+    """Background thread writing collect() to a metrics file every interval_s seconds"""
+
+    def __init__(self, path: str, collect: Callable[[], dict], interval_s: float = 10.0):
+        self.path = path
+        self.collect = collect
+        self.interval_s = interval_s
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop and write a final snapshot"""
+        self._stopped.set()
+        self._thread.join()
+        self.export()
+
+    def export(self):
+        try:
+            write_metrics(self.path, self.collect())
+        except Exception:
+            logging.exception(f"Failed to write metrics to {self.path}")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_s):
+            self.export()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Run the pipeline over many raw datasets as one concurrent stage graph
+
+    python -m src.orchestrator data/raw/region_*.csv --output-dir data/processed/regions
+
+Each dataset is read in chunks and every chunk moves through the graph
+on its own: while one chunk is being cleaned in a worker process, the
+next is being read and an earlier one written. CSV reads and writes run
+on threads, cleaning runs on a process pool, and training runs once over
+the chunks of every dataset.
+"""
+
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.balancer import DataBalancer
+from src.cleaner import MedicalTextPreprocessor
+from src.instrumentation import StageProfiler
+from src.model import SpecialistClassifier
+from src.pipeline import (CHUNK_SIZE, CLEANING_CACHE_PATH, build_mapper, build_validator,
+                          clean_stage, convert_stage, map_stage, read_raw_dtypes, validate_stage)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+THREAD = 'thread'
+PROCESS = 'process'
+
+OUTPUT_DIR = 'data/processed/datasets'
+
+
+class Stage:
+    """
+    One node of a StageGraph
+
+    A source stage (no inputs) yields the chunks of one dataset. A chunk
+    stage transforms one chunk at a time as soon as its input produced
+    it. A reduce stage runs once, after every chunk has passed through.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: tuple = (), kind: str = THREAD,
+                 reduce: bool = False, ordered: bool = False):
+        """
+        Args:
+            name: Unique stage name
+            func: Source: func(spec) -> iterable of chunks, for each dataset spec.
+                Chunk stage: func(chunk, dataset name) -> chunk, or None to drop it.
+                Reduce stage: func(*inputs), each input being {dataset name: [chunks
+                in order]} for a chunk stage or the result of a reduce stage
+            inputs: Names of the upstream stages
+            kind: THREAD for I/O and work on shared in-process state, PROCESS for
+                CPU-bound work (func and chunks must be picklable)
+            reduce: Run once over all chunks instead of once per chunk
+            ordered: Pass one dataset's chunks in order and one at a time, e.g.
+                when appending them to a file
+        """
+        if kind not in (THREAD, PROCESS):
+            raise ValueError(f"Unknown stage kind: {kind}")
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.kind = kind
+        self.reduce = reduce
+        self.ordered = ordered
+
+    @property
+    def is_source(self) -> bool:
+        return not self.inputs and not self.reduce
+
+
+def _timed(func: Callable, *args):
+    start = time.perf_counter()
+    return func(*args), time.perf_counter() - start
+
+
+class StageGraph:
+    """
+    Runs a DAG of stages over several datasets with thread and process pools
+
+    Chunks are pipelined: each finished chunk is handed to its downstream
+    stages immediately, so reading, CPU work and writing overlap within
+    and across datasets. At most max_in_flight chunks are between their
+    source and their last chunk stage at any time, which bounds memory.
+    Reduce inputs are assembled in dataset and chunk order, so results do
+    not depend on scheduling.
+    """
+
+    def __init__(self, stages: List[Stage], thread_workers: Optional[int] = None,
+                 process_workers: Optional[int] = None, max_in_flight: Optional[int] = None,
+                 process_initializer: Optional[Callable] = None, initargs: tuple = ()):
+        """
+        Args:
+            stages: Graph nodes; inputs must name earlier stages
+            thread_workers: Threads for sources and THREAD stages (each gets its own pool)
+            process_workers: Worker processes for PROCESS stages, defaults to the CPU count
+            max_in_flight: Chunks allowed in the graph at once, defaults to 2 per worker process
+            process_initializer: Called once in every worker process, e.g. to load a model
+            initargs: Arguments for process_initializer
+        """
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            for name in stage.inputs:
+                if name not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown or later stage '{name}'")
+                if self.stages[name].reduce and not stage.reduce:
+                    raise ValueError(f"Chunk stage '{stage.name}' cannot consume reduce stage '{name}'")
+            self.stages[stage.name] = stage
+        self.consumers = defaultdict(list)
+        for stage in stages:
+            for name in stage.inputs:
+                self.consumers[name].append(stage)
+
+        self.thread_workers = thread_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2 * self.process_workers
+        self.process_initializer = process_initializer
+        self.initargs = initargs
+        self.stats = {}
+
+    def run(self, datasets: Dict[str, object]) -> dict:
+        """
+        Push every dataset through the graph
+
+        Args:
+            datasets: Dataset name -> spec passed to the source stages (e.g. a CSV path)
+
+        Returns:
+            Reduce stage name -> result
+        """
+        self.stats = {name: {'kind': stage.kind, 'chunks': 0, 'busy_s': 0.0}
+                      for name, stage in self.stages.items()}
+        self._events = queue.Queue()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._stopped = threading.Event()
+        # Outstanding units of work per chunk; its slot is freed when this reaches zero
+        self._live = {}
+        # (stage, dataset) -> [next chunk index, buffered chunks, running]
+        self._ordered = {}
+        reduce_inputs = {name for stage in self.stages.values() if stage.reduce for name in stage.inputs}
+        self._collected = {name: defaultdict(dict) for name in reduce_inputs
+                           if not self.stages[name].reduce}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(self.thread_workers, thread_name_prefix='source') as sources, \
+                ThreadPoolExecutor(self.thread_workers, thread_name_prefix='stage') as threads, \
+                ProcessPoolExecutor(self.process_workers, initializer=self.process_initializer,
+                                    initargs=self.initargs) as processes:
+            self._pools = {THREAD: threads, PROCESS: processes}
+            running_sources = 0
+            for stage in self.stages.values():
+                if stage.is_source:
+                    for name, spec in datasets.items():
+                        sources.submit(self._read_source, stage, name, spec)
+                        running_sources += 1
+
+            try:
+                while running_sources or self._live:
+                    event = self._events.get()
+                    if event[0] == 'error':
+                        _, stage_name, dataset, error = event
+                        logging.error(f"Stage '{stage_name}' failed on dataset '{dataset}': {error}")
+                        raise error
+                    if event[0] == 'source_done':
+                        running_sources -= 1
+                        continue
+                    self._complete(*event[1:])
+            finally:
+                self._stopped.set()
+                for pool in (threads, processes):
+                    pool.shutdown(wait=False, cancel_futures=True)
+
+        results = {}
+        for stage in self.stages.values():
+            if not stage.reduce:
+                continue
+            args = []
+            for name in stage.inputs:
+                if self.stages[name].reduce:
+                    args.append(results[name])
+                else:
+                    chunks = self._collected[name]
+                    args.append({dataset: [chunks[dataset][i] for i in sorted(chunks[dataset])]
+                                 for dataset in datasets if dataset in chunks})
+            logging.info(f"Running stage '{stage.name}'...")
+            results[stage.name], busy_s = _timed(stage.func, *args)
+            self.stats[stage.name]['busy_s'] += busy_s
+
+        self.stats['wall_s'] = time.perf_counter() - start
+        return results
+
+    def _read_source(self, stage: Stage, dataset: str, spec):
+        """Pull chunks from one source on a dedicated thread, waiting for a free slot before each"""
+        try:
+            chunks = iter(stage.func(spec))
+            index = 0
+            while not self._stopped.is_set():
+                if not self._slots.acquire(timeout=0.1):
+                    continue
+                chunk, busy_s = _timed(next, chunks, None)
+                if chunk is None:
+                    self._slots.release()
+                    break
+                self._events.put(('done', stage.name, dataset, index, chunk, busy_s))
+                index += 1
+        except Exception as e:
+            self._events.put(('error', stage.name, dataset, e))
+        finally:
+            self._events.put(('source_done',))
+
+    def _complete(self, stage_name: str, dataset: str, index: int, chunk, busy_s: Optional[float]):
+        """Hand a finished chunk to its consumers and release its slot once nothing else needs it"""
+        key = (dataset, index)
+        if self.stages[stage_name].is_source:
+            self._live[key] = 1
+        if busy_s is not None:
+            self.stats[stage_name]['chunks'] += 1
+            self.stats[stage_name]['busy_s'] += busy_s
+
+        if stage_name in self._collected and chunk is not None:
+            self._collected[stage_name][dataset][index] = chunk
+        for consumer in self.consumers[stage_name]:
+            if consumer.reduce:
+                continue
+            self._live[key] += 1
+            if consumer.ordered:
+                state = self._ordered.setdefault((consumer.name, dataset), [0, {}, False])
+                state[1][index] = chunk
+                self._dispatch_ordered(consumer, dataset)
+            else:
+                self._submit(consumer, dataset, index, chunk)
+
+        if self.stages[stage_name].ordered:
+            state = self._ordered[(stage_name, dataset)]
+            state[0] += 1
+            state[2] = False
+            self._dispatch_ordered(self.stages[stage_name], dataset)
+
+        self._live[key] -= 1
+        if not self._live[key]:
+            del self._live[key]
+            self._slots.release()
+
+    def _dispatch_ordered(self, stage: Stage, dataset: str):
+        state = self._ordered[(stage.name, dataset)]
+        if not state[2] and state[0] in state[1]:
+            state[2] = True
+            self._submit(stage, dataset, state[0], state[1].pop(state[0]))
+
+    def _submit(self, stage: Stage, dataset: str, index: int, chunk):
+        if chunk is None:
+            # Dropped upstream: pass the gap on so ordered stages downstream keep going
+            self._events.put(('done', stage.name, dataset, index, None, None))
+            return
+
+        future = self._pools[stage.kind].submit(_timed, stage.func, chunk, dataset)
+
+        def done(future):
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                self._events.put(('error', stage.name, dataset, error))
+            else:
+                self._events.put(('done', stage.name, dataset, index, *future.result()))
+
+        future.add_done_callback(done)
+
+
+# Cleaner of each worker process, set by _init_clean_worker
+_worker = {}
+
+
+def _init_clean_worker(cache_path: Optional[str], compiled_vocabulary: bool):
+    cleaner = MedicalTextPreprocessor(cache_path=cache_path, compiled_vocabulary=compiled_vocabulary)
+    cleaner.cache.track_added = True
+    _worker['cleaner'] = cleaner
+
+
+def _convert_and_clean(chunk: pd.DataFrame, dataset: str):
+    """Worker side of the clean stage; also returns the cleanings added to the worker's cache"""
+    cleaner = _worker['cleaner']
+    profiler = StageProfiler()
+    out = convert_stage(chunk, profiler)
+    out = clean_stage(out, cleaner, profiler, raw=chunk, n_process=1)
+    return out, cleaner.cache.pop_added()
+
+
+class MultiDatasetPipeline:
+    """
+    Validate, clean, map and write many raw datasets concurrently, then train once on all of them
+
+    Graph: read (thread) -> validate (thread, in order) -> clean (process)
+    -> map (thread) -> write (thread, in order) per dataset, with the mapped
+    training columns of every dataset feeding a single train stage. Each
+    dataset has its own validator, so its output file does not depend on
+    which dataset reached a shared row first; rows repeated across datasets
+    are dropped by the train stage, which sees every chunk in a fixed order.
+    The mapper and cleaning cache live in the parent process and are shared
+    by all datasets.
+    """
+
+    def __init__(self, output_dir: str = OUTPUT_DIR, chunk_size: int = CHUNK_SIZE,
+                 compiled_vocabulary: bool = False, train: bool = True, model_path: Optional[str] = None,
+                 cache_path: Optional[str] = CLEANING_CACHE_PATH, thread_workers: Optional[int] = None,
+                 process_workers: Optional[int] = None, max_in_flight: Optional[int] = None):
+        """
+        Args:
+            output_dir: Where <dataset name>.csv and run_report.json are written
+            chunk_size: Rows per chunk
+            compiled_vocabulary: Clean by symptom-table lookup (see MedicalTextPreprocessor)
+            train: Train and save a model on the balanced union of all datasets
+            model_path: Where the model is saved (default: <output_dir>/model, so
+                the single-dataset pipeline's model is left alone)
+            cache_path: Cleaning cache loaded by every worker and saved with their new entries
+            thread_workers: Threads for reading, validation, mapping and writing
+            process_workers: Processes for cleaning
+            max_in_flight: Chunks held in memory between reading and writing
+        """
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.compiled_vocabulary = compiled_vocabulary
+        self.train = train
+        self.model_path = model_path or os.path.join(output_dir, 'model')
+        self.cache_path = cache_path
+        self.validators = {}
+        self.mapper = build_mapper()
+        self.cleaner = MedicalTextPreprocessor(cache_path=cache_path, compiled_vocabulary=compiled_vocabulary)
+        self.rows_written = defaultdict(int)
+        self._lock = threading.Lock()
+        self.graph = StageGraph(self.stages(), thread_workers, process_workers, max_in_flight,
+                                process_initializer=_init_clean_worker, initargs=(cache_path, compiled_vocabulary))
+
+    def stages(self) -> List[Stage]:
+        return [
+            Stage('read', self._read),
+            Stage('validate', self._validate, inputs=('read',), ordered=True),
+            Stage('clean', _convert_and_clean, inputs=('validate',), kind=PROCESS),
+            Stage('map', self._map, inputs=('clean',)),
+            Stage('write', self._write, inputs=('map',), ordered=True),
+            Stage('training_rows', self._training_rows, inputs=('map',)),
+            Stage('train', self._train, inputs=('training_rows',), reduce=True),
+        ]
+
+    def _read(self, path: str):
+        return pd.read_csv(path, chunksize=self.chunk_size, dtype=read_raw_dtypes(path))
+
+    def _validate(self, chunk: pd.DataFrame, dataset: str) -> Optional[pd.DataFrame]:
+        # Ordered, so a dataset's validator only ever sees one chunk at a time
+        return validate_stage(chunk, self.validators[dataset], StageProfiler())
+
+    def _map(self, result, dataset: str) -> pd.DataFrame:
+        out, added = result
+        with self._lock:
+            for text, cleaned in added.items():
+                self.cleaner.cache.put(text, cleaned)
+            return map_stage(out, self.mapper, StageProfiler())
+
+    def _write(self, out: pd.DataFrame, dataset: str):
+        path = os.path.join(self.output_dir, f"{dataset}.csv")
+        first = dataset not in self.rows_written
+        out.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+        self.rows_written[dataset] += len(out)
+        return None
+
+    @staticmethod
+    def _training_rows(out: pd.DataFrame, dataset: str) -> pd.DataFrame:
+        rows = out[['cleaned_symptoms', 'specialist']].copy()
+        # Label and symptom text identify a validated raw row
+        rows['_row_hash'] = pd.util.hash_pandas_object(out[['label', 'text']], index=False).to_numpy()
+        return rows
+
+    def _train(self, training_rows: Dict[str, List[pd.DataFrame]]) -> Optional[dict]:
+        frames = [frame for chunks in training_rows.values() for frame in chunks]
+        if not self.train or not frames:
+            return None
+        # Datasets and their chunks arrive in a fixed order, so the first copy kept is too
+        df = pd.concat(frames, ignore_index=True)
+        duplicates = df['_row_hash'].duplicated()
+        if duplicates.any():
+            logging.info(f"Dropping {int(duplicates.sum())} rows repeated across datasets before training")
+        df = df[~duplicates].drop(columns='_row_hash').reset_index(drop=True)
+        balanced = DataBalancer(strategy='moderate').balance_dataset(df, target_col='specialist')
+        classifier = SpecialistClassifier()
+        classifier.train(X_text=balanced['cleaned_symptoms'], y_specialist=balanced['specialist'])
+        classifier.save_model(self.model_path)
+        return {'rows': len(df), 'cross_dataset_duplicates': int(duplicates.sum()),
+                'balanced_rows': len(balanced), 'model_path': self.model_path}
+
+    def run(self, paths: List[str], profiler: Optional[StageProfiler] = None) -> dict:
+        """
+        Process every raw CSV in paths; dataset names are the file names without extension
+
+        Returns:
+            The run report, also written to <output_dir>/run_report.json
+        """
+        datasets = {}
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name in datasets:
+                raise ValueError(f"Two datasets named '{name}': {datasets[name]} and {path}")
+            datasets[name] = path
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.validators = {name: build_validator() for name in datasets}
+
+        profiler = profiler or StageProfiler()
+        logging.info(f"Processing {len(datasets)} datasets with {self.graph.process_workers} cleaning "
+                     f"processes and {self.graph.thread_workers} I/O threads...")
+        with profiler.stage('orchestrate') as record:
+            results = self.graph.run(datasets)
+            record['rows_out'] = sum(self.rows_written.values())
+
+        for name in datasets:
+            logging.info(f"{name}: wrote {self.rows_written.get(name, 0)} rows")
+        self.mapper.log_summary()
+        self.cleaner.save_cache()
+
+        return profiler.write_report(
+            os.path.join(self.output_dir, 'run_report.json'), pipeline='multi_dataset', datasets=datasets,
+            chunk_size=self.chunk_size, compiled_vocabulary=self.compiled_vocabulary,
+            rows_written=dict(self.rows_written), graph=self.graph.stats, training=results.get('train'),
+            validation={name: validator.report.to_dict() for name, validator in self.validators.items()},
+            mapping=self.mapper.report(),
+            cleaning_cache=self.cleaner.cache.stats(),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process many raw datasets concurrently and train one model")
+    parser.add_argument('datasets', nargs='+', help="Raw CSV files in the dataset layout")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="Processed CSV per dataset plus the run report")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--process-workers', type=int, help="Cleaning processes (default: CPU count)")
+    parser.add_argument('--thread-workers', type=int, help="Threads for reading, validation and writing")
+    parser.add_argument('--max-in-flight', type=int, help="Chunks held in memory at once (default: 2 per process)")
+    parser.add_argument('--compiled-vocabulary', action='store_true',
+                        help="Clean symptom rows by looking up each column's cleaned name instead of running spaCy")
+    parser.add_argument('--no-train', action='store_true', help="Only process the datasets")
+    parser.add_argument('--model', help="Where the trained model is saved (default: <output-dir>/model)")
+    args = parser.parse_args()
+
+    pipeline = MultiDatasetPipeline(output_dir=args.output_dir, chunk_size=args.chunk_size,
+                                    compiled_vocabulary=args.compiled_vocabulary, train=not args.no_train,
+                                    model_path=args.model, thread_workers=args.thread_workers,
+                                    process_workers=args.process_workers, max_in_flight=args.max_in_flight)
+    pipeline.run(args.datasets)
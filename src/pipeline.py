@@ -1,10 +1,18 @@
 import pandas as pd
+import numpy as np
+import argparse
 import logging
 import os
+import shutil
+from typing import Optional
+from scipy import sparse
 from src.validator import DataValidator
 from src.cleaner import MedicalTextPreprocessor
 from src.model import SpecialistClassifier
 from src.balancer import DataBalancer
+from src.instrumentation import StageProfiler
+from src.checkpoints import CheckpointStore, file_sha256, stage_key
+from src.mapping import SpecialistMapper
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -12,6 +20,19 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 # Configuration
 RAW_DATA_PATH = 'data/raw/dataset.csv'
 PROCESSED_DATA_PATH = 'data/processed/cleaned_medical_data.csv'
+BINARY_LABELS_PATH = 'data/processed/binary_labels.csv'  # Kept apart from the cleaned-text history
+CLEANING_CACHE_PATH = 'data/processed/cleaning_cache.sqlite'
+RUN_REPORT_PATH = 'data/processed/run_report.json'
+CV_REPORT_PATH = 'data/processed/cv_report.json'
+CHECKPOINT_DIR = 'data/checkpoints'
+MODEL_PATH = 'data/model'
+# The incremental model and its delta history are never written by full runs
+INCREMENTAL_MODEL_PATH = 'data/model_incremental'
+INCREMENTAL_HISTORY_PATH = 'data/processed/incremental_history.csv'
+CLEAN_BATCH_SIZE = 1000
+CLEAN_N_PROCESS = -1  # spaCy worker processes, -1 uses every core
+STREAM_CLEAN_N_PROCESS = 1  # Per chunk; a fresh process pool per chunk would reload spaCy every time
+CHUNK_SIZE = 20_000  # Rows per chunk in streaming mode
 
 SPECIALIST_MAP = {
     'psoriasis': 'Dermatology', 'acne': 'Dermatology', 'impetigo': 'Dermatology', 
@@ -38,6 +59,24 @@ SPECIALIST_MAP = {
     'drug reaction': 'Immunology', 'anemia': 'Hematology', 'leukemia': 'Oncology',
 }
 
+# Reviewed variant spellings -> SPECIALIST_MAP key. Fuzzy matches are only
+# suggested in the run report; add them here once checked.
+SPECIALIST_ALIASES = {
+    'peptic ulcer disease': 'peptic ulcer diseae',
+    'osteoarthritis': 'osteoarthristis',
+    'migraines': 'migraine',
+}
+
+# Every class the incremental model can predict, fixed up front so partial_fit
+# updates may introduce specialists missing from earlier batches
+SPECIALISTS = sorted(set(SPECIALIST_MAP.values()) | {'General Practice'})
+
+TEST_CASES = [
+    "chest pain and difficulty breathing",
+    "skin rash with itching",
+    "blurred vision and headache"
+]
+
 def convert_binary_symptoms_to_text(row):
     """Convert binary symptom columns to text string"""
     symptom_columns = [col for col in row.index if col != 'diseases']
@@ -45,73 +84,604 @@ def convert_binary_symptoms_to_text(row):
     return ' '.join(active_symptoms) if active_symptoms else 'no symptoms reported'
 
 
-def run_pipeline():
+def convert_symptom_matrix_to_text(df: pd.DataFrame, as_indices: bool = False):
+    """
+    Vectorized version of convert_binary_symptoms_to_text for a whole frame
+
+    Args:
+        df: Dataframe of binary symptom columns (a 'diseases' column is ignored)
+        as_indices: Return the sparse symptom matrix instead of building strings
+
+    Returns:
+        Series of symptom text aligned with df.index, or a CSR matrix with one
+        row per record and one column per symptom when as_indices is True
+    """
+    symptom_columns = [col for col in df.columns if col != 'diseases']
+    active = df[symptom_columns].to_numpy() == 1
+
+    if as_indices:
+        return sparse.csr_matrix(active, dtype=np.uint8)
+
+    if len(df) == 0:
+        return pd.Series([], index=df.index, dtype=object)
+
+    rows, cols = np.nonzero(active)
+    names = np.asarray(symptom_columns, dtype=object)[cols]
+    boundaries = np.searchsorted(rows, np.arange(1, len(df)))
+
+    texts = [
+        ' '.join(row_names) if len(row_names) else 'no symptoms reported'
+        for row_names in np.split(names, boundaries)
+    ]
+    return pd.Series(texts, index=df.index, dtype=object)
+
+
+def read_raw_dtypes(path: str) -> dict:
+    """
+    Explicit dtypes for the raw CSV: float32 symptom columns, string diseases
+
+    Symptom columns are read as float so blank and non-integer cells reach
+    the validator (which reports and drops them) instead of failing the
+    read; validate_stage downcasts them to uint8 afterwards.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+    return {col: (str if col == 'diseases' else np.float32) for col in columns}
+
+
+def convert_stage(df: pd.DataFrame, profiler: StageProfiler) -> pd.DataFrame:
+    """Build label/text columns from raw rows and drop rows without symptoms"""
+    with profiler.stage('convert', rows_in=len(df)) as record:
+        out = pd.DataFrame({
+            'label': df['diseases'],
+            'text': convert_symptom_matrix_to_text(df),
+        })
+
+        # Remove rows without symptoms
+        initial_count = len(out)
+        out = out[out['text'] != 'no symptoms reported']
+        removed = initial_count - len(out)
+        if removed > 0:
+            logging.warning(f"Removed {removed} rows with no symptoms")
+        record['rows_out'] = len(out)
+    return out
+
+
+def clean_stage(out: pd.DataFrame, cleaner: MedicalTextPreprocessor, profiler: StageProfiler,
+                raw: Optional[pd.DataFrame] = None, n_process: Optional[int] = None) -> pd.DataFrame:
+    """
+    Add the NLP-cleaned cleaned_symptoms column
+
+    With a compiled-vocabulary cleaner and the raw rows out was converted
+    from, rows are cleaned by symptom-table lookup instead of spaCy.
+    n_process overrides CLEAN_N_PROCESS (e.g. 1 inside a worker process).
+    """
+    with profiler.stage('clean', rows_in=len(out)) as record:
+        out = out.copy()
+        if cleaner.compiled_vocabulary and raw is not None:
+            symptoms = convert_symptom_matrix_to_text(raw.loc[out.index], as_indices=True)
+            symptom_columns = [col for col in raw.columns if col != 'diseases']
+            out['cleaned_symptoms'] = cleaner.clean_symptom_matrix(symptoms, symptom_columns)
+        else:
+            out['cleaned_symptoms'] = cleaner.clean_batch(
+                out['text'], batch_size=CLEAN_BATCH_SIZE,
+                n_process=CLEAN_N_PROCESS if n_process is None else n_process
+            )
+        record['rows_out'] = len(out)
+    return out
+
+
+def map_stage(out: pd.DataFrame, mapper: SpecialistMapper, profiler: StageProfiler) -> pd.DataFrame:
+    """Add the specialist column used as the training label"""
+    with profiler.stage('map', rows_in=len(out)) as record:
+        out = out.copy()
+        out['specialist'] = mapper.map(out['label'])
+        record['rows_out'] = len(out)
+    return out
+
+
+def validate_stage(df: pd.DataFrame, validator: DataValidator, profiler: StageProfiler) -> Optional[pd.DataFrame]:
+    """
+    Schema check, then drop rows failing the validator's drop rules; None if the schema is invalid
+
+    Float symptom columns (see read_raw_dtypes) come back as uint8 once non-binary rows are dropped.
+    """
+    with profiler.stage('validate', rows_in=len(df)) as record:
+        if not validator.validate_schema(df):
+            record['rows_out'] = 0
+            return None
+        df, _ = validator.remove_invalid_rows(df)
+        if 'non_binary' in validator.drop_rules:
+            # Only 0/1 values are left
+            floats = [col for col, dtype in df.dtypes.items() if dtype.kind == 'f']
+            if floats:
+                df = df.astype(dict.fromkeys(floats, np.uint8))
+        record['rows_out'] = len(df)
+    return df
+
+
+def build_mapper(apply_fuzzy: bool = False) -> SpecialistMapper:
+    """
+    Disease -> specialist mapper with reviewed aliases; unresolved labels fall back to General Practice
+
+    Fuzzy matches above the mapper's threshold are only reported unless apply_fuzzy is set.
+    """
+    return SpecialistMapper(SPECIALIST_MAP, default='General Practice', aliases=SPECIALIST_ALIASES,
+                            apply_fuzzy=apply_fuzzy)
+
+
+def build_validator() -> DataValidator:
+    """Validator for the raw dataset layout: a disease label plus 0/1 symptom columns"""
+    return DataValidator(required_columns=['diseases'], label_column='diseases', known_labels=SPECIALIST_MAP)
+
+
+def process_chunk(df: pd.DataFrame, validator: DataValidator, cleaner: MedicalTextPreprocessor,
+                  profiler: Optional[StageProfiler] = None, mapper: Optional[SpecialistMapper] = None,
+                  n_process: Optional[int] = None):
+    """
+    Convert, validate, clean and map one frame of raw rows
+
+    n_process is passed on to clean_stage.
+
+    Returns:
+        Frame with the processed output columns, or None if validation fails
+    """
+    profiler = profiler or StageProfiler()
+    df = validate_stage(df, validator, profiler)
+    if df is None:
+        return None
+
+    out = convert_stage(df, profiler)
+    out = clean_stage(out, cleaner, profiler, raw=df, n_process=n_process)
+    return map_stage(out, mapper or build_mapper(), profiler)
+
+
+def checkpointed_stages(store: CheckpointStore, validator: DataValidator, cleaner: MedicalTextPreprocessor,
+                        profiler: StageProfiler, mapper: SpecialistMapper):
+    """
+    Run convert, clean and map with Parquet checkpoints between them
+
+    Each checkpoint is keyed by a hash of its upstream key and its own
+    config (spaCy model version for cleaning, SPECIALIST_MAP, aliases and fuzzy settings for mapping),
+    so a rerun resumes from the newest stage whose inputs are unchanged.
+
+    Returns:
+        (mapped frame, mapped checkpoint key), or (None, None) if validation fails
+    """
+    with profiler.stage('load'):
+        raw_path, raw_key = store.convert_raw_csv(RAW_DATA_PATH, read_raw_dtypes(RAW_DATA_PATH))
+    converted_key = stage_key('converted', raw_key, sorted(validator.drop_rules))
+    cleaned_key = stage_key('cleaned', converted_key, cleaner.cache.namespace, cleaner.compiled_vocabulary)
+    mapped_key = stage_key('mapped', cleaned_key, SPECIALIST_MAP, mapper.aliases, mapper.threshold, mapper.apply_fuzzy)
+
+    def load_validated():
+        with profiler.stage('load') as record:
+            df = pd.read_parquet(raw_path)
+            record['rows_out'] = len(df)
+        logging.info(f"Loaded {df.shape[0]} rows, {df.shape[1]} columns")
+        return validate_stage(df, validator, profiler)
+
+    def compute_converted():
+        df = load_validated()
+        return None if df is None else convert_stage(df, profiler)
+
+    def compute_cleaned():
+        if cleaner.compiled_vocabulary:
+            # Table lookup cleans from the raw symptom matrix, so convert alongside it
+            df = load_validated()
+            return None if df is None else clean_stage(convert_stage(df, profiler), cleaner, profiler, raw=df)
+        converted = store.cached('converted', converted_key, compute_converted)
+        return None if converted is None else clean_stage(converted, cleaner, profiler)
+
+    def compute_mapped():
+        cleaned = store.cached('cleaned', cleaned_key, compute_cleaned)
+        return None if cleaned is None else map_stage(cleaned, mapper, profiler)
+
+    mapped = store.cached('mapped', mapped_key, compute_mapped)
+    return mapped, (mapped_key if mapped is not None else None)
+
+
+def stream_process_raw_data(validator: DataValidator, cleaner: MedicalTextPreprocessor,
+                            chunk_size: int = CHUNK_SIZE, profiler: Optional[StageProfiler] = None,
+                            mapper: Optional[SpecialistMapper] = None) -> int:
+    """
+    Process the raw CSV chunk by chunk, appending each result to PROCESSED_DATA_PATH
+
+    Peak memory is bounded by chunk_size rather than by the dataset size.
+    Chunks are cleaned in this process (STREAM_CLEAN_N_PROCESS); for
+    parallel cleaning over chunks use the orchestrator's long-lived pool.
+
+    Returns:
+        Number of processed rows written, or -1 if validation fails
+    """
+    profiler = profiler or StageProfiler()
+    mapper = mapper or build_mapper()
+    dtypes = read_raw_dtypes(RAW_DATA_PATH)
+    written = 0
+    chunks = iter(pd.read_csv(RAW_DATA_PATH, chunksize=chunk_size, dtype=dtypes))
+    i = 0
+    while True:
+        with profiler.stage('load') as record:
+            chunk = next(chunks, None)
+            record['rows_out'] = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            break
+
+        processed = process_chunk(chunk, validator, cleaner, profiler, mapper, n_process=STREAM_CLEAN_N_PROCESS)
+        if processed is None:
+            return -1
+
+        with profiler.stage('save', rows_in=len(processed)) as record:
+            processed.to_csv(PROCESSED_DATA_PATH, mode='w' if i == 0 else 'a',
+                             header=(i == 0), index=False)
+            record['rows_out'] = len(processed)
+        written += len(processed)
+        i += 1
+        logging.info(f"Chunk {i}: wrote {len(processed)} rows ({written} total)")
+    return written
+
+
+def run_pipeline(streaming: bool = False, chunk_size: int = CHUNK_SIZE,
+                 profiler: Optional[StageProfiler] = None, use_checkpoints: bool = False,
+                 compiled_vocabulary: bool = False, cv_folds: int = 0, cv_workers: Optional[int] = None,
+                 apply_fuzzy: bool = False):
+    """
+    Run the full pipeline
+
+    Args:
+        streaming: Read the raw CSV in chunks and write processed rows incrementally
+        chunk_size: Rows per chunk in streaming mode
+        profiler: Stage profiler; a default one is created if omitted. The run
+            report is written to RUN_REPORT_PATH.
+        use_checkpoints: Store the raw data and each stage output as Parquet
+            under CHECKPOINT_DIR and resume from the newest valid checkpoint
+        compiled_vocabulary: Clean each symptom column name once and build
+            cleaned text by lookup instead of running spaCy per row
+        cv_folds: If set, cross-validate the classifier settings on the
+            balanced data with this many folds before training (report in CV_REPORT_PATH)
+        cv_workers: Worker processes for cross-validation
+        apply_fuzzy: Map unknown labels by their closest fuzzy match instead of
+            only reporting it (see build_mapper)
+    """
     logging.info("Starting pipeline...")
+    profiler = profiler or StageProfiler()
 
     # Load data
     if not os.path.exists(RAW_DATA_PATH):
         logging.error(f"File not found: {RAW_DATA_PATH}")
         return
-
-    df = pd.read_csv(RAW_DATA_PATH)
-    logging.info(f"Loaded {df.shape[0]} rows, {df.shape[1]} columns")
-    
-    # Transform binary symptoms to text
-    logging.info("Converting symptoms to text...")
-    df['text'] = df.apply(convert_binary_symptoms_to_text, axis=1)
-    df['label'] = df['diseases']
-
-    # Validate
-    validator = DataValidator(required_columns=['diseases'])
-    if not validator.validate_schema(df):
+    if streaming and use_checkpoints:
+        logging.error("Checkpoints are not supported in streaming mode")
         return
+
+    validator = build_validator()
+    cleaner = MedicalTextPreprocessor(cache_path=CLEANING_CACHE_PATH, compiled_vocabulary=compiled_vocabulary)
+    balancer = DataBalancer(strategy='moderate')
+    mapper = build_mapper(apply_fuzzy)
+    os.makedirs(os.path.dirname(PROCESSED_DATA_PATH), exist_ok=True)
+
+    if streaming:
+        logging.info(f"Streaming {RAW_DATA_PATH} in chunks of {chunk_size} rows...")
+        written = stream_process_raw_data(validator, cleaner, chunk_size, profiler, mapper)
+        if written < 0:
+            return
+        logging.info(f"Saved to {PROCESSED_DATA_PATH}")
+        logging.info(f"Processed {written} records")
+    elif use_checkpoints:
+        store = CheckpointStore(CHECKPOINT_DIR)
+        df, mapped_key = checkpointed_stages(store, validator, cleaner, profiler, mapper)
+        if df is None:
+            return
+    else:
+        with profiler.stage('load') as record:
+            df = pd.read_csv(RAW_DATA_PATH, dtype=read_raw_dtypes(RAW_DATA_PATH))
+            record['rows_out'] = len(df)
+        logging.info(f"Loaded {df.shape[0]} rows, {df.shape[1]} columns")
+
+        logging.info("Converting and cleaning symptoms...")
+        df = process_chunk(df, validator, cleaner, profiler, mapper)
+        if df is None:
+            return
+    logging.info(f"Cleaning cache: {cleaner.cache.stats()}")
+    mapper.log_summary()
+
+    # Balance dataset
+    logging.info("Balancing dataset...")
+
+    def balance():
+        with profiler.stage('balance') as record:
+            if streaming:
+                balanced = balancer.balance_csv(
+                    PROCESSED_DATA_PATH, target_col='specialist', chunk_size=chunk_size,
+                    usecols=['cleaned_symptoms', 'specialist'], keep_default_na=False
+                )
+            else:
+                record['rows_in'] = len(df)
+                balanced = balancer.balance_dataset(df, target_col='specialist')
+            record['rows_out'] = len(balanced)
+        return balanced
+
+    if use_checkpoints:
+        balanced_key = stage_key('balanced', mapped_key, balancer.strategy, balancer.random_state,
+                                 balancer.strategy_params[balancer.strategy])
+        df_balanced = store.cached('balanced', balanced_key, balance)
+    else:
+        df_balanced = balance()
+
+    classifier = SpecialistClassifier()
+    cross_validation = None
+    if cv_folds:
+        with profiler.stage('cross_validate', rows_in=len(df_balanced)):
+            cross_validation = classifier.cross_validate(
+                df_balanced['cleaned_symptoms'], df_balanced['specialist'], folds=cv_folds,
+                max_workers=cv_workers, output_path=CV_REPORT_PATH
+            )['summary']
+
+    # Train classifier on balanced data
+    logging.info("Training model...")
+    with profiler.stage('train', rows_in=len(df_balanced)) as record:
+        classifier.train(X_text=df_balanced['cleaned_symptoms'], y_specialist=df_balanced['specialist'])
     
-    # Remove rows without symptoms
-    initial_count = len(df)
-    df = df[df['text'] != 'no symptoms reported']
-    removed = initial_count - len(df)
-    if removed > 0:
-        logging.warning(f"Removed {removed} rows with no symptoms")
-    
-    # NLP cleaning
-    cleaner = MedicalTextPreprocessor()
-    logging.info("Applying NLP cleaning...")
-    df['cleaned_symptoms'] = df['text'].apply(cleaner.clean_text)
+    # Test on new data
+    logging.info("Testing model on new symptoms...")
+    cleaned_test = cleaner.clean_batch(TEST_CASES)
+    predictions = classifier.predict(cleaned_test)
     
+    for symptom, pred in zip(TEST_CASES, predictions):
+        logging.info(f"'{symptom}' -> {pred}")
+
+    # Save results
+    with profiler.stage('save') as record:
+        classifier.save_model()
+        cleaner.save_cache()
+        if not streaming:
+            df.to_csv(PROCESSED_DATA_PATH, index=False)
+            record['rows_out'] = len(df)
+            logging.info(f"Saved to {PROCESSED_DATA_PATH}")
+            logging.info(f"Processed {len(df)} records")
+
+    profiler.write_report(RUN_REPORT_PATH, pipeline='text', streaming=streaming, chunk_size=chunk_size,
+                          checkpoints=use_checkpoints, compiled_vocabulary=compiled_vocabulary,
+                          raw_data_path=RAW_DATA_PATH, validation=validator.report.to_dict(),
+                          mapping=mapper.report(), cleaning_cache=cleaner.cache.stats(),
+                          cross_validation=cross_validation)
+
+
+def run_binary_pipeline(use_idf: bool = True, profiler: Optional[StageProfiler] = None,
+                        apply_fuzzy: bool = False):
+    """
+    Train on the binary symptom matrix directly
+
+    Skips the text round trip (string building, spaCy cleaning and TF-IDF
+    tokenization): the 0/1 matrix goes straight to the classifier as CSR.
+
+    Args:
+        use_idf: Weight symptoms by inverse document frequency
+        profiler: Stage profiler; a default one is created if omitted
+        apply_fuzzy: Map unknown labels by their closest fuzzy match (see build_mapper)
+    """
+    logging.info("Starting binary feature pipeline...")
+    profiler = profiler or StageProfiler()
+
+    # Load data
+    if not os.path.exists(RAW_DATA_PATH):
+        logging.error(f"File not found: {RAW_DATA_PATH}")
+        return
+
+    with profiler.stage('load') as record:
+        df = pd.read_csv(RAW_DATA_PATH, dtype=read_raw_dtypes(RAW_DATA_PATH))
+        record['rows_out'] = len(df)
+    logging.info(f"Loaded {df.shape[0]} rows, {df.shape[1]} columns")
+
+    validator = build_validator()
+    df = validate_stage(df, validator, profiler)
+    if df is None:
+        return
+
+    with profiler.stage('convert', rows_in=len(df)) as record:
+        symptom_columns = [col for col in df.columns if col != 'diseases']
+        X = convert_symptom_matrix_to_text(df, as_indices=True)
+
+        # Remove rows without symptoms
+        has_symptoms = X.getnnz(axis=1) > 0
+        removed = int((~has_symptoms).sum())
+        if removed > 0:
+            logging.warning(f"Removed {removed} rows with no symptoms")
+        X = X[has_symptoms]
+        out = pd.DataFrame({'label': df['diseases'][has_symptoms]})
+        del df
+        record['rows_out'] = len(out)
+
     # Map to specialists for training
-    df['specialist'] = df['label'].str.lower().map(SPECIALIST_MAP)
-    df['specialist'] = df['specialist'].fillna('General Practice')
+    with profiler.stage('map', rows_in=len(out)) as record:
+        mapper = build_mapper(apply_fuzzy)
+        out['specialist'] = mapper.map(out['label'])
+        record['rows_out'] = len(out)
+    mapper.log_summary()
 
     # Balance dataset
     logging.info("Balancing dataset...")
     balancer = DataBalancer(strategy='moderate')
-    df_balanced = balancer.balance_dataset(df, target_col='specialist')
+    with profiler.stage('balance', rows_in=len(out)) as record:
+        positions = balancer.balanced_positions(out['specialist'])
+        record['rows_out'] = len(positions)
 
     # Train classifier on balanced data
     logging.info("Training model...")
     classifier = SpecialistClassifier()
-    classifier.train(X_text=df_balanced['cleaned_symptoms'], y_specialist=df_balanced['specialist'])
-    
-    # Test on new data
+    with profiler.stage('train', rows_in=len(positions)):
+        classifier.train_binary(X[positions], out['specialist'].iloc[positions], symptom_columns, use_idf=use_idf)
+
+    # Test on new data, projected onto the symptom columns
     logging.info("Testing model on new symptoms...")
-    test_cases = [
-        "chest pain and difficulty breathing", 
-        "skin rash with itching",
-        "blurred vision and headache"
-    ]
-    cleaned_test = [cleaner.clean_text(t) for t in test_cases]
-    predictions = classifier.predict(cleaned_test)
-    
-    for symptom, pred in zip(test_cases, predictions):
+    predictions = classifier.predict(TEST_CASES)
+    for symptom, pred in zip(TEST_CASES, predictions):
         logging.info(f"'{symptom}' -> {pred}")
 
     # Save results
-    classifier.save_model()
-    output_columns = ['label', 'text', 'cleaned_symptoms', 'specialist']
-    df_output = df[output_columns]
-    df_output.to_csv(PROCESSED_DATA_PATH, index=False)
-    logging.info(f"Saved to {PROCESSED_DATA_PATH}")
-    logging.info(f"Processed {len(df_output)} records")
+    with profiler.stage('save', rows_in=len(out)) as record:
+        classifier.save_model()
+        os.makedirs(os.path.dirname(BINARY_LABELS_PATH), exist_ok=True)
+        out.to_csv(BINARY_LABELS_PATH, index=False)
+        record['rows_out'] = len(out)
+    logging.info(f"Saved labels to {BINARY_LABELS_PATH}")
+    logging.info(f"Processed {len(out)} records")
+
+    profiler.write_report(RUN_REPORT_PATH, pipeline='binary', use_idf=use_idf, raw_data_path=RAW_DATA_PATH,
+                          validation=validator.report.to_dict(), mapping=mapper.report())
+
+
+def update_model(delta_path: str, full_refit: bool = False, refit_every: Optional[int] = None,
+                 profiler: Optional[StageProfiler] = None, compiled_vocabulary: bool = False,
+                 apply_fuzzy: bool = False):
+    """
+    Fold a new batch of raw records into the saved incremental model
+
+    The delta is processed like any other chunk. The model (hashing
+    vectorizer + SGD, see SpecialistClassifier.train_hashing) is then
+    updated from the delta rows only, so the cost tracks the size of the
+    delta rather than of the history. The model lives in INCREMENTAL_MODEL_PATH
+    and its history in INCREMENTAL_HISTORY_PATH, so full pipeline runs never
+    touch either; the history starts as a copy of PROCESSED_DATA_PATH if that
+    exists. Only once the model is saved are the rows appended to the history,
+    which is kept for refits, and the delta's content hash recorded in the
+    model's training state; rerunning an applied delta (or a run that failed
+    before saving) never duplicates history rows.
+
+    Args:
+        delta_path: CSV in the raw dataset layout holding only the new rows
+        full_refit: Retrain from the whole history instead of updating
+        refit_every: Also refit once this many incremental updates have accumulated
+        profiler: Stage profiler; a default one is created if omitted
+        compiled_vocabulary: Clean the delta by symptom-table lookup (see run_pipeline)
+        apply_fuzzy: Map unknown labels by their closest fuzzy match (see build_mapper)
+    """
+    logging.info(f"Updating model from {delta_path}...")
+    profiler = profiler or StageProfiler()
+
+    if not os.path.exists(delta_path):
+        logging.error(f"File not found: {delta_path}")
+        return
+
+    classifier = None
+    if os.path.isdir(INCREMENTAL_MODEL_PATH):
+        # Not memory-mapped: the coefficients are updated in place
+        classifier = SpecialistClassifier.load(INCREMENTAL_MODEL_PATH, mmap=False)
+    applied = list(classifier.training_state.get('applied_deltas', [])) if classifier is not None else []
+    fingerprint = file_sha256(delta_path)
+    already_applied = fingerprint in applied
+    if already_applied and not full_refit:
+        logging.warning(f"{delta_path} was already applied to {INCREMENTAL_MODEL_PATH}, skipping")
+        return
+
+    validator = build_validator()
+    cleaner = MedicalTextPreprocessor(cache_path=CLEANING_CACHE_PATH, compiled_vocabulary=compiled_vocabulary)
+    balancer = DataBalancer(strategy='moderate')
+    mapper = build_mapper(apply_fuzzy)
+
+    out = None
+    if not already_applied:
+        with profiler.stage('load') as record:
+            df = pd.read_csv(delta_path, dtype=read_raw_dtypes(delta_path))
+            record['rows_out'] = len(df)
+        logging.info(f"Loaded {df.shape[0]} new rows")
+
+        out = process_chunk(df, validator, cleaner, profiler, mapper)
+        if out is None:
+            return
+        del df
+        mapper.log_summary()
+
+    if classifier is None or classifier.feature_mode != 'hashing':
+        logging.info("No incremental model found, refitting from the full history")
+        full_refit = True
+    elif refit_every and classifier.training_state.get('updates_since_refit', 0) + 1 >= refit_every:
+        logging.info(f"Reached {refit_every} incremental updates, refitting from the full history")
+        full_refit = True
+
+    # Until the first append, the history is the last full run's processed data
+    seed_history = not os.path.exists(INCREMENTAL_HISTORY_PATH) and os.path.exists(PROCESSED_DATA_PATH)
+    history_path = PROCESSED_DATA_PATH if seed_history else INCREMENTAL_HISTORY_PATH
+
+    if full_refit:
+        with profiler.stage('balance') as record:
+            # The delta is not in the history yet; balance it as if it were appended
+            history = balancer.balance_csv(
+                history_path, target_col='specialist', pending=out,
+                usecols=['cleaned_symptoms', 'specialist'], keep_default_na=False
+            )
+            record['rows_out'] = len(history)
+        classifier = SpecialistClassifier()
+        with profiler.stage('train', rows_in=len(history)):
+            classifier.train_hashing(history['cleaned_symptoms'], history['specialist'], classes=SPECIALISTS)
+    else:
+        with profiler.stage('balance', rows_in=len(out)) as record:
+            delta = balancer.balance_dataset(out, target_col='specialist')
+            record['rows_out'] = len(delta)
+        with profiler.stage('partial_fit', rows_in=len(delta)):
+            classifier.partial_fit(delta['cleaned_symptoms'], delta['specialist'])
+    classifier.training_state['applied_deltas'] = applied if already_applied else applied + [fingerprint]
+
+    predictions = classifier.predict(cleaner.clean_batch(TEST_CASES))
+    for symptom, pred in zip(TEST_CASES, predictions):
+        logging.info(f"'{symptom}' -> {pred}")
+
+    with profiler.stage('save'):
+        classifier.save_model(INCREMENTAL_MODEL_PATH)
+        cleaner.save_cache()
+
+    if out is not None:
+        with profiler.stage('append', rows_in=len(out)) as record:
+            os.makedirs(os.path.dirname(INCREMENTAL_HISTORY_PATH), exist_ok=True)
+            if seed_history:
+                shutil.copyfile(PROCESSED_DATA_PATH, INCREMENTAL_HISTORY_PATH)
+            is_new = not os.path.exists(INCREMENTAL_HISTORY_PATH)
+            out.to_csv(INCREMENTAL_HISTORY_PATH, mode='w' if is_new else 'a', header=is_new, index=False)
+            record['rows_out'] = len(out)
+
+    profiler.write_report(RUN_REPORT_PATH, pipeline='incremental', delta_path=delta_path,
+                          delta_sha256=fingerprint, full_refit=full_refit, training=classifier.training_state,
+                          validation=validator.report.to_dict(), mapping=mapper.report(),
+                          cleaning_cache=cleaner.cache.stats())
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Run the health data pipeline")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Process the raw CSV in chunks with bounded memory")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Rows per chunk in streaming mode")
+    parser.add_argument('--binary-features', action='store_true',
+                        help="Train on the binary symptom matrix instead of cleaned text")
+    parser.add_argument('--no-idf', action='store_true',
+                        help="Disable IDF weighting of binary symptom features")
+    parser.add_argument('--profile-stage', action='append', default=[],
+                        help="Run this stage under cProfile (repeatable)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Track Python heap peaks per stage with tracemalloc")
+    parser.add_argument('--checkpoints', action='store_true',
+                        help="Checkpoint stage outputs as Parquet and resume from the newest valid one")
+    parser.add_argument('--compiled-vocabulary', action='store_true',
+                        help="Clean symptom rows by looking up each column's cleaned name instead of running spaCy")
+    parser.add_argument('--cv-folds', type=int, default=0,
+                        help="Cross-validate on the balanced data with this many folds before training")
+    parser.add_argument('--cv-workers', type=int, help="Worker processes for --cv-folds (default: one per fold)")
+    parser.add_argument('--apply-fuzzy', action='store_true',
+                        help="Map unknown disease labels by their closest fuzzy match instead of only reporting it")
+    parser.add_argument('--update', metavar='DELTA_CSV',
+                        help="Update the incremental model from a CSV of new raw rows only")
+    parser.add_argument('--full-refit', action='store_true',
+                        help="With --update, retrain the incremental model from the full history")
+    parser.add_argument('--refit-every', type=int,
+                        help="With --update, refit from the full history every N updates")
+    args = parser.parse_args()
+
+    profiler = StageProfiler(trace_memory=args.trace_memory, profile_stages=args.profile_stage,
+                             profile_dir=os.path.dirname(RUN_REPORT_PATH))
+    if args.update:
+        update_model(args.update, full_refit=args.full_refit, refit_every=args.refit_every, profiler=profiler,
+                     compiled_vocabulary=args.compiled_vocabulary, apply_fuzzy=args.apply_fuzzy)
+    elif args.binary_features:
+        run_binary_pipeline(use_idf=not args.no_idf, profiler=profiler, apply_fuzzy=args.apply_fuzzy)
+    else:
+        run_pipeline(streaming=args.streaming, chunk_size=args.chunk_size, profiler=profiler,
+                     use_checkpoints=args.checkpoints, compiled_vocabulary=args.compiled_vocabulary,
+                     cv_folds=args.cv_folds, cv_workers=args.cv_workers, apply_fuzzy=args.apply_fuzzy)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Lightweight specialist prediction CLI
+
+    python -m src.predict "chest pain and dizziness" "skin rash"
+    echo "chest pain" | python -m src.predict --json
+    python -m src.predict --top-k 3 --json < intake.txt > routed.jsonl
+
+Only what inference needs is imported: text models saved by write_artifact
+are scored with NumPy alone (LinearTextScorer), and spaCy loads only when a
+text is missing from the cleaning cache.
+
+For many repeated calls, start a prewarmed fork server once and point the
+CLI at its socket; every request is handled in a fork of the loaded process:
+
+    python -m src.predict --serve /tmp/predict.sock &
+    python -m src.predict --socket /tmp/predict.sock "chest pain"
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+from typing import Iterable, Iterator, List
+
+MODEL_PATH = 'data/model'
+CLEANING_CACHE_PATH = 'data/processed/cleaning_cache.sqlite'
+
+
+def format_predictions(classes: List[str], probabilities) -> List[dict]:
+    """One result dict per row of class probabilities"""
+    results = []
+    for row in probabilities:
+        best = int(row.argmax())
+        results.append({
+            'specialist': classes[best],
+            'probability': round(float(row[best]), 4),
+            'probabilities': {c: round(float(p), 4) for c, p in zip(classes, row)},
+        })
+    return results
+
+
+def format_topk(labels, probabilities) -> List[dict]:
+    """One result dict per row of predict_topk output"""
+    return [
+        {'top': [{'specialist': str(label), 'probability': round(float(p), 4)} for label, p in zip(row, proba)]}
+        for row, proba in zip(labels, probabilities)
+    ]
+
+
+class Predictor:
+    """Saved model plus cleaner, loading only the dependencies the model needs"""
+
+    def __init__(self, model_path: str = MODEL_PATH, cache_path: str = CLEANING_CACHE_PATH):
+        """
+        Args:
+            model_path: Artifact directory (or legacy pickle) written by save_model
+            cache_path: Cleaning cache consulted before spaCy is loaded
+        """
+        from src.artifact import LinearTextScorer, read_metadata
+
+        if os.path.isdir(model_path) and LinearTextScorer.supports(read_metadata(model_path)):
+            self.model = LinearTextScorer(model_path)
+        else:
+            from src.model import SpecialistClassifier
+            self.model = SpecialistClassifier.load(model_path)
+        self.classes = [str(c) for c in self.model.classes_]
+
+        # Binary feature models project raw text themselves
+        self.cleaner = None
+        if self.model.feature_mode != 'binary':
+            from src.cleaner import MedicalTextPreprocessor
+            self.cleaner = MedicalTextPreprocessor(cache_path=cache_path)
+
+    def prewarm(self):
+        """Load spaCy and fault in the model arrays before serving"""
+        if self.cleaner is not None:
+            self.cleaner.nlp
+        self.model.predict_proba([""])
+
+    def predict(self, texts: List[str]) -> List[dict]:
+        if self.cleaner is not None:
+            texts = self.cleaner.clean_batch(texts)
+        return format_predictions(self.classes, self.model.predict_proba(texts))
+
+    def iter_topk(self, texts: Iterable[str], k: int = 3, batch_size: int = 1000) -> Iterator[List[dict]]:
+        """
+        Top-k results for texts, cleaned and scored batch_size at a time
+
+        texts may be a generator (e.g. stdin), so a whole day's intake is
+        routed without holding it in memory.
+        """
+        texts = iter(texts)
+        while True:
+            batch = list(itertools.islice(texts, batch_size))
+            if not batch:
+                return
+            if self.cleaner is not None:
+                batch = self.cleaner.clean_batch(batch)
+            yield format_topk(*self.model.predict_topk(batch, k, batch_size=batch_size))
+
+    def save_cache(self):
+        """Persist newly cleaned texts so later calls skip spaCy"""
+        if self.cleaner is not None and self.cleaner.cache.misses:
+            self.cleaner.save_cache()
+
+
+class PrewarmedForkServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server that forks the loaded process for every request
+
+    Children share the parent's imported modules, spaCy pipeline and model
+    pages copy-on-write, so each request starts warm. Requests and responses
+    are single JSON lines.
+    """
+
+    def __init__(self, socket_path: str, predictor: Predictor):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.predictor = predictor
+        super().__init__(socket_path, _ForkRequestHandler)
+
+
+class _ForkRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = {'predictions': self.server.predictor.predict(request['texts'])}
+        except Exception as e:
+            response = {'error': str(e)}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+def serve_prewarmed(socket_path: str, model_path: str = MODEL_PATH):
+    """Load everything once, then answer requests on socket_path until interrupted"""
+    predictor = Predictor(model_path)
+    predictor.prewarm()
+    server = PrewarmedForkServer(socket_path, predictor)
+    logging.info(f"Prewarmed predictor listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def request_prewarmed(socket_path: str, texts: List[str]) -> List[dict]:
+    """Send texts to a running fork server; needs nothing beyond the standard library"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        with conn.makefile('rwb') as stream:
+            stream.write(json.dumps({'texts': texts}).encode('utf-8') + b'\n')
+            stream.flush()
+            response = json.loads(stream.readline())
+    if 'error' in response:
+        raise RuntimeError(response['error'])
+    return response['predictions']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict the specialist for symptom descriptions")
+    parser.add_argument('texts', nargs='*', help="Symptom descriptions (read from stdin, one per line, if omitted)")
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the saved model")
+    parser.add_argument('--json', action='store_true', help="Print full results as JSON")
+    parser.add_argument('--socket', help="Send the texts to a prewarmed server on this Unix socket")
+    parser.add_argument('--serve', metavar='SOCKET', help="Run a prewarmed fork server on this Unix socket")
+    parser.add_argument('--top-k', type=int, metavar='K',
+                        help="Stream the K most likely specialists per text (one line or JSON line per text)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Texts cleaned and scored together with --top-k")
+    parser.add_argument('--verbose', action='store_true', help="Log model and cache loading")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose or args.serve else logging.WARNING,
+                        format='%(asctime)s - %(message)s')
+
+    if args.serve:
+        serve_prewarmed(args.serve, args.model)
+        sys.exit(0)
+
+    if args.top_k:
+        texts = args.texts or (line.strip() for line in sys.stdin if line.strip())
+        predictor = Predictor(args.model)
+        texts, echoed = itertools.tee(texts)
+        for results in predictor.iter_topk(texts, args.top_k, args.batch_size):
+            for text, result in zip(itertools.islice(echoed, len(results)), results):
+                if args.json:
+                    print(json.dumps(dict(text=text, **result)))
+                else:
+                    ranked = ", ".join(f"{r['specialist']} ({r['probability']:.2f})" for r in result['top'])
+                    print(f"{text} -> {ranked}")
+        predictor.save_cache()
+        sys.exit(0)
+
+    texts = args.texts or [line.strip() for line in sys.stdin if line.strip()]
+    if args.socket:
+        results = request_prewarmed(args.socket, texts)
+    else:
+        predictor = Predictor(args.model)
+        results = predictor.predict(texts)
+        predictor.save_cache()
+
+    if args.json:
+        print(json.dumps([dict(text=t, **r) for t, r in zip(texts, results)], indent=2))
+    else:
+        for text, result in zip(texts, results):
+            print(f"{text} -> {result['specialist']} ({result['probability']:.2f})")
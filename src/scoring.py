@@ -0,0 +1,188 @@
+"""
+Probabilities, top-k and temperature calibration from linear decision scores
+
+NumPy only, so both SpecialistClassifier and the lightweight
+LinearTextScorer rank classes the same way without importing scikit-learn.
+"""
+
+from itertools import islice
+from typing import Tuple
+
+import numpy as np
+
+# Inputs per sparse matmul; bounds memory when streaming large inputs
+TOPK_BATCH_SIZE = 10000
+
+
+def link_for(classifier_type: str, n_classes: int) -> str:
+    """
+    How a classifier turns decision scores into probabilities
+
+    Returns:
+        'sigmoid' for a single score column (two classes), 'softmax' for
+        multinomial logistic regression, 'ovr' for one-vs-rest sigmoids
+        normalized per row (SGDClassifier with log loss)
+    """
+    if n_classes == 2:
+        return 'sigmoid'
+    return 'softmax' if classifier_type == 'LogisticRegression' else 'ovr'
+
+
+def _sigmoid(scores: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-scores))
+
+
+def _log_normalizer(scores: np.ndarray, link: str) -> np.ndarray:
+    """Per-row log of the sum that probabilities are divided by"""
+    if link == 'ovr':
+        return np.log(_sigmoid(scores).sum(axis=1))
+    peak = scores.max(axis=1)
+    return peak + np.log(np.exp(scores - peak[:, None]).sum(axis=1))
+
+
+def probabilities(scores: np.ndarray, link: str, temperature: float = 1.0) -> np.ndarray:
+    """Full class probability matrix, matching predict_proba at temperature 1"""
+    scores = scores / temperature
+    if link == 'sigmoid':
+        positive = _sigmoid(scores[:, 0])
+        return np.column_stack([1.0 - positive, positive])
+    if link == 'ovr':
+        proba = _sigmoid(scores)
+        return proba / proba.sum(axis=1, keepdims=True)
+    return np.exp(scores - _log_normalizer(scores, link)[:, None])
+
+
+def top_k(scores: np.ndarray, k: int, link: str, temperature: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The k most probable classes per row, best first
+
+    Every link is monotonic in the scores, so classes are selected with a
+    partial sort of the raw scores and only the k selected columns (plus a
+    per-row normalizer) are turned into probabilities.
+
+    Args:
+        scores: Decision scores, one row per input and one column per class
+            (a single column for two-class models)
+        k: Classes per row; capped at the number of classes
+        link: See link_for
+        temperature: Scores are divided by this before the link
+
+    Returns:
+        (class indices, probabilities), both shaped (rows, k)
+    """
+    if link == 'sigmoid':
+        scores = probabilities(scores, link, temperature)
+        link, temperature = None, 1.0
+    else:
+        scores = scores / temperature
+
+    n_classes = scores.shape[1]
+    k = min(k, n_classes)
+    if k < n_classes:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        indices = np.broadcast_to(np.arange(n_classes), scores.shape)
+    selected = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(-selected, axis=1, kind='stable')
+    indices = np.take_along_axis(indices, order, axis=1)
+    selected = np.take_along_axis(selected, order, axis=1)
+
+    if link is None:
+        return indices, selected
+    if link == 'ovr':
+        return indices, _sigmoid(selected) / np.exp(_log_normalizer(scores, link))[:, None]
+    return indices, np.exp(selected - _log_normalizer(scores, link)[:, None])
+
+
+def fit_temperature(scores: np.ndarray, y_codes: np.ndarray, link: str,
+                    bounds: Tuple[float, float] = (0.05, 20.0), iterations: int = 50) -> float:
+    """
+    Temperature minimizing the log loss of held-out scores
+
+    One scalar rescales confidence without changing which class ranks
+    first. Log loss is unimodal in log(temperature), so a golden-section
+    search over that interval is enough.
+
+    Args:
+        scores: Decision scores of held-out rows
+        y_codes: True class index per row
+        link: See link_for
+        bounds: Search interval for the temperature
+    """
+    rows = np.arange(len(y_codes))
+
+    def log_loss(log_temperature):
+        proba = probabilities(scores, link, np.exp(log_temperature))
+        return -np.log(np.clip(proba[rows, y_codes], 1e-15, None)).mean()
+
+    low, high = np.log(bounds[0]), np.log(bounds[1])
+    ratio = (np.sqrt(5) - 1) / 2
+    a, b = high - ratio * (high - low), low + ratio * (high - low)
+    loss_a, loss_b = log_loss(a), log_loss(b)
+    for _ in range(iterations):
+        if loss_a < loss_b:
+            high, b, loss_b = b, a, loss_a
+            a = high - ratio * (high - low)
+            loss_a = log_loss(a)
+        else:
+            low, a, loss_a = a, b, loss_b
+            b = low + ratio * (high - low)
+            loss_b = log_loss(b)
+    return float(np.exp((low + high) / 2))
+
+
+def iter_batches(items, batch_size: int):
+    """Consecutive batches of a sparse matrix (row slices) or of any iterable (lists)"""
+    if hasattr(items, 'shape') and len(items.shape) == 2:
+        for start in range(0, items.shape[0], batch_size):
+            yield items[start:start + batch_size]
+        return
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class TopKMixin:
+    """
+    predict_topk / iter_topk for models exposing decision_function, classes_,
+    link and temperature
+    """
+
+    def iter_topk(self, texts, k: int = 3, batch_size: int = TOPK_BATCH_SIZE, calibrated: bool = True):
+        """
+        Top-k specialists per input, one batch at a time
+
+        texts may be a generator (e.g. lines of a file), so inputs larger
+        than memory are scored with memory bounded by batch_size.
+
+        Yields:
+            (labels, probabilities) per batch, both shaped (batch rows, k)
+        """
+        temperature = self.temperature if calibrated else 1.0
+        for batch in iter_batches(texts, batch_size):
+            indices, proba = top_k(self.decision_function(batch), k, self.link, temperature)
+            yield self.classes_[indices], proba
+
+    def predict_topk(self, texts, k: int = 3, batch_size: int = TOPK_BATCH_SIZE,
+                     calibrated: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k specialists and probabilities for every input, best first
+
+        Args:
+            texts: Symptom texts (or what decision_function accepts)
+            k: Specialists per input
+            batch_size: Inputs scored per sparse matmul
+            calibrated: Apply the temperature fitted at training time
+
+        Returns:
+            (labels, probabilities), both shaped (inputs, min(k, classes))
+        """
+        k = min(k, len(self.classes_))
+        batches = list(self.iter_topk(texts, k, batch_size, calibrated))
+        if not batches:
+            return np.empty((0, k), dtype=object), np.empty((0, k))
+        labels, proba = zip(*batches)
+        return np.concatenate(labels), np.concatenate(proba)
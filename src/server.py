@@ -0,0 +1,335 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from src.cleaner import MedicalTextPreprocessor
+from src.model import SpecialistClassifier
+from src.monitoring import MetricsExporter, PredictionMonitor, latency_histogram, training_vocabulary
+from src.predict import format_predictions
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+MODEL_PATH = 'data/model'
+CLEANING_CACHE_PATH = 'data/processed/cleaning_cache.sqlite'
+
+
+class LatencyTracker:
+    """Rolling request latency percentiles and throughput"""
+
+    def __init__(self, window: int = 10_000):
+        """
+        Args:
+            window: Number of most recent request latencies kept for percentiles
+        """
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.batches = 0
+
+    def record_batch(self, latencies: List[float]):
+        """Record the per-request latencies (seconds) of one completed batch"""
+        with self._lock:
+            self._latencies.extend(latencies)
+            self.requests += len(latencies)
+            self.batches += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.fromiter(self._latencies, dtype=float)
+            requests, batches = self.requests, self.batches
+        elapsed = time.perf_counter() - self.started
+
+        stats = {
+            'requests': requests,
+            'batches': batches,
+            'mean_batch_size': requests / batches if batches else 0.0,
+            'throughput_rps': requests / elapsed if elapsed > 0 else 0.0,
+            'p50_ms': None,
+            'p99_ms': None,
+            'histogram_ms': latency_histogram(latencies * 1000),
+        }
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            stats['p50_ms'] = round(float(p50), 3)
+            stats['p99_ms'] = round(float(p99), 3)
+        return stats
+
+
+class _PendingRequest:
+    __slots__ = ('text', 'submitted', 'done', 'result', 'error')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Groups requests arriving within a short window into one batched call"""
+
+    def __init__(self, handler: Callable[[List[str]], list], window_ms: float = 5.0,
+                 max_batch_size: int = 256, tracker: Optional[LatencyTracker] = None):
+        """
+        Args:
+            handler: Called with a list of texts, returns one result per text
+            window_ms: How long to wait for more requests after the first one arrives
+            max_batch_size: Flush as soon as this many requests are queued
+            tracker: Optional latency tracker updated after every batch
+        """
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.tracker = tracker
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, texts: List[str]) -> list:
+        """Queue texts and block until their results are ready"""
+        pending = [_PendingRequest(text) for text in texts]
+        for request in pending:
+            self._queue.put(request)
+        for request in pending:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+        return [request.result for request in pending]
+
+    def _collect(self) -> list:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._stopped.set()
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                results = self.handler([request.text for request in batch])
+                for request, result in zip(batch, results):
+                    request.result = result
+            except Exception as e:
+                logging.exception("Batch prediction failed")
+                for request in batch:
+                    request.error = e
+
+            finished = time.perf_counter()
+            for request in batch:
+                request.done.set()
+            if self.tracker is not None:
+                self.tracker.record_batch([finished - request.submitted for request in batch])
+
+
+class PredictionService:
+    """Holds the model and cleaner in memory and serves batched predictions"""
+
+    def __init__(self, classifier: SpecialistClassifier, cleaner: Optional[MedicalTextPreprocessor] = None,
+                 window_ms: float = 5.0, max_batch_size: int = 256, monitoring: bool = True):
+        """
+        Args:
+            monitoring: Track predicted specialists, token drift against the
+                training vocabulary and inference latency (see metrics())
+        """
+        self.classifier = classifier
+        self.cleaner = cleaner
+        self.classes = [str(c) for c in classifier.classes_]
+        self.tracker = LatencyTracker()
+        self.monitor = None
+        if monitoring:
+            vocabulary, token_pattern = training_vocabulary(classifier)
+            self.monitor = PredictionMonitor(self.classes, vocabulary, token_pattern)
+        self.batcher = MicroBatcher(self.predict_batch, window_ms=window_ms,
+                                    max_batch_size=max_batch_size, tracker=self.tracker)
+
+    def predict_batch(self, texts: List[str]) -> List[dict]:
+        """One clean_batch + predict_proba call for the whole batch"""
+        start = time.perf_counter()
+        # Binary feature models project raw text themselves
+        if self.classifier.feature_mode != 'binary':
+            texts = self.cleaner.clean_batch(texts)
+        probabilities = self.classifier.predict_proba(texts)
+        if self.monitor is not None:
+            self.monitor.observe(texts, probabilities, time.perf_counter() - start)
+        return format_predictions(self.classes, probabilities)
+
+    def metrics(self) -> dict:
+        """Request latency and throughput plus the prediction monitor snapshot"""
+        metrics = {'requests': self.tracker.snapshot()}
+        if self.monitor is not None:
+            metrics.update(self.monitor.snapshot())
+        return metrics
+
+    def predict(self, texts: List[str]) -> List[dict]:
+        return self.batcher.submit(texts)
+
+    def start(self):
+        self.batcher.start()
+
+    def stop(self):
+        self.batcher.stop()
+
+
+def make_handler(service: PredictionService):
+    """HTTP handler class bound to a prediction service"""
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Buffer writes so headers and body go out in a single send
+        wbufsize = -1
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send_json(200, service.tracker.snapshot())
+            elif self.path == '/metrics':
+                self._send_json(200, service.metrics())
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(payload, dict):
+                    raise ValueError("body must be a JSON object")
+                texts = payload['texts'] if 'texts' in payload else [payload['text']]
+                if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                    raise ValueError("'text' must be a string and 'texts' a list of strings")
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {'error': f"Invalid request: {e}"})
+                return
+
+            try:
+                predictions = service.predict(texts)
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+            self._send_json(200, {'predictions': predictions})
+
+        def address_string(self):
+            # Unix socket clients have no host/port
+            return self.client_address[0] if self.client_address else 'unix'
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    return PredictionHandler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def build_server(service: PredictionService, host: str = '127.0.0.1', port: int = 8000,
+                 socket_path: Optional[str] = None):
+    """HTTP server on host:port, or on a Unix socket when socket_path is given"""
+    handler = make_handler(service)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        return ThreadingUnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(model_path: str = MODEL_PATH, host: str = '127.0.0.1', port: int = 8000,
+          socket_path: Optional[str] = None, window_ms: float = 5.0, max_batch_size: int = 256,
+          metrics_path: Optional[str] = None, metrics_interval_s: float = 10.0):
+    """
+    Load the model and cleaner once and serve predictions until interrupted
+
+    Metrics are served at /metrics and, if metrics_path is given, also
+    written there every metrics_interval_s seconds and on shutdown.
+    """
+    classifier = SpecialistClassifier.load(model_path)
+    cleaner = None
+    if classifier.feature_mode != 'binary':
+        cleaner = MedicalTextPreprocessor(cache_path=CLEANING_CACHE_PATH)
+
+    service = PredictionService(classifier, cleaner, window_ms=window_ms, max_batch_size=max_batch_size)
+    service.start()
+    exporter = None
+    if metrics_path:
+        exporter = MetricsExporter(metrics_path, service.metrics, metrics_interval_s)
+        exporter.start()
+    server = build_server(service, host, port, socket_path)
+    logging.info(f"Serving predictions on {socket_path or f'http://{host}:{port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        if exporter is not None:
+            exporter.stop()
+        if cleaner is not None:
+            cleaner.save_cache()
+        logging.info(f"Final stats: {service.tracker.snapshot()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve specialist predictions over HTTP")
+    parser.add_argument('--model', default=MODEL_PATH, help="Path to the saved model")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--socket', help="Serve on this Unix socket instead of TCP")
+    parser.add_argument('--batch-window-ms', type=float, default=5.0,
+                        help="How long to gather requests into one batch")
+    parser.add_argument('--max-batch-size', type=int, default=256)
+    parser.add_argument('--metrics-file', help="Also write the /metrics snapshot to this JSON file periodically")
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help="Seconds between metrics file writes")
+    args = parser.parse_args()
+    serve(args.model, args.host, args.port, args.socket, args.batch_window_ms, args.max_batch_size,
+          args.metrics_file, args.metrics_interval)
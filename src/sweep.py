@@ -0,0 +1,199 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+
+from src.balancer import DataBalancer
+from src.model import SpecialistClassifier
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+PROCESSED_DATA_PATH = 'data/processed/cleaned_medical_data.csv'
+SWEEP_REPORT_PATH = 'data/processed/sweep_report.json'
+
+DEFAULT_GRID = {
+    'strategy': ['aggressive', 'moderate', 'conservative'],
+    'max_features': [2000, 5000, 10000],
+    'C': [0.3, 1.0, 3.0],
+    'max_iter': [1000],
+}
+
+# Arrays shared with workers, memory-mapped read-only once per process
+_shared = {}
+
+
+def expand_grid(grid: dict) -> list:
+    """Every combination of the grid values as a list of config dicts"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def share_dataset(texts: pd.Series, labels: pd.Series, directory: str, test_size: float = 0.2):
+    """
+    Write the cleaned texts and labels as .npy files for workers to memory-map
+
+    Texts are stored as one UTF-8 byte buffer plus row offsets and labels as
+    integer codes, so every worker maps the same pages instead of receiving
+    a pickled copy of the data. The holdout split is fixed here so all
+    configs are scored on the same rows.
+
+    Returns:
+        Class names, in code order
+    """
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    codes, classes = pd.factorize(labels, sort=True)
+    train_pos, test_pos = train_test_split(np.arange(len(codes)), test_size=test_size, random_state=42)
+
+    np.save(os.path.join(directory, 'text_bytes.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    np.save(os.path.join(directory, 'text_offsets.npy'), offsets)
+    np.save(os.path.join(directory, 'label_codes.npy'), codes.astype(np.int32))
+    np.save(os.path.join(directory, 'train_positions.npy'), np.sort(train_pos))
+    np.save(os.path.join(directory, 'test_positions.npy'), np.sort(test_pos))
+    return list(classes)
+
+
+def _init_worker(directory: str, classes: list):
+    for name in ('text_bytes', 'text_offsets', 'label_codes', 'train_positions', 'test_positions'):
+        _shared[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+    _shared['classes'] = np.array(classes, dtype=object)
+    # Per-class reports from every worker would drown out sweep progress
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _texts_at(positions: np.ndarray) -> list:
+    buffer, offsets = _shared['text_bytes'], _shared['text_offsets']
+    return [buffer[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8') for i in positions]
+
+
+def evaluate_config(config: dict) -> dict:
+    """Balance the training rows, fit and score one config on the shared holdout"""
+    codes = _shared['label_codes']
+    classes = _shared['classes']
+    train_pos = np.asarray(_shared['train_positions'])
+    test_pos = np.asarray(_shared['test_positions'])
+
+    start = time.perf_counter()
+    train_labels = pd.Series(classes[codes[train_pos]])
+    keep = DataBalancer(strategy=config['strategy']).balanced_positions(train_labels)
+    train_pos = train_pos[keep]
+    balance_s = time.perf_counter() - start
+
+    classifier = SpecialistClassifier(max_features=config['max_features'], max_iter=config['max_iter'],
+                                      C=config['C'])
+    X_train, y_train = _texts_at(train_pos), classes[codes[train_pos]]
+    start = time.perf_counter()
+    classifier.pipeline.fit(X_train, y_train)
+    train_s = time.perf_counter() - start
+
+    X_test, y_test = _texts_at(test_pos), classes[codes[test_pos]]
+    start = time.perf_counter()
+    predictions = classifier.pipeline.predict(X_test)
+    predict_s = time.perf_counter() - start
+
+    return dict(
+        config,
+        train_rows=len(train_pos),
+        test_rows=len(test_pos),
+        accuracy=accuracy_score(y_test, predictions),
+        macro_f1=f1_score(y_test, predictions, average='macro', zero_division=0),
+        balance_s=balance_s,
+        train_s=train_s,
+        predict_s=predict_s,
+    )
+
+
+def rank_results(results: list, rank_by: str = 'accuracy') -> list:
+    """
+    Sort by score (ties by total time) and flag the accuracy/time frontier
+
+    A config is on the frontier if no other config is both faster to
+    train and predict and at least as accurate.
+    """
+    ranked = sorted(results, key=lambda r: (-r[rank_by], r['train_s'] + r['predict_s']))
+    best = -np.inf
+    for result in sorted(ranked, key=lambda r: r['train_s'] + r['predict_s']):
+        result['frontier'] = bool(result[rank_by] > best)
+        best = max(best, result[rank_by])
+    for rank, result in enumerate(ranked, start=1):
+        result['rank'] = rank
+    return ranked
+
+
+def run_sweep(grid: dict = None, data_path: str = PROCESSED_DATA_PATH, max_workers: Optional[int] = None,
+              rank_by: str = 'accuracy', output_path: str = SWEEP_REPORT_PATH) -> list:
+    """
+    Evaluate every balancing strategy x classifier setting in a process pool
+
+    Args:
+        grid: Values per setting (strategy, max_features, C, max_iter); DEFAULT_GRID if omitted
+        data_path: Processed CSV with cleaned_symptoms and specialist columns
+        max_workers: Worker processes, defaults to the CPU count
+        rank_by: 'accuracy' or 'macro_f1'
+        output_path: Where the ranked JSON report is written
+
+    Returns:
+        Results ranked best first
+    """
+    configs = expand_grid(grid or DEFAULT_GRID)
+    df = pd.read_csv(data_path, usecols=['cleaned_symptoms', 'specialist'], keep_default_na=False)
+    logging.info(f"Sweeping {len(configs)} configs over {len(df)} rows...")
+
+    results = []
+    with tempfile.TemporaryDirectory() as shared_dir:
+        classes = share_dataset(df['cleaned_symptoms'], df['specialist'], shared_dir)
+        del df
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shared_dir, classes)) as pool:
+            futures = {pool.submit(evaluate_config, config): config for config in configs}
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                logging.info(f"{futures[future]}: accuracy {result['accuracy']:.3f}, "
+                             f"macro F1 {result['macro_f1']:.3f}, train {result['train_s']:.2f}s")
+
+    ranked = rank_results(results, rank_by)
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump({'rank_by': rank_by, 'data_path': data_path, 'results': ranked}, f, indent=2)
+    logging.info(f"Sweep report saved to {output_path}")
+    return ranked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep balancing strategies and classifier settings")
+    parser.add_argument('--data', default=PROCESSED_DATA_PATH, help="Processed CSV written by the pipeline")
+    parser.add_argument('--strategies', nargs='+', default=DEFAULT_GRID['strategy'],
+                        choices=DEFAULT_GRID['strategy'])
+    parser.add_argument('--max-features', type=int, nargs='+', default=DEFAULT_GRID['max_features'])
+    parser.add_argument('--C', type=float, nargs='+', default=DEFAULT_GRID['C'])
+    parser.add_argument('--max-iter', type=int, nargs='+', default=DEFAULT_GRID['max_iter'])
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--rank-by', choices=['accuracy', 'macro_f1'], default='accuracy')
+    parser.add_argument('--output', default=SWEEP_REPORT_PATH)
+    args = parser.parse_args()
+
+    grid = {'strategy': args.strategies, 'max_features': args.max_features,
+            'C': args.C, 'max_iter': args.max_iter}
+    ranked = run_sweep(grid, args.data, args.workers, args.rank_by, args.output)
+
+    print(f"\n{'rank':>4} {'strategy':<13} {'max_features':>12} {'C':>6} {'accuracy':>9} "
+          f"{'macro_f1':>9} {'train_s':>8} {'predict_s':>9}")
+    for r in ranked:
+        marker = ' *' if r['frontier'] else ''
+        print(f"{r['rank']:>4} {r['strategy']:<13} {r['max_features']:>12} {r['C']:>6} {r['accuracy']:>9.3f} "
+              f"{r['macro_f1']:>9.3f} {r['train_s']:>8.2f} {r['predict_s']:>9.3f}{marker}")
+    print("\n* on the accuracy/time frontier")
@@ -1,15 +1,100 @@
 import pandas as pd
+import numpy as np
 import logging
-from typing import Tuple
+from typing import Iterable, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Rule name -> what it flags. Rules listed in drop_rules remove rows; the rest are only reported.
+RULES = {
+    'missing_required': "Null or blank value in a required column",
+    'non_binary': "Symptom value other than 0 or 1",
+    'unknown_label': "Disease label not in the known labels",
+    'duplicate': "Row identical to an earlier row, including earlier chunks",
+}
+DEFAULT_DROP_RULES = ('missing_required', 'non_binary')
+
+
+class ValidationReport:
+    """Per-rule violation counts, sample row indexes and null counts, mergeable across chunks"""
+
+    def __init__(self, max_indexes: int = 100):
+        """
+        Args:
+            max_indexes: Row indexes kept per rule; counts are always exact
+        """
+        self.max_indexes = max_indexes
+        self.rows = 0
+        self.dropped = 0
+        self.counts = {rule: 0 for rule in RULES}
+        self.indexes = {rule: [] for rule in RULES}
+        self.null_counts = {}
+
+    def add(self, rule: str, index: pd.Index, mask: np.ndarray):
+        """Record the rows of index where mask is set as violations of rule"""
+        flagged = np.flatnonzero(mask)
+        self.counts[rule] += len(flagged)
+        room = self.max_indexes - len(self.indexes[rule])
+        if room > 0 and len(flagged):
+            self.indexes[rule].extend(index[flagged[:room]].tolist())
+
+    def merge(self, other: 'ValidationReport') -> 'ValidationReport':
+        """Fold another chunk's report into this one"""
+        self.rows += other.rows
+        self.dropped += other.dropped
+        for rule in RULES:
+            self.counts[rule] += other.counts[rule]
+            room = self.max_indexes - len(self.indexes[rule])
+            self.indexes[rule].extend(other.indexes[rule][:max(room, 0)])
+        for col, count in other.null_counts.items():
+            self.null_counts[col] = self.null_counts.get(col, 0) + count
+        return self
+
+    @property
+    def ok(self) -> bool:
+        return not any(self.counts.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'dropped': self.dropped,
+            'violations': {
+                rule: {'count': self.counts[rule], 'indexes': self.indexes[rule]}
+                for rule in RULES if self.counts[rule]
+            },
+            'null_counts': self.null_counts,
+        }
+
+
 class DataValidator:
     """Checks data integrity before processing"""
-    
-    def __init__(self, required_columns: list):
+
+    def __init__(self, required_columns: list, label_column: Optional[str] = None,
+                 known_labels: Optional[Iterable[str]] = None, binary_columns: Optional[list] = None,
+                 drop_rules: Iterable[str] = DEFAULT_DROP_RULES, max_indexes: int = 100):
+        """
+        Args:
+            required_columns: Columns that must exist and be non-blank
+            label_column: Column checked against known_labels (case-insensitive)
+            known_labels: Labels that count as known; None skips the unknown_label rule
+            binary_columns: Columns that must be 0/1; None means every column
+                outside required_columns (the raw dataset layout)
+            drop_rules: Rules whose violations remove rows (see RULES)
+            max_indexes: Row indexes kept per rule in reports
+        """
+        unknown = set(drop_rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown validation rules: {sorted(unknown)}")
         self.required_columns = required_columns
+        self.label_column = label_column
+        self.known_labels = None if known_labels is None else {str(label).lower() for label in known_labels}
+        self.binary_columns = binary_columns
+        self.drop_rules = set(drop_rules)
+        self.max_indexes = max_indexes
+        # Hashes of every row seen so far, sorted, so duplicates are caught across chunks
+        self._seen_hashes = np.empty(0, dtype=np.uint64)
+        self.report = ValidationReport(max_indexes)
 
     def validate_schema(self, df: pd.DataFrame) -> bool:
         """Check if dataframe has required columns"""
@@ -20,19 +105,123 @@ class DataValidator:
         logging.info("Schema Validation Passed.")
         return True
 
-    def remove_invalid_rows(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
-        """Remove rows with null or empty values in required columns"""
-        initial_count = len(df)
-        clean_df = df.dropna(subset=self.required_columns)
-        
+    @staticmethod
+    def _blank(col: pd.Series) -> np.ndarray:
+        """Null or whitespace-only values, stripping each distinct value once"""
+        codes, uniques = pd.factorize(col)
+        if not (pd.api.types.is_object_dtype(uniques.dtype) or pd.api.types.is_string_dtype(uniques.dtype)):
+            return codes == -1
+        blank_uniques = np.asarray([not isinstance(v, str) or not v.strip() for v in uniques], dtype=bool)
+        return (codes == -1) | blank_uniques[codes]
+
+    def _check_missing_required(self, df: pd.DataFrame) -> np.ndarray:
+        mask = np.zeros(len(df), dtype=bool)
         for col in self.required_columns:
-            clean_df = clean_df[clean_df[col].astype(str).str.strip() != '']
+            mask |= self._blank(df[col])
+        return mask
+
+    def _check_non_binary(self, df: pd.DataFrame) -> np.ndarray:
+        columns = self.binary_columns
+        if columns is None:
+            columns = [col for col in df.columns if col not in self.required_columns]
+        if not columns:
+            return np.zeros(len(df), dtype=bool)
+        values = df[columns].to_numpy()
+        # NaN compares unequal to both, so missing symptom values are flagged too
+        return ((values != 0) & (values != 1)).any(axis=1)
+
+    def _check_unknown_label(self, df: pd.DataFrame) -> np.ndarray:
+        if self.known_labels is None or self.label_column is None:
+            return np.zeros(len(df), dtype=bool)
+        codes, uniques = pd.factorize(df[self.label_column])
+        # Missing and blank labels are reported by missing_required instead
+        known = np.asarray([not str(v).strip() or str(v).lower() in self.known_labels for v in uniques],
+                           dtype=bool)
+        return (codes != -1) & ~known[codes]
+
+    @staticmethod
+    def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+        """
+        64-bit hash per row
+
+        Numeric columns (the symptom matrix) are combined as a weighted sum,
+        with a weight derived from each column name. That is much faster than
+        pandas hashing 300+ columns one by one. Float columns contribute
+        their bit patterns, so NaN and non-integer values stay distinct from
+        0 and 1. Other columns use pandas hashing.
+        """
+        numeric = [col for col, dtype in df.dtypes.items() if dtype.kind in 'iubf']
+        other = [col for col, dtype in df.dtypes.items() if dtype.kind not in 'iubf']
+        hashes = np.zeros(len(df), dtype=np.uint64)
+        if other:
+            hashes = pd.util.hash_pandas_object(df[other], index=False).to_numpy()
+        if numeric:
+            weights = pd.util.hash_array(np.asarray(numeric, dtype=object)) | np.uint64(1)
+            values = df[numeric].to_numpy()
+            if values.dtype == np.float32:
+                values = values.view(np.uint32)
+            elif values.dtype.kind == 'f':
+                values = values.astype(np.float64).view(np.uint64)
+            # Sums wrap around modulo 2**64
+            hashes = hashes * np.uint64(0x9E3779B97F4A7C15)
+            for j, weight in enumerate(weights):
+                hashes += values[:, j].astype(np.uint64) * weight
+        return hashes
+
+    def _check_duplicate(self, df: pd.DataFrame) -> np.ndarray:
+        hashes = self._row_hashes(df)
+        mask = pd.Series(hashes).duplicated().to_numpy()
+        if len(self._seen_hashes):
+            positions = np.searchsorted(self._seen_hashes, hashes).clip(max=len(self._seen_hashes) - 1)
+            mask = mask | (self._seen_hashes[positions] == hashes)
+        # Rows not flagged are exactly the hashes not seen before
+        new = np.sort(hashes[~mask])
+        self._seen_hashes = np.insert(self._seen_hashes, np.searchsorted(self._seen_hashes, new), new)
+        return mask
+
+    def check(self, df: pd.DataFrame) -> Tuple[np.ndarray, ValidationReport]:
+        """
+        Run every rule over one frame or chunk without copying it
+
+        Chunks must be passed in order for duplicates to be caught across
+        them. The chunk report is also merged into self.report.
+
+        Returns:
+            (boolean mask of rows to keep, report for this chunk)
+        """
+        report = ValidationReport(self.max_indexes)
+        report.rows = len(df)
+        drop = np.zeros(len(df), dtype=bool)
+        for rule in RULES:
+            mask = getattr(self, f"_check_{rule}")(df)
+            report.add(rule, df.index, mask)
+            if rule in self.drop_rules:
+                drop |= mask
+
+        # Integer and boolean columns cannot hold nulls
+        nullable = [col for col, dtype in df.dtypes.items() if dtype.kind not in 'iub']
+        if nullable:
+            nulls = df[nullable].isna().sum()
+            report.null_counts = {col: int(count) for col, count in nulls[nulls > 0].items()}
+
+        report.dropped = int(drop.sum())
+        self.report.merge(report)
+        return ~drop, report
+
+    def remove_invalid_rows(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+        """Remove rows violating any drop rule, with one mask over the frame"""
+        keep, report = self.check(df)
+        removed_count = report.dropped
 
-        removed_count = initial_count - len(clean_df)
-        
         if removed_count > 0:
-            logging.warning(f"Data Quality Warning: Removed {removed_count} rows due to missing/empty values.")
+            counts = {rule: report.counts[rule] for rule in self.drop_rules if report.counts[rule]}
+            logging.warning(f"Data Quality Warning: Removed {removed_count} invalid rows {counts}")
+            df = df[keep]
         else:
             logging.info("Data Quality Check: No invalid rows found.")
-            
-        return clean_df, removed_count
+        reported = {rule: count for rule, count in report.counts.items()
+                    if count and rule not in self.drop_rules}
+        if reported:
+            logging.info(f"Data Quality Report: {reported}")
+
+        return df, removed_count
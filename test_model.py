@@ -1,15 +1,14 @@
 #!/usr/bin/env python3
 """Test the trained model on various symptoms"""
 
-import pickle
 import logging
-from src.cleaner import MedicalTextPreprocessor
+from src.predict import Predictor
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
 def load_model():
-    with open('data/model.pkl', 'rb') as f:
-        return pickle.load(f)
+    # Imports only what inference needs; spaCy loads only on cleaning-cache misses
+    return Predictor('data/model')
 
 def test_model():
     print("\n" + "="*70)
@@ -18,7 +17,6 @@ def test_model():
     
     # Load trained model
     model = load_model()
-    cleaner = MedicalTextPreprocessor()
     
     # Test cases across different specialties
     test_cases = [
@@ -70,8 +68,9 @@ def test_model():
     ]
     
     # Clean and predict
-    cleaned = [cleaner.clean_text(symptom) for symptom, _ in test_cases]
-    predictions = model.predict(cleaned)
+    results = model.predict([symptom for symptom, _ in test_cases])
+    model.save_cache()
+    predictions = [result['specialist'] for result in results]
     
     # Group by predicted specialty
     results_by_specialty = {}
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.balancer import DataBalancer
+
+@pytest.fixture
+def skewed_df():
+    """Majority class with two smaller specialties"""
+    labels = ['General Practice'] * 2000 + ['Cardiology'] * 150 + ['Dermatology'] * 120 + ['Oncology'] * 10
+    return pd.DataFrame({
+        'cleaned_symptoms': [f"symptom {i}" for i in range(len(labels))],
+        'specialist': labels,
+    })
+
+def test_balance_caps_majority_class(skewed_df):
+    balanced = DataBalancer(strategy='aggressive').balance_dataset(skewed_df)
+    counts = balanced['specialist'].value_counts()
+    # Minority eligible class has 120 rows, aggressive ratio is 2.0
+    assert counts['General Practice'] == 240
+    assert counts['Cardiology'] == 150
+    assert counts['Oncology'] == 10
+    assert not balanced['cleaned_symptoms'].duplicated().any()
+
+def test_balance_is_reproducible(skewed_df):
+    first = DataBalancer(random_state=7).balance_dataset(skewed_df)
+    second = DataBalancer(random_state=7).balance_dataset(skewed_df)
+    other = DataBalancer(random_state=8).balance_dataset(skewed_df)
+    pd.testing.assert_frame_equal(first, second)
+    assert not first['cleaned_symptoms'].equals(other['cleaned_symptoms'])
+
+def test_balance_missing_target_returns_input(skewed_df):
+    balancer = DataBalancer()
+    assert balancer.balance_dataset(skewed_df, target_col='missing') is skewed_df
+
+@pytest.mark.parametrize("chunk_size", [97, 1000, 10_000])
+def test_balance_csv_matches_in_memory(skewed_df, tmp_path, chunk_size):
+    path = tmp_path / "processed.csv"
+    skewed_df.to_csv(path, index=False)
+    balancer = DataBalancer(strategy='aggressive', random_state=3)
+
+    expected = balancer.balance_dataset(skewed_df)
+    streamed = balancer.balance_csv(str(path), chunk_size=chunk_size)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+
+def test_balance_csv_pending_rows_match_appended_file(skewed_df, tmp_path):
+    history, delta = skewed_df.iloc[:len(skewed_df) // 2], skewed_df.iloc[len(skewed_df) // 2:]
+    history.to_csv(tmp_path / "history.csv", index=False)
+    skewed_df.to_csv(tmp_path / "appended.csv", index=False)
+    balancer = DataBalancer(strategy='aggressive', random_state=3)
+
+    expected = balancer.balance_csv(str(tmp_path / "appended.csv"), chunk_size=97)
+    pending = balancer.balance_csv(str(tmp_path / "history.csv"), chunk_size=97, pending=delta)
+    pd.testing.assert_frame_equal(pending, expected, check_dtype=False)
+    missing = balancer.balance_csv(str(tmp_path / "none.csv"), pending=skewed_df)
+    pd.testing.assert_frame_equal(missing, expected, check_dtype=False)
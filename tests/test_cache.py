@@ -0,0 +1,92 @@
+from src.cache import CleaningCache
+
+def test_lru_eviction():
+    cache = CleaningCache(max_size=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+
+def test_hit_miss_counters():
+    cache = CleaningCache(max_size=10)
+    cache.put("fever", "fever")
+    cache.get("fever")
+    cache.get("cough")
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
+
+def test_empty_value_is_a_hit():
+    cache = CleaningCache(max_size=10)
+    cache.put("the", "")
+    assert cache.get("the") == ""
+    assert cache.hits == 1
+
+def test_persistence_is_namespaced(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = CleaningCache(namespace="en_core_web_sm-3.7.0")
+    cache.put("knees aching", "knee ache")
+    cache.save(path)
+
+    reloaded = CleaningCache(namespace="en_core_web_sm-3.7.0")
+    assert reloaded.load(path) == 1
+    assert reloaded.get("knees aching") == "knee ache"
+
+    other_model = CleaningCache(namespace="en_core_web_md-3.7.0")
+    assert other_model.load(path) == 0
+
+def test_load_respects_max_size(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = CleaningCache(max_size=10)
+    for i in range(5):
+        cache.put(f"text {i}", str(i))
+    cache.save(path)
+
+    small = CleaningCache(max_size=2)
+    small.load(path)
+    assert len(small) == 2
+    assert "text 4" in small
+
+def test_cache_hands_back_added_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = CleaningCache()
+    cache.put("fever", "fever")
+    cache.save(path)
+
+    worker = CleaningCache(track_added=True)
+    worker.load(path)
+    assert worker.pop_added() == {}
+    worker.put("chest pain", "chest pain")
+    assert worker.pop_added() == {"chest pain": "chest pain"}
+    assert worker.pop_added() == {}
+
+def test_tracked_save_writes_new_entries_and_prunes(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "cache.sqlite")
+    first = CleaningCache(max_size=10, track_added=True)
+    for i in range(10):
+        first.put(f"text {i}", str(i))
+    first.save(path)
+
+    second = CleaningCache(max_size=10, track_added=True)
+    second.load(path)
+    second.put("text 0", "changed")
+    second.save(path)
+    # Loaded entries are not pending; the changed one was written
+    assert second.pop_added() == {}
+    reloaded = CleaningCache(max_size=10)
+    assert reloaded.load(path) == 10
+    assert reloaded.get("text 0") == "changed"
+
+    for i in range(10, 25):
+        second.put(f"text {i}", str(i))
+    second.save(path)
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM cleaned_text").fetchone()[0] == 10
+    conn.close()
+    newest = CleaningCache(max_size=10)
+    newest.load(path)
+    assert "text 24" in newest and "text 14" not in newest
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.checkpoints import CheckpointStore, stage_key
+
+def test_stage_key_depends_on_inputs_and_config():
+    assert stage_key('cleaned', 'abc', 'en_core_web_sm-3.7.0') == stage_key('cleaned', 'abc', 'en_core_web_sm-3.7.0')
+    assert stage_key('cleaned', 'abc', 'en_core_web_sm-3.7.0') != stage_key('cleaned', 'abc', 'en_core_web_sm-3.8.0')
+    assert stage_key('mapped', {'acne': 'Dermatology'}) != stage_key('mapped', {'acne': 'Immunology'})
+
+def test_cached_chain_resumes_from_newest_checkpoint(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    calls = []
+
+    def compute_first():
+        calls.append('first')
+        return pd.DataFrame({'text': ['fever', '']})
+
+    def compute_second():
+        first = store.cached('first', 'k1', compute_first)
+        calls.append('second')
+        return first.assign(cleaned=first['text'].str.upper())
+
+    result = store.cached('second', 'k2', compute_second)
+    assert calls == ['first', 'second']
+
+    calls.clear()
+    resumed = store.cached('second', 'k2', compute_second)
+    assert calls == []
+    pd.testing.assert_frame_equal(resumed, result)
+    assert resumed['text'].iloc[1] == ''
+
+def test_failed_stage_is_not_checkpointed(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    assert store.cached('converted', 'k', lambda: None) is None
+    assert not store.exists('converted', 'k')
+
+def test_raw_csv_converted_once_with_uint8_symptoms(tmp_path):
+    csv_path = tmp_path / "dataset.csv"
+    pd.DataFrame({'diseases': ['flu', 'acne'], 'fever': [1, 0], 'skin rash': [0, 1]}).to_csv(csv_path, index=False)
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    dtypes = {'diseases': str, 'fever': np.uint8, 'skin rash': np.uint8}
+
+    path, key = store.convert_raw_csv(str(csv_path), dtypes)
+    df = pd.read_parquet(path)
+    assert df['fever'].dtype == np.uint8
+    assert df['skin rash'].tolist() == [0, 1]
+    assert store.convert_raw_csv(str(csv_path), dtypes) == (path, key)
+
+    csv_path.write_text("diseases,fever,skin rash\nflu,1,1\n")
+    new_path, new_key = store.convert_raw_csv(str(csv_path), dtypes)
+    assert new_key != key
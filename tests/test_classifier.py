@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from src.model import SpecialistClassifier
+
+SYMPTOMS = ['itching', 'skin rash', 'chest pain', 'palpitations', 'headache', 'blurred vision']
+SPECIALISTS = ['Dermatology', 'Cardiology', 'Neurology']
+
+@pytest.fixture(scope="module")
+def binary_data():
+    """Each specialist is driven by its own pair of symptom columns"""
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, len(SPECIALISTS), 300)
+    X = (rng.random((300, len(SYMPTOMS))) < 0.05).astype(np.uint8)
+    X[np.arange(300), 2 * y] = 1
+    return sparse.csr_matrix(X), pd.Series(np.array(SPECIALISTS)[y])
+
+def test_predict_requires_training():
+    with pytest.raises(ValueError):
+        SpecialistClassifier().predict(["headache"])
+
+def test_train_binary_predicts_matrix_and_text(binary_data):
+    X, y = binary_data
+    classifier = SpecialistClassifier()
+    classifier.train_binary(X, y, SYMPTOMS)
+    assert classifier.feature_mode == 'binary'
+    assert (classifier.predict(X) == y.to_numpy()).mean() > 0.9
+    predictions = classifier.predict(["itching all over", "chest pain at night", "bad headache"])
+    assert list(predictions) == SPECIALISTS
+
+def test_sparse_input_rejected_for_text_model(binary_data):
+    X, y = binary_data
+    classifier = SpecialistClassifier()
+    classifier.train(pd.Series(["itch skin"] * 5 + ["chest pain"] * 5), pd.Series(["Dermatology"] * 5 + ["Cardiology"] * 5))
+    with pytest.raises(ValueError):
+        classifier.predict(X)
+
+@pytest.fixture(scope="module")
+def text_data():
+    texts = ["itch skin rash", "red skin itch", "chest pain palpitation", "pain chest tight",
+             "headache blur vision", "vision blur dizzy"] * 10
+    labels = ["Dermatology", "Dermatology", "Cardiology", "Cardiology", "Neurology", "Neurology"] * 10
+    return pd.Series(texts), pd.Series(labels)
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_artifact_round_trip_text(text_data, tmp_path, mmap):
+    X, y = text_data
+    classifier = SpecialistClassifier()
+    classifier.train(X, y)
+    classifier.save_model(str(tmp_path / "model"))
+
+    loaded = SpecialistClassifier.load(str(tmp_path / "model"), mmap=mmap)
+    queries = ["itch rash", "chest pain", "blur headache", "unknown words"]
+    assert list(loaded.predict(queries)) == list(classifier.predict(queries))
+    np.testing.assert_allclose(loaded.predict_proba(queries), classifier.predict_proba(queries))
+
+def test_artifact_round_trip_binary(binary_data, tmp_path):
+    X, y = binary_data
+    classifier = SpecialistClassifier()
+    classifier.train_binary(X, y, SYMPTOMS, use_idf=False)
+    classifier.save_model(str(tmp_path / "model"))
+
+    loaded = SpecialistClassifier.load(str(tmp_path / "model"))
+    assert loaded.feature_mode == 'binary'
+    np.testing.assert_allclose(loaded.predict_proba(X), classifier.predict_proba(X))
+    assert list(loaded.predict(["chest pain"])) == ["Cardiology"]
+
+def test_save_over_live_artifact_swaps_directory(text_data, binary_data, tmp_path):
+    X, y = text_data
+    text_model = SpecialistClassifier()
+    text_model.train(X, y)
+    text_model.save_model(str(tmp_path / "model"))
+    served = SpecialistClassifier.load(str(tmp_path / "model"), mmap=True)
+    expected = served.predict_proba(["itch rash", "chest pain"])
+
+    binary_model = SpecialistClassifier()
+    binary_model.train_binary(*binary_data, SYMPTOMS, use_idf=False)
+    binary_model.save_model(str(tmp_path / "model"))
+
+    # The memory-mapped arrays of the old version are untouched by the save
+    np.testing.assert_allclose(served.predict_proba(["itch rash", "chest pain"]), expected)
+    assert SpecialistClassifier.load(str(tmp_path / "model")).feature_mode == 'binary'
+    assert sorted(p.name for p in (tmp_path / "model").iterdir()) == ['coef.npy', 'intercept.npy', 'metadata.json', 'terms.npy']
+    assert [p.name for p in tmp_path.iterdir()] == ["model"]
+
+def test_load_rejects_unknown_version(text_data, tmp_path):
+    X, y = text_data
+    classifier = SpecialistClassifier()
+    classifier.train(X, y)
+    path = tmp_path / "model"
+    classifier.save_model(str(path))
+    metadata = (path / "metadata.json").read_text().replace('"format_version": 1', '"format_version": 99')
+    (path / "metadata.json").write_text(metadata)
+    with pytest.raises(ValueError):
+        SpecialistClassifier.load(str(path))
+
+def test_partial_fit_requires_hashing_model(text_data):
+    X, y = text_data
+    classifier = SpecialistClassifier()
+    classifier.train(X, y)
+    with pytest.raises(ValueError):
+        classifier.partial_fit(X, y)
+
+def test_partial_fit_learns_new_class_after_reload(text_data, tmp_path):
+    X, y = text_data
+    classifier = SpecialistClassifier()
+    classifier.train_hashing(X, y, classes=SPECIALISTS + ['Urology'])
+    assert classifier.feature_mode == 'hashing'
+    assert list(classifier.predict(["itch rash", "chest pain", "blur headache"])) == SPECIALISTS
+    classifier.save_model(str(tmp_path / "model"))
+
+    loaded = SpecialistClassifier.load(str(tmp_path / "model"))
+    np.testing.assert_allclose(loaded.predict_proba(X), classifier.predict_proba(X))
+    loaded.partial_fit(pd.Series(["burning urination bladder"] * 30), pd.Series(["Urology"] * 30))
+    assert list(loaded.predict(["burning urination"])) == ["Urology"]
+    assert loaded.training_state == {'rows_seen': len(X) + 30, 'updates_since_refit': 1}
+
+    loaded.save_model(str(tmp_path / "model"))
+    reloaded = SpecialistClassifier.load(str(tmp_path / "model"))
+    assert reloaded.training_state['updates_since_refit'] == 1
+    assert reloaded.pipeline.named_steps['classifier'].t_ == loaded.pipeline.named_steps['classifier'].t_
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_linear_text_scorer_matches_pipeline(text_data, tmp_path, n_classes):
+    from src.artifact import LinearTextScorer
+    X, y = text_data
+    keep = y.isin(SPECIALISTS[:n_classes]).to_numpy()
+    classifier = SpecialistClassifier(max_features=8)
+    classifier.train(X[keep], y[keep])
+    classifier.save_model(str(tmp_path / "model"))
+
+    scorer = LinearTextScorer(str(tmp_path / "model"))
+    queries = ["itch rash", "Chest PAIN chest", "blur headache", "unknown words", ""]
+    np.testing.assert_allclose(scorer.predict_proba(queries), classifier.predict_proba(queries))
+    assert list(scorer.predict(queries)) == list(classifier.predict(queries))
+
+def test_linear_text_scorer_rejects_binary_model(binary_data, tmp_path):
+    from src.artifact import LinearTextScorer
+    X, y = binary_data
+    classifier = SpecialistClassifier()
+    classifier.train_binary(X, y, SYMPTOMS)
+    classifier.save_model(str(tmp_path / "model"))
+    with pytest.raises(ValueError):
+        LinearTextScorer(str(tmp_path / "model"))
+
+@pytest.mark.parametrize("mode", ["text", "hashing", "binary"])
+def test_predict_topk_matches_predict_proba(text_data, binary_data, mode):
+    classifier = SpecialistClassifier()
+    if mode == "binary":
+        X, y = binary_data
+        classifier.train_binary(X, y, SYMPTOMS)
+    else:
+        X, y = text_data
+        if mode == "text":
+            classifier.train(X, y)
+        else:
+            classifier.train_hashing(X, y, SPECIALISTS)
+    assert classifier.calibration['temperature'] > 0
+
+    labels, proba = classifier.predict_topk(X, k=2, batch_size=7, calibrated=False)
+    full = classifier.predict_proba(X)
+    best = np.argsort(-full, axis=1)[:, :2]
+    assert labels.shape == proba.shape == (len(y), 2)
+    assert (labels == classifier.classes_[best]).all()
+    np.testing.assert_allclose(proba, np.take_along_axis(full, best, axis=1))
+
+def test_topk_calibration_round_trip_and_streaming(text_data, tmp_path):
+    from src.artifact import LinearTextScorer
+    X, y = text_data
+    classifier = SpecialistClassifier()
+    classifier.train(X, y)
+    classifier.save_model(str(tmp_path / "model"))
+
+    scorer = LinearTextScorer(str(tmp_path / "model"))
+    assert scorer.temperature == classifier.temperature
+    queries = ["itch rash", "chest pain", "blur headache", "unknown words", ""]
+    labels, proba = classifier.predict_topk(queries, k=5)
+    # A generator is consumed batch by batch
+    batches = list(scorer.iter_topk(iter(queries), k=5, batch_size=2))
+    assert [len(batch_labels) for batch_labels, _ in batches] == [2, 2, 1]
+    assert labels.shape == (5, 3)
+    assert (np.concatenate([b for b, _ in batches]) == labels).all()
+    np.testing.assert_allclose(np.concatenate([p for _, p in batches]), proba)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+
+def test_fit_temperature_recovers_overconfidence():
+    from src.scoring import fit_temperature
+    rng = np.random.default_rng(0)
+    logits = rng.normal(size=(5000, 4))
+    proba = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    y = (proba.cumsum(axis=1) < rng.random((5000, 1))).sum(axis=1)
+    assert fit_temperature(3 * logits, y, 'softmax') == pytest.approx(3, rel=0.15)
+
+def test_cross_validate_reproducible_across_workers(text_data, tmp_path):
+    import json
+    X, y = text_data
+    serial = SpecialistClassifier().cross_validate(X, y, folds=3, max_workers=1)
+    parallel = SpecialistClassifier().cross_validate(X, y, folds=3, max_workers=3,
+                                                     output_path=str(tmp_path / "cv.json"))
+
+    strip = lambda evaluation: [{k: v for k, v in fold.items() if not k.endswith('_s')}
+                                for fold in evaluation['folds']]
+    assert strip(serial) == strip(parallel)
+    assert [fold['fold'] for fold in parallel['folds']] == [0, 1, 2]
+    assert sum(fold['test_rows'] for fold in parallel['folds']) == len(X)
+    assert 0 <= parallel['summary']['accuracy_mean'] <= 1
+    with open(tmp_path / "cv.json") as f:
+        assert json.load(f)['folds'][0]['report']['Cardiology']['support'] > 0
@@ -31,3 +31,19 @@ def test_medical_jargon(preprocessor):
     result = preprocessor.clean_text(raw_text)
     assert "myocardial" in result
     assert "infarction" in result
+
+def test_clean_batch_matches_clean_text(preprocessor):
+    texts = ["I have a HEADACHE!!!", None, "My knees are aching badly", ""]
+    expected = [preprocessor.clean_text(t) for t in texts]
+    assert preprocessor.clean_batch(texts, batch_size=2) == expected
+
+def test_clean_symptom_matrix_matches_clean_text(preprocessor, monkeypatch):
+    from scipy import sparse
+    columns = ['fever', 'skin rash', 'headache', 'the']
+    matrix = sparse.csr_matrix([[1, 0, 1, 1], [0, 1, 0, 0], [0, 0, 0, 0]])
+    expected = [preprocessor.clean_text("fever headache the"), preprocessor.clean_text("skin rash"), ""]
+    assert preprocessor.clean_symptom_matrix(matrix, columns) == expected
+
+    # Once compiled, rows are built from the table without spaCy
+    monkeypatch.setattr(MedicalTextPreprocessor, 'nlp', property(lambda self: pytest.fail("spaCy was used")))
+    assert preprocessor.clean_symptom_matrix(matrix, columns) == expected
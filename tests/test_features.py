@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from src.features import SymptomVocabulary
+from src.pipeline import convert_binary_symptoms_to_text, convert_symptom_matrix_to_text
+
+COLUMNS = ['fever', 'sharp chest pain', 'chest pain', 'skin rash', 'difficulty breathing']
+
+def test_free_text_projection():
+    vocab = SymptomVocabulary(COLUMNS).fit()
+    matrix = vocab.transform(["Chest pain and difficulty breathing", "nothing relevant", None])
+    assert matrix.shape == (3, len(COLUMNS))
+    assert matrix[0].indices.tolist() == [2, 4]
+    assert matrix[1].nnz == 0
+    assert matrix[2].nnz == 0
+
+def test_symptom_text_round_trip():
+    df = pd.DataFrame(np.eye(len(COLUMNS), dtype=int), columns=COLUMNS)
+    df.insert(0, 'diseases', 'x')
+    texts = df.apply(convert_binary_symptoms_to_text, axis=1)
+    projected = SymptomVocabulary(COLUMNS).fit().transform(texts)
+    expected = convert_symptom_matrix_to_text(df, as_indices=True)
+    # 'sharp chest pain' also contains the 'chest pain' phrase
+    assert (projected - expected).nnz == 1
+    assert projected[1].indices.tolist() == [1, 2]
@@ -0,0 +1,55 @@
+import json
+import os
+import pstats
+import tracemalloc
+from src.instrumentation import StageProfiler
+
+def test_stage_records_rows_and_times():
+    profiler = StageProfiler()
+    with profiler.stage('convert', rows_in=10) as record:
+        record['rows_out'] = 8
+    stats = profiler.stages['convert']
+    assert stats['rows_in'] == 10 and stats['rows_out'] == 8
+    assert stats['wall_s'] >= 0 and stats['cpu_s'] >= 0
+    assert stats['calls'] == 1
+
+def test_repeated_stages_accumulate():
+    profiler = StageProfiler(trace_memory=True)
+    for _ in range(3):
+        with profiler.stage('clean', rows_in=5) as record:
+            record['rows_out'] = 4
+            [0] * 10_000
+    stats = profiler.stages['clean']
+    assert stats['calls'] == 3
+    assert stats['rows_in'] == 15 and stats['rows_out'] == 12
+    assert stats['tracemalloc_peak_mb'] > 0
+    tracemalloc.stop()
+
+def test_profiled_stage_and_report(tmp_path):
+    profiler = StageProfiler(profile_stages=['train'], profile_dir=str(tmp_path))
+    with profiler.stage('train'):
+        sorted(range(1000))
+    with profiler.stage('save'):
+        pass
+
+    report_path = tmp_path / "run_report.json"
+    profiler.write_report(str(report_path), pipeline='text')
+    report = json.loads(report_path.read_text())
+    assert set(report['stages']) == {'train', 'save'}
+    assert report['metadata'] == {'pipeline': 'text'}
+    assert os.path.exists(report['stages']['train']['profile']['path'])
+    assert 'profile' not in report['stages']['save']
+
+def test_repeated_profiled_stage_covers_every_call(tmp_path):
+    def work():
+        sorted(range(1000))
+
+    profiler = StageProfiler(profile_stages=['clean'], profile_dir=str(tmp_path))
+    for _ in range(3):
+        with profiler.stage('clean'):
+            work()
+    report = profiler.write_report(str(tmp_path / "run_report.json"))
+
+    stats = pstats.Stats(report['stages']['clean']['profile']['path']).stats
+    calls = [value[1] for (_, _, function), value in stats.items() if function == 'work']
+    assert calls == [3]
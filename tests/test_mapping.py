@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.mapping import SpecialistMapper, edit_distance, normalize_label
+
+MAPPING = {
+    'Migraine': 'Neurology',
+    'peptic ulcer diseae': 'Gastroenterology',
+    'acne': 'Dermatology',
+}
+
+def make_mapper(**kwargs):
+    return SpecialistMapper(MAPPING, default='General Practice', **kwargs)
+
+def test_normalize_and_edit_distance():
+    assert normalize_label('  Peptic-Ulcer   DISEASE ') == 'peptic ulcer disease'
+    assert edit_distance('kitten', 'sitting') == 3
+    assert edit_distance('', 'abc') == 3
+
+def test_exact_and_fuzzy_matches():
+    mapper = make_mapper(apply_fuzzy=True)
+    labels = pd.Series(['migraine', 'Peptic ulcer disease', 'migraines', 'acne'], index=[5, 6, 7, 8])
+    result = mapper.map(labels)
+
+    assert result.tolist() == ['Neurology', 'Gastroenterology', 'Neurology', 'Dermatology']
+    assert result.index.tolist() == [5, 6, 7, 8]
+    assert mapper.row_counts['exact'] == 2
+    assert mapper.row_counts['fuzzy'] == 2
+    assert mapper.fuzzy_matches['migraines']['key'] == 'migraine'
+
+def test_unrelated_and_missing_labels_get_default():
+    mapper = make_mapper()
+    labels = pd.Series(['broken arm', None, 'broken arm', np.nan, 'acne'])
+    result = mapper.map(labels)
+
+    assert result.tolist() == ['General Practice'] * 4 + ['Dermatology']
+    report = mapper.report()
+    assert report['rows'] == {'unmapped': 2, 'missing': 2, 'exact': 1}
+    assert report['top_unmapped'] == {'broken arm': 2}
+
+def test_threshold_rejects_distant_matches():
+    assert make_mapper(threshold=0.99, apply_fuzzy=True).resolve('migraines')[0] is None
+    assert make_mapper(threshold=0.8, apply_fuzzy=True).resolve('migraines')[0] == 'Neurology'
+
+def test_fuzzy_matches_are_suggested_unless_applied():
+    mapper = make_mapper()
+    result = mapper.map(pd.Series(['migraines', 'migraines', 'acne']))
+
+    assert result.tolist() == ['General Practice', 'General Practice', 'Dermatology']
+    assert mapper.report()['rows'] == {'unmapped': 2, 'exact': 1, 'missing': 0}
+    assert mapper.fuzzy_matches['migraines'] == {'key': 'migraine', 'specialist': 'Neurology',
+                                                 'similarity': 0.889, 'applied': False}
+
+def test_reviewed_aliases_map_and_letter_variants_never_match():
+    mapper = SpecialistMapper({'hepatitis a': 'Infectious Disease', 'type 1 diabetes': 'Endocrinology'},
+                              aliases={'Hepatitis-A virus': 'hepatitis a'}, apply_fuzzy=True)
+    result = mapper.map(pd.Series(['hepatitis a virus', 'hepatitis f', 'type 2 diabetes']))
+
+    assert result.tolist() == ['Infectious Disease', 'General Practice', 'General Practice']
+    assert mapper.row_counts['alias'] == 1
+    assert mapper.fuzzy_matches == {}
+    with pytest.raises(ValueError):
+        SpecialistMapper({'acne': 'Dermatology'}, aliases={'akne': 'eczema'})
+
+def test_resolutions_memoized_across_chunks():
+    mapper = make_mapper(apply_fuzzy=True)
+    mapper.map(pd.Series(['migraines', 'acne']))
+    resolved = dict(mapper._resolved)
+    mapper.map(pd.Series(['acne', 'migraines', 'migraines']))
+
+    assert mapper._resolved == resolved
+    assert mapper.row_counts['fuzzy'] == 3
+    assert mapper.row_counts['exact'] == 2
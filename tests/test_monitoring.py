@@ -0,0 +1,90 @@
+import json
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from src.model import SpecialistClassifier
+from src.monitoring import CountMinSketch, MetricsExporter, PredictionMonitor, latency_histogram
+from src.server import PredictionService
+
+CLASSES = ['Cardiology', 'Dermatology']
+
+def test_count_min_sketch_never_undercounts():
+    sketch = CountMinSketch(width=64, depth=4)
+    tokens = [f"token{i}" for i in range(200)]
+    counts = np.arange(1, 201)
+    sketch.add(tokens, counts)
+    sketch.add(tokens[:10], [5] * 10)
+
+    estimates = sketch.estimate(tokens)
+    assert (estimates >= counts + np.r_[[5] * 10, [0] * 190]).all()
+    assert sketch.total == counts.sum() + 50
+
+def test_latency_histogram_buckets():
+    histogram = latency_histogram(np.array([0.2, 0.7, 3.0, 9000.0]))
+    assert histogram['0.5'] == 1 and histogram['1'] == 1 and histogram['5'] == 1 and histogram['inf'] == 1
+    assert sum(histogram.values()) == 4
+
+def test_monitor_counts_predictions_and_oov_tokens():
+    monitor = PredictionMonitor(CLASSES, vocabulary={'chest', 'pain', 'rash'}, top=2, token_sample_rate=1.0)
+    probabilities = np.array([[0.9, 0.1], [0.2, 0.8], [0.6, 0.4]])
+    monitor.observe(["chest pain", "rash rash spots", "zzz zzz"], probabilities, inference_s=0.003)
+    monitor.observe(["zzz"], np.array([[0.3, 0.7]]), inference_s=0.03)
+
+    snapshot = monitor.snapshot()
+    assert snapshot['texts'] == 4 and snapshot['batches'] == 2
+    assert snapshot['predictions'] == {'Cardiology': 2, 'Dermatology': 2}
+    assert snapshot['window']['share'] == {'Cardiology': 0.5, 'Dermatology': 0.5}
+    assert snapshot['window']['inference_ms']['5'] == 1 and snapshot['window']['inference_ms']['50'] == 1
+    tokens = snapshot['tokens']
+    assert tokens['total'] == 8
+    assert tokens['oov_rate'] == 4 / 8
+    assert tokens['empty_text_rate'] == 0.5
+    assert list(tokens['top_oov']) == ['zzz', 'spots']
+    assert tokens['top_oov']['zzz'] >= 3
+
+def test_monitor_samples_tokens_across_batches():
+    monitor = PredictionMonitor(CLASSES, vocabulary={'pain'}, token_sample_rate=0.25)
+    for start in range(0, 10, 3):
+        texts = [f"pain t{i}" for i in range(start, min(start + 3, 10))]
+        monitor.observe(texts, np.tile([[0.5, 0.5]], (len(texts), 1)), inference_s=0.001)
+
+    snapshot = monitor.snapshot()
+    assert snapshot['texts'] == 10
+    # Texts 0, 4 and 8 of the stream are tokenized
+    assert snapshot['tokens']['sampled_texts'] == 3
+    assert set(snapshot['tokens']['top_oov']) == {'t0', 't4', 't8'}
+
+def test_monitor_buffers_batches_and_bounds_queued_texts():
+    monitor = PredictionMonitor(CLASSES, vocabulary={'pain'}, token_sample_rate=1.0,
+                                max_queued_texts=4, flush_batches=2)
+    for i in range(5):
+        monitor.observe([f"pain t{i}", "pain"], np.array([[0.8, 0.2], [0.3, 0.7]]), inference_s=0.001)
+    # Four batches were folded in by observe, the fifth by snapshot
+    assert monitor.predictions.tolist() == [4, 4]
+
+    snapshot = monitor.snapshot()
+    assert snapshot['predictions'] == {'Cardiology': 5, 'Dermatology': 5}
+    assert snapshot['window']['texts'] == 10
+    assert snapshot['mean_confidence'] == 0.75
+    assert snapshot['tokens']['sampled_texts'] == 4
+    assert snapshot['tokens']['dropped_texts'] == 6
+    assert set(snapshot['tokens']['top_oov']) == {'t3', 't4'}
+
+def test_service_metrics_and_exporter(tmp_path):
+    X = sparse.csr_matrix(np.repeat(np.eye(2, dtype=np.uint8), 10, axis=0))
+    classifier = SpecialistClassifier()
+    classifier.train_binary(X, pd.Series(['Dermatology'] * 10 + ['Cardiology'] * 10), ['itching', 'chest pain'])
+
+    service = PredictionService(classifier)
+    # Only every tenth text is tokenized by default; the first one always is
+    service.predict_batch(["sore throat", "chest pain", "itching"])
+    metrics = service.metrics()
+    assert metrics['texts'] == 3
+    assert metrics['predictions']['Cardiology'] >= 1
+    assert 'throat' in metrics['tokens']['top_oov']
+
+    exporter = MetricsExporter(str(tmp_path / "metrics.json"), service.metrics, interval_s=60)
+    exporter.start()
+    exporter.stop()
+    with open(tmp_path / "metrics.json") as f:
+        assert json.load(f)['texts'] == 3
@@ -0,0 +1,106 @@
+import pandas as pd
+import pytest
+from src import orchestrator
+from src.cache import CleaningCache
+from src.orchestrator import PROCESS, MultiDatasetPipeline, Stage, StageGraph
+
+def chunks_of(spec):
+    start, stop = spec
+    return ([i] for i in range(start, stop))
+
+def square(chunk, dataset):
+    return [x * x for x in chunk]
+
+def fail_on_three(chunk, dataset):
+    if chunk == [9]:
+        raise ValueError("bad chunk")
+    return chunk
+
+def make_graph(**kwargs):
+    written = []
+    stages = [
+        Stage('read', chunks_of),
+        Stage('square', square, inputs=('read',), kind=PROCESS),
+        # Odd squares are dropped; ordered stages still see the rest in order
+        Stage('even', lambda chunk, dataset: chunk if chunk[0] % 2 == 0 else None, inputs=('square',)),
+        Stage('write', lambda chunk, dataset: written.append((dataset, chunk[0])), inputs=('even',), ordered=True),
+        Stage('total', lambda chunks: {name: sum(c[0] for c in cs) for name, cs in chunks.items()},
+              inputs=('even',), reduce=True),
+        Stage('grand_total', lambda totals: sum(totals.values()), inputs=('total',), reduce=True),
+    ]
+    return StageGraph(stages, process_workers=2, **kwargs), written
+
+def test_graph_pipelines_chunks_in_order():
+    graph, written = make_graph(max_in_flight=3)
+    results = graph.run({'a': (0, 10), 'b': (10, 14)})
+
+    assert results['total'] == {'a': 0 + 4 + 16 + 36 + 64, 'b': 100 + 144}
+    assert results['grand_total'] == 120 + 244
+    assert [x for name, x in written if name == 'a'] == [0, 4, 16, 36, 64]
+    assert [x for name, x in written if name == 'b'] == [100, 144]
+    assert graph.stats['read']['chunks'] == 14
+    assert graph.stats['write']['chunks'] == 7
+
+def test_graph_rejects_bad_wiring():
+    with pytest.raises(ValueError):
+        StageGraph([Stage('clean', square, inputs=('read',))])
+    with pytest.raises(ValueError):
+        StageGraph([Stage('read', chunks_of), Stage('total', sum, inputs=('read',), reduce=True),
+                    Stage('after', square, inputs=('total',))])
+
+def test_graph_raises_stage_errors():
+    graph = StageGraph([Stage('read', chunks_of), Stage('square', square, inputs=('read',)),
+                        Stage('check', fail_on_three, inputs=('square',), kind=PROCESS)],
+                       process_workers=1, max_in_flight=2)
+    with pytest.raises(ValueError, match="bad chunk"):
+        graph.run({'a': (0, 100)})
+
+class StubCleaner:
+    """Lowercases text instead of running spaCy, caching like the real cleaner"""
+
+    def __init__(self, cache_path=None, compiled_vocabulary=False):
+        self.cache = CleaningCache()
+        self.compiled_vocabulary = compiled_vocabulary
+
+    def clean_batch(self, texts, batch_size=None, n_process=None):
+        cleaned = [text.lower() for text in texts]
+        for text, value in zip(texts, cleaned):
+            self.cache.put(text, value)
+        return cleaned
+
+    def save_cache(self):
+        pass
+
+def test_multi_dataset_pipeline_writes_each_dataset_in_order(tmp_path, monkeypatch):
+    # Worker processes are forked after the patch, so they clean with the stub too
+    monkeypatch.setattr(orchestrator, 'MedicalTextPreprocessor', StubCleaner)
+    columns = ['diseases', 'fever', 'headache', 'skin rash']
+    pd.DataFrame([['flu', 1, 0, 0], ['acne', 0, 0, 1], ['migraine', 0, 1, 0], ['stroke', 1, 1, 0],
+                  ['asthma', 1, 0, 1]], columns=columns).to_csv(tmp_path / 'north.csv', index=False)
+    # Shares the acne row with north, repeats its own flu row and has a row with no symptoms
+    pd.DataFrame([['flu', 0, 1, 1], ['acne', 0, 0, 1], ['flu', 0, 1, 1], ['anemia', 0, 0, 0],
+                  ['malaria', 1, 0, 0]], columns=columns).to_csv(tmp_path / 'south.csv', index=False)
+
+    pipeline = MultiDatasetPipeline(output_dir=str(tmp_path / 'out'), chunk_size=2, train=False, cache_path=None,
+                                    process_workers=2, max_in_flight=3)
+    report = pipeline.run([str(tmp_path / 'north.csv'), str(tmp_path / 'south.csv')])
+
+    north = pd.read_csv(tmp_path / 'out' / 'north.csv')
+    south = pd.read_csv(tmp_path / 'out' / 'south.csv')
+    assert north['label'].tolist() == ['flu', 'acne', 'migraine', 'stroke', 'asthma']
+    # Duplicates are reported, not dropped; rows without symptoms are dropped
+    assert south['label'].tolist() == ['flu', 'acne', 'flu', 'malaria']
+    assert north['specialist'].tolist() == ['General Practice', 'Dermatology', 'Neurology', 'Neurology',
+                                            'Pulmonology']
+    assert (south['cleaned_symptoms'] == south['text'].str.lower()).all()
+    assert report['metadata']['rows_written'] == {'north': 5, 'south': 4}
+    # Each dataset is validated on its own: the acne row shared with north is not a duplicate
+    validation = report['metadata']['validation']
+    assert validation['south']['violations']['duplicate'] == {'count': 1, 'indexes': [2]}
+    assert 'duplicate' not in validation['north']['violations']
+    assert report['metadata']['training'] is None
+    assert pipeline.graph.stats['clean']['chunks'] == 6
+
+    # Cleanings done in the workers were merged into the parent's cache
+    for text in pd.concat([north, south])['text']:
+        assert text in pipeline.cleaner.cache
@@ -0,0 +1,112 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src import pipeline
+from src.cache import CleaningCache
+from src.instrumentation import StageProfiler
+from src.model import SpecialistClassifier
+from src.pipeline import (build_mapper, build_validator, convert_binary_symptoms_to_text,
+                          convert_symptom_matrix_to_text, read_raw_dtypes, validate_stage)
+
+@pytest.fixture
+def symptom_df():
+    """Small frame in the raw dataset layout"""
+    return pd.DataFrame({
+        'diseases': ['flu', 'acne', 'migraine', 'asthma'],
+        'fever': [1, 0, 0, 1],
+        'skin rash': [0, 1, 0, 0],
+        'headache': [1, 0, 0, 1],
+        'shortness of breath': [0, 0, 0, 1],
+    }, index=[10, 11, 12, 13])
+
+def test_vectorized_conversion_matches_rowwise(symptom_df):
+    expected = symptom_df.apply(convert_binary_symptoms_to_text, axis=1)
+    result = convert_symptom_matrix_to_text(symptom_df)
+    assert result.tolist() == expected.tolist()
+    assert result.index.equals(symptom_df.index)
+
+def test_vectorized_conversion_no_symptoms(symptom_df):
+    result = convert_symptom_matrix_to_text(symptom_df)
+    assert result.loc[12] == 'no symptoms reported'
+
+def test_vectorized_conversion_indices(symptom_df):
+    matrix = convert_symptom_matrix_to_text(symptom_df, as_indices=True)
+    assert matrix.shape == (4, 4)
+    assert matrix[3].indices.tolist() == [0, 2, 3]
+    assert matrix[2].nnz == 0
+    assert matrix.dtype == np.uint8
+
+def test_vectorized_conversion_empty(symptom_df):
+    result = convert_symptom_matrix_to_text(symptom_df.iloc[:0])
+    assert len(result) == 0
+
+def test_blank_and_non_integer_cells_are_dropped_not_fatal(tmp_path):
+    path = tmp_path / "raw.csv"
+    path.write_text("diseases,fever,headache\nmigraine,0,1\nacne,,1\nflu,0.5,0\nstroke,1,0\n")
+    validator = build_validator()
+    chunks = pd.read_csv(path, chunksize=2, dtype=read_raw_dtypes(str(path)))
+    valid = [validate_stage(chunk, validator, StageProfiler()) for chunk in chunks]
+
+    df = pd.concat(valid)
+    assert df['diseases'].tolist() == ['migraine', 'stroke']
+    assert (df.dtypes.iloc[1:] == np.uint8).all()
+    report = validator.report.to_dict()
+    assert report['violations']['non_binary'] == {'count': 2, 'indexes': [1, 2]}
+    assert report['null_counts'] == {'fever': 1}
+
+def test_pipeline_mapper_resolves_variant_labels():
+    labels = pd.Series(['osteoarthritis', 'Migraines', 'peptic ulcer disease', 'heart attacks'])
+    assert build_mapper().map(labels).tolist() == ['Rheumatology', 'Neurology', 'Gastroenterology',
+                                                   'General Practice']
+    # --apply-fuzzy also maps unreviewed near matches
+    assert build_mapper(apply_fuzzy=True).map(labels).tolist()[-1] == 'Cardiology'
+
+class StubCleaner:
+    """Lowercases text instead of running spaCy"""
+
+    def __init__(self, cache_path=None, compiled_vocabulary=False):
+        self.cache = CleaningCache()
+        self.compiled_vocabulary = compiled_vocabulary
+
+    def clean_batch(self, texts, batch_size=None, n_process=None):
+        return [text.lower() for text in texts]
+
+    def save_cache(self):
+        pass
+
+def write_raw(path, labels):
+    symptoms = {'fever': [1, 0, 1, 0], 'skin rash': [0, 1, 0, 1], 'headache': [1, 0, 0, 1]}
+    pd.DataFrame({'diseases': labels, **{col: values * (len(labels) // 4) for col, values in symptoms.items()}}
+                 ).to_csv(path, index=False)
+
+def test_full_runs_leave_incremental_state_alone(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, 'MedicalTextPreprocessor', StubCleaner)
+    (tmp_path / 'data' / 'raw').mkdir(parents=True)
+    write_raw(pipeline.RAW_DATA_PATH, ['flu', 'acne', 'migraine', 'asthma'] * 10)
+    write_raw('delta_1.csv', ['flu', 'acne', 'migraine', 'stroke'])
+    write_raw('delta_2.csv', ['acne', 'asthma', 'stroke', 'flu'])
+
+    def report():
+        with open(pipeline.RUN_REPORT_PATH) as f:
+            return json.load(f)['metadata']
+
+    pipeline.update_model('delta_1.csv')
+    assert report()['full_refit']
+    history = pd.read_csv(pipeline.INCREMENTAL_HISTORY_PATH)
+    assert history['label'].tolist() == ['flu', 'acne', 'migraine', 'stroke']
+
+    pipeline.run_pipeline()
+    assert SpecialistClassifier.load(pipeline.MODEL_PATH).feature_mode == 'text'
+    assert len(pd.read_csv(pipeline.PROCESSED_DATA_PATH)) == 40
+
+    pipeline.update_model('delta_2.csv')
+    assert not report()['full_refit']
+    model = SpecialistClassifier.load(pipeline.INCREMENTAL_MODEL_PATH)
+    assert model.feature_mode == 'hashing'
+    assert len(model.training_state['applied_deltas']) == 2
+
+    # Already applied: skipped without touching the history
+    pipeline.update_model('delta_1.csv')
+    assert len(pd.read_csv(pipeline.INCREMENTAL_HISTORY_PATH)) == 8
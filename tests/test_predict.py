@@ -0,0 +1,63 @@
+import subprocess
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from src.model import SpecialistClassifier
+from src.predict import Predictor, PrewarmedForkServer, format_predictions, format_topk, request_prewarmed
+
+SYMPTOMS = ['itching', 'skin rash', 'chest pain', 'palpitations']
+
+@pytest.fixture
+def binary_model(tmp_path):
+    """Binary feature models need no cleaner, so no spaCy model is required"""
+    X = sparse.csr_matrix(np.repeat(np.eye(4, dtype=np.uint8), 20, axis=0))
+    y = pd.Series(['Dermatology'] * 40 + ['Cardiology'] * 40)
+    classifier = SpecialistClassifier()
+    classifier.train_binary(X, y, SYMPTOMS)
+    classifier.save_model(str(tmp_path / "model"))
+    return str(tmp_path / "model")
+
+def test_format_predictions():
+    results = format_predictions(['A', 'B'], np.array([[0.25, 0.75]]))
+    assert results == [{'specialist': 'B', 'probability': 0.75, 'probabilities': {'A': 0.25, 'B': 0.75}}]
+
+def test_predictor_binary_model(binary_model):
+    predictor = Predictor(binary_model)
+    assert predictor.cleaner is None
+    results = predictor.predict(["chest pain", "itching all over"])
+    assert [r['specialist'] for r in results] == ['Cardiology', 'Dermatology']
+
+def test_format_topk():
+    results = format_topk(np.array([['B', 'A']]), np.array([[0.75, 0.25]]))
+    assert results == [{'top': [{'specialist': 'B', 'probability': 0.75}, {'specialist': 'A', 'probability': 0.25}]}]
+
+def test_predictor_iter_topk_streams_batches(binary_model):
+    predictor = Predictor(binary_model)
+    texts = (text for text in ["chest pain", "itching", "palpitations"])
+    batches = list(predictor.iter_topk(texts, k=1, batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert [r['top'][0]['specialist'] for batch in batches for r in batch] == ['Cardiology', 'Dermatology', 'Cardiology']
+
+def test_prewarmed_fork_server(binary_model, tmp_path):
+    predictor = Predictor(binary_model)
+    predictor.prewarm()
+    socket_path = str(tmp_path / "predict.sock")
+    server = PrewarmedForkServer(socket_path, predictor)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        for _ in range(3):
+            results = request_prewarmed(socket_path, ["chest pain", "skin rash"])
+            assert [r['specialist'] for r in results] == ['Cardiology', 'Dermatology']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_cli_imports_stay_light():
+    code = ("import sys, src.predict, src.artifact, src.cleaner; "
+            "print(sorted(m for m in ('spacy', 'sklearn', 'pandas', 'scipy') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
@@ -0,0 +1,77 @@
+import http.client
+import json
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from src.model import SpecialistClassifier
+from src.server import LatencyTracker, MicroBatcher, PredictionService, build_server
+
+@pytest.fixture
+def batcher():
+    calls = []
+    def handler(texts):
+        calls.append(list(texts))
+        return [t.upper() for t in texts]
+    tracker = LatencyTracker()
+    batcher = MicroBatcher(handler, window_ms=50, max_batch_size=64, tracker=tracker)
+    batcher.start()
+    yield batcher, calls, tracker
+    batcher.stop()
+
+def test_results_match_inputs(batcher):
+    batcher, _, _ = batcher
+    assert batcher.submit(["fever", "cough"]) == ["FEVER", "COUGH"]
+
+def test_concurrent_requests_are_batched(batcher):
+    batcher, calls, tracker = batcher
+    results = {}
+    def client(i):
+        results[i] = batcher.submit([f"text {i}"])
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(results[i] == [f"TEXT {i}"] for i in range(20))
+    assert len(calls) < 20
+    stats = tracker.snapshot()
+    assert stats['requests'] == 20
+    assert stats['p99_ms'] >= stats['p50_ms'] > 0
+
+def test_handler_errors_propagate():
+    def handler(texts):
+        raise RuntimeError("model failure")
+    batcher = MicroBatcher(handler, window_ms=1)
+    batcher.start()
+    try:
+        with pytest.raises(RuntimeError):
+            batcher.submit(["fever"])
+    finally:
+        batcher.stop()
+
+def test_http_rejects_non_object_bodies():
+    X = sparse.csr_matrix(np.repeat(np.eye(2, dtype=np.uint8), 10, axis=0))
+    classifier = SpecialistClassifier()
+    classifier.train_binary(X, pd.Series(['Dermatology'] * 10 + ['Cardiology'] * 10), ['itching', 'chest pain'])
+    service = PredictionService(classifier, window_ms=1)
+    service.start()
+    server = build_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        for body in ['["chest pain"]', '"chest pain"', '123', '{"texts": "chest pain"}']:
+            conn.request('POST', '/predict', body=body)
+            response = conn.getresponse()
+            assert response.status == 400
+            assert 'Invalid request' in json.loads(response.read())['error']
+        conn.request('POST', '/predict', body='{"text": "chest pain"}')
+        response = conn.getresponse()
+        assert response.status == 200
+        assert len(json.loads(response.read())['predictions']) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
@@ -0,0 +1,34 @@
+import json
+import pandas as pd
+from src.sweep import expand_grid, rank_results, run_sweep
+
+def test_expand_grid():
+    configs = expand_grid({'strategy': ['moderate', 'aggressive'], 'C': [0.1, 1.0, 10.0]})
+    assert len(configs) == 6
+    assert {'strategy': 'aggressive', 'C': 10.0} in configs
+
+def test_rank_results_flags_frontier():
+    results = [
+        {'name': 'slow_best', 'accuracy': 0.9, 'train_s': 5.0, 'predict_s': 1.0},
+        {'name': 'fast_ok', 'accuracy': 0.8, 'train_s': 1.0, 'predict_s': 0.1},
+        {'name': 'slow_worse', 'accuracy': 0.7, 'train_s': 4.0, 'predict_s': 1.0},
+    ]
+    ranked = rank_results(results)
+    assert [r['name'] for r in ranked] == ['slow_best', 'fast_ok', 'slow_worse']
+    assert [r['rank'] for r in ranked] == [1, 2, 3]
+    assert [r['frontier'] for r in ranked] == [True, True, False]
+
+def test_run_sweep_writes_ranked_report(tmp_path):
+    texts = ["itch skin rash", "red skin itch", "chest pain palpitation", "pain chest tight",
+             "headache blur vision", "vision blur dizzy"] * 20
+    labels = ["Dermatology", "Dermatology", "Cardiology", "Cardiology", "Neurology", "Neurology"] * 20
+    data_path = tmp_path / "processed.csv"
+    pd.DataFrame({'cleaned_symptoms': texts, 'specialist': labels}).to_csv(data_path, index=False)
+
+    grid = {'strategy': ['moderate'], 'max_features': [10, 100], 'C': [1.0], 'max_iter': [100]}
+    output = tmp_path / "sweep.json"
+    ranked = run_sweep(grid, str(data_path), max_workers=2, output_path=str(output))
+
+    assert len(ranked) == 2
+    assert all(r['accuracy'] == 1.0 and r['test_rows'] == 24 for r in ranked)
+    assert json.loads(output.read_text())['results'][0]['rank'] == 1
@@ -0,0 +1,27 @@
+import pandas as pd
+from benchmarks.synthetic import SyntheticSymptomData
+from src.pipeline import SPECIALIST_MAP
+
+def test_generated_shape_and_dtypes():
+    df = SyntheticSymptomData(n_symptoms=50, seed=1).generate(1200)
+    assert df.shape == (1200, 51)
+    assert df.columns[0] == 'diseases'
+    assert (df.dtypes.iloc[1:] == 'uint8').all()
+    assert set(pd.unique(df.iloc[:, 1:].to_numpy().ravel())) <= {0, 1}
+
+def test_generation_is_deterministic():
+    first = SyntheticSymptomData(n_symptoms=20, seed=3).generate(500)
+    second = SyntheticSymptomData(n_symptoms=20, seed=3).generate(500)
+    pd.testing.assert_frame_equal(first, second)
+
+def test_majority_class_share():
+    df = SyntheticSymptomData(n_symptoms=20, majority_share=0.9).generate(20_000)
+    general = ~df['diseases'].str.lower().isin(SPECIALIST_MAP)
+    assert 0.88 < general.mean() < 0.92
+
+def test_write_csv_in_chunks(tmp_path):
+    data = SyntheticSymptomData(n_symptoms=10)
+    path = tmp_path / "raw" / "dataset.csv"
+    data.write_csv(str(path), 250, chunk_size=100)
+    pd.testing.assert_frame_equal(pd.read_csv(path), data.generate(250).reset_index(drop=True),
+                                  check_dtype=False)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.validator import DataValidator, ValidationReport
+
+KNOWN = ['flu', 'acne']
+
+@pytest.fixture
+def raw_df():
+    """Raw layout with one violation of each rule"""
+    return pd.DataFrame({
+        'diseases': ['flu', 'Acne', '  ', 'mystery', 'flu', 'acne'],
+        'fever': np.array([1, 0, 1, 0, 1, 2], dtype=np.uint8),
+        'cough': np.array([0, 1, 0, 1, 0, 0], dtype=np.uint8),
+    }, index=[10, 11, 12, 13, 14, 15])
+
+def make_validator(**kwargs):
+    return DataValidator(required_columns=['diseases'], label_column='diseases', known_labels=KNOWN, **kwargs)
+
+def test_check_reports_every_rule(raw_df):
+    keep, report = make_validator().check(raw_df)
+    assert report.indexes == {
+        'missing_required': [12],
+        'non_binary': [15],
+        'unknown_label': [13],
+        'duplicate': [14],
+    }
+    # Only missing_required and non_binary drop rows by default
+    assert keep.tolist() == [True, True, False, True, True, False]
+    assert report.dropped == 2
+
+def test_remove_invalid_rows_keeps_frame_when_clean(raw_df):
+    validator = make_validator()
+    clean = raw_df.loc[[10, 11]]
+    result, removed = validator.remove_invalid_rows(clean)
+    assert removed == 0
+    assert result is clean
+
+def test_remove_invalid_rows_with_duplicate_rule(raw_df):
+    result, removed = make_validator(drop_rules=['duplicate']).remove_invalid_rows(raw_df)
+    assert removed == 1
+    assert 14 not in result.index
+
+def test_duplicates_tracked_across_chunks(raw_df):
+    validator = make_validator()
+    for start in range(0, len(raw_df), 2):
+        validator.check(raw_df.iloc[start:start + 2])
+    assert validator.report.counts['duplicate'] == 1
+    assert validator.report.indexes['duplicate'] == [14]
+    assert validator.report.rows == len(raw_df)
+
+def test_nulls_counted_and_flagged():
+    df = pd.DataFrame({'diseases': ['flu', None], 'fever': [1.0, np.nan]})
+    keep, report = make_validator().check(df)
+    assert report.null_counts == {'diseases': 1, 'fever': 1}
+    assert report.counts['non_binary'] == 1
+    assert keep.tolist() == [True, False]
+
+def test_report_merge_caps_indexes():
+    first, second = ValidationReport(max_indexes=2), ValidationReport(max_indexes=2)
+    first.add('duplicate', pd.Index([1, 2]), np.array([True, False]))
+    second.add('duplicate', pd.Index([3, 4]), np.array([True, True]))
+    first.merge(second)
+    assert first.counts['duplicate'] == 3
+    assert first.indexes['duplicate'] == [1, 3]
+    assert not first.ok
+
+def test_unknown_rule_rejected():
+    with pytest.raises(ValueError):
+        make_validator(drop_rules=['no_such_rule'])